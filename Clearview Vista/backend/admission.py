@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Controle de admissão para a Plataforma Inteligente da Clearview Capital.
+Este módulo limita a taxa de requisições de cada cliente (token bucket) e o
+número de requisições pesadas (reconstrução da carteira, relatórios, backtest)
+executadas ao mesmo tempo, rejeitando o excesso de imediato com um tempo de
+espera sugerido (Retry-After), para que as rotas de leitura continuem rápidas.
+"""
+
+import math
+import time
+import threading
+from collections import OrderedDict
+
+class TokenBucket:
+    """Balde de fichas: `rate` fichas por segundo, acumulando até `burst`."""
+
+    __slots__ = ('tokens', 'updated_at')
+
+    def __init__(self, burst, now):
+        self.tokens = float(burst)
+        self.updated_at = now
+
+    def take(self, cost, rate, burst, now):
+        """
+        Consome fichas, se houver (chamado com a trava do controlador).
+
+        Args:
+            cost (float): Fichas necessárias
+            rate (float): Reposição por segundo
+            burst (float): Capacidade do balde
+            now (float): Instante atual (time.monotonic)
+
+        Returns:
+            float: 0 se admitido, ou segundos até haver fichas suficientes
+        """
+        self.tokens = min(burst, self.tokens + (now - self.updated_at) * rate)
+        self.updated_at = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / rate
+
+    def charge(self, cost, limit, rate, burst, now):
+        """
+        Consome fichas podendo deixar o balde negativo (chamado com a trava do controlador).
+
+        Custos maiores que `limit` exigem `limit` fichas e deixam uma dívida,
+        paga pela reposição antes que o cliente seja admitido de novo.
+
+        Args:
+            cost (float): Fichas consumidas
+            limit (float): Máximo de fichas exigidas de uma vez
+            rate (float): Reposição por segundo
+            burst (float): Capacidade do balde
+            now (float): Instante atual (time.monotonic)
+
+        Returns:
+            float: 0 se admitido, ou segundos até haver fichas suficientes
+        """
+        required = min(cost, limit)
+        wait = self.take(required, rate, burst, now)
+        if not wait:
+            self.tokens -= cost - required
+        return wait
+
+class AdmissionController:
+    """
+    Decide, sem bloquear, se uma requisição pode ser atendida agora.
+
+    Cada cliente tem um balde de fichas; requisições pesadas custam `heavy_cost`
+    fichas e, além disso, disputam um número fixo de vagas globais. Quando não há
+    vaga, o Retry-After sugerido é a duração média recente das requisições pesadas.
+    """
+
+    def __init__(self, rate=20.0, burst=40.0, heavy_cost=5.0, heavy_limit=2, max_clients=10000):
+        """
+        Inicializa o controlador.
+
+        Args:
+            rate (float): Fichas por segundo de cada cliente (0 desativa o limite por cliente)
+            burst (float): Capacidade do balde de cada cliente
+            heavy_cost (float): Fichas consumidas por uma requisição pesada
+            heavy_limit (int): Requisições pesadas simultâneas (0 desativa o limite global)
+            max_clients (int): Baldes mantidos em memória (os mais antigos são descartados)
+        """
+        self.rate = rate
+        self.burst = max(burst, heavy_cost)
+        self.heavy_cost = heavy_cost
+        self.heavy_limit = heavy_limit
+        self.max_clients = max_clients
+
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.heavy_in_flight = 0
+        self._heavy_seconds = 1.0
+
+        self.rate_limited = 0
+        self.overloaded = 0
+
+    def admit(self, client, heavy=False):
+        """
+        Tenta admitir uma requisição.
+
+        Args:
+            client (str): Identificação do cliente (ex: endereço IP)
+            heavy (bool): Se a requisição ocupa uma vaga de requisição pesada
+
+        Returns:
+            tuple: None se admitida (pesadas devem chamar release ao terminar),
+                ou (motivo, segundos sugeridos para nova tentativa)
+        """
+        now = time.monotonic()
+        with self._lock:
+            if heavy and self.heavy_limit and self.heavy_in_flight >= self.heavy_limit:
+                self.overloaded += 1
+                return 'overloaded', max(1, math.ceil(self._heavy_seconds))
+
+            if self.rate > 0:
+                wait = self._bucket(client, now).take(self.heavy_cost if heavy else 1.0, self.rate, self.burst, now)
+                if wait:
+                    self.rate_limited += 1
+                    return 'rate_limited', max(1, math.ceil(wait))
+
+            if heavy:
+                self.heavy_in_flight += 1
+        return None
+
+    def charge(self, client, cost):
+        """
+        Cobra fichas adicionais de uma requisição já admitida (ex: uma ficha por
+        ação buscada em /api/stocks/batch). Como a requisição já pagou a sua ficha,
+        custos acima de `burst - 1` exigem o restante do balde cheio e deixam o
+        excedente como dívida.
+
+        Args:
+            client (str): Identificação do cliente
+            cost (float): Fichas a cobrar
+
+        Returns:
+            tuple: None se cobrada, ou ('rate_limited', segundos sugeridos para nova tentativa)
+        """
+        if self.rate <= 0 or cost <= 0:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            wait = self._bucket(client, now).charge(float(cost), self.burst - 1.0, self.rate, self.burst, now)
+            if wait:
+                self.rate_limited += 1
+                return 'rate_limited', max(1, math.ceil(wait))
+        return None
+
+    def _bucket(self, client, now):
+        """Balde do cliente, criado cheio na primeira requisição (chamado com a trava)."""
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(self.burst, now)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+        return bucket
+
+    def release(self, elapsed):
+        """
+        Libera a vaga de uma requisição pesada admitida.
+
+        Args:
+            elapsed (float): Duração da requisição (segundos), usada no Retry-After
+        """
+        with self._lock:
+            self.heavy_in_flight -= 1
+            self._heavy_seconds = 0.8 * self._heavy_seconds + 0.2 * elapsed
@@ -17,6 +17,15 @@ import time
 import re
 import openai
 
+# Adicionar diretório pai ao path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from analysis.instrumentation import metrics
+from analysis.news_store import NewsStore
+from analysis.llm_cache import LLMCache, cache_key
+from analysis.llm_executor import LLMExecutor
+from analysis.keyword_sentiment import keyword_sentiment
+from analysis.translation import TranslationMemory, translate_text
+
 # Configuração de logging
 logging.basicConfig(
     level=logging.INFO,
@@ -28,22 +37,126 @@ logging.basicConfig(
 )
 logger = logging.getLogger("AIIntegration")
 
+# Modelo de chat usado em todas as chamadas
+CHAT_MODEL = "gpt-3.5-turbo"
+
+# Tempo máximo (segundos) de uma chamada ao modelo
+LLM_TIMEOUT = float(os.environ.get("CLEARVIEW_LLM_TIMEOUT", 60))
+
+# Prazo (segundos) de uma chamada, incluindo a espera por vaga e as repetições;
+# esgotado, é usada a alternativa local
+LLM_DEADLINE = float(os.environ.get("CLEARVIEW_LLM_DEADLINE", LLM_TIMEOUT))
+
+# Chamadas ao modelo em andamento ao mesmo tempo (por processo)
+LLM_CONCURRENCY = int(os.environ.get("CLEARVIEW_LLM_CONCURRENCY", 4))
+
+# Repetições de uma chamada após erros de limite de taxa (HTTP 429)
+LLM_MAX_RETRIES = int(os.environ.get("CLEARVIEW_LLM_MAX_RETRIES", 4))
+
+# Espaço em disco (MB) das respostas do modelo guardadas em cache (0 desativa)
+LLM_CACHE_MB = float(os.environ.get("CLEARVIEW_LLM_CACHE_MB", 64))
+
+# Orçamento de tokens da entrada de cada lote de análise de sentimento
+SENTIMENT_BATCH_TOKENS = int(os.environ.get("CLEARVIEW_SENTIMENT_BATCH_TOKENS", 2500))
+
+# Tokens de resposta reservados por notícia de um lote ({"id", "sentiment", "relevance"})
+SENTIMENT_TOKENS_PER_ITEM = 25
+
+# Janela de contexto do modelo (entrada + resposta)
+CHAT_CONTEXT_TOKENS = 4096
+
+# Caracteres do resumo de cada notícia enviados no lote
+SENTIMENT_SUMMARY_CHARS = 600
+
+# Classificações aceitas na resposta do modelo
+SENTIMENTS = ('positivo', 'neutro', 'negativo')
+
+# Instrução de sistema da análise de sentimento (individual e em lote)
+SENTIMENT_SYSTEM_PROMPT = "Você é um analista financeiro especializado em análise de notícias do mercado."
+
+# Pergunta de um lote de análise de sentimento (uma notícia em JSON por linha)
+SENTIMENT_BATCH_PROMPT = """Analise o sentimento de cada notícia financeira abaixo (uma por linha, em JSON).
+
+Classifique o sentimento como:
+- positivo: a notícia indica perspectivas positivas para o mercado ou ações relacionadas
+- neutro: a notícia é factual sem indicar direção clara
+- negativo: a notícia indica perspectivas negativas para o mercado ou ações relacionadas
+
+Avalie também a relevância para investidores de 1 a 10.
+
+Responda apenas com um array JSON, um objeto por notícia, na mesma ordem:
+[{{"id": "<id>", "sentiment": "positivo|neutro|negativo", "relevance": <1 a 10>}}]
+
+Notícias:
+{items}"""
+
+def estimate_tokens(text):
+    """Estimativa conservadora de tokens de um texto (cerca de 3 caracteres por token)."""
+    return len(text) // 3 + 1
+
+def plan_sentiment_batches(lines, budget=SENTIMENT_BATCH_TOKENS):
+    """
+    Agrupa as notícias em lotes que cabem no orçamento de tokens.
+    
+    Args:
+        lines (list): Linha JSON de cada notícia, na ordem de envio
+        budget (int): Tokens de entrada por lote (instruções incluídas)
+        
+    Returns:
+        list: Lotes, cada um uma lista de índices de `lines`
+    """
+    overhead = estimate_tokens(SENTIMENT_SYSTEM_PROMPT + SENTIMENT_BATCH_PROMPT)
+    batches, current, used = [], [], overhead
+    for index, line in enumerate(lines):
+        cost = estimate_tokens(line) + 1
+        # Entrada dentro do orçamento e resposta dentro da janela de contexto
+        fits = used + cost <= budget and used + cost + (len(current) + 1) * SENTIMENT_TOKENS_PER_ITEM <= CHAT_CONTEXT_TOKENS
+        if current and not fits:
+            batches.append(current)
+            current, used = [], overhead
+        current.append(index)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+# Executor compartilhado por todas as instâncias: o limite de concorrência vale para o processo
+llm_executor = LLMExecutor(concurrency=LLM_CONCURRENCY, deadline=LLM_DEADLINE, max_retries=LLM_MAX_RETRIES)
+
+# Instrução de sistema dos relatórios de ações
+REPORT_SYSTEM_PROMPT = "Você é um analista financeiro da Clearview Capital, especializado em análise fundamentalista de ações."
+
 class AIIntegration:
     """
     Classe para integração com modelos de IA para análise de notícias,
     tradução e geração de relatórios.
     """
     
-    def __init__(self, data_dir="/home/ubuntu/clearview_project/data"):
+    def __init__(self, data_dir="/home/ubuntu/clearview_project/data", market_overview=None, news_store=None):
         """
         Inicializa a integração com IA.
         
         Args:
             data_dir (str): Diretório para armazenamento de dados
+            market_overview (MarketOverview): Panorama do mercado compartilhado (resumo e newsletter)
+            news_store (NewsStore): Armazenamento de notícias compartilhado (um novo em data_dir se None)
         """
         self.data_dir = data_dir
+        self.market_overview = market_overview
         os.makedirs(data_dir, exist_ok=True)
         
+        # Histórico de notícias buscadas, sem duplicatas
+        self.news_store = news_store if news_store is not None else NewsStore(data_dir=data_dir)
+        
+        # Respostas do modelo já pagas (mesmo modelo, mensagens e parâmetros)
+        self.llm_cache = LLMCache(data_dir=data_dir, max_bytes=int(LLM_CACHE_MB * 1024 * 1024))
+        
+        # Títulos e resumos já traduzidos (pelo modelo ou pelo dicionário)
+        self.translation_memory = TranslationMemory(data_dir=data_dir)
+        
+        # Chamadas ao modelo: concorrência limitada, prazo e repetição após limite de taxa
+        self.llm = llm_executor
+        
         # Configurar OpenAI (usando API gratuita conforme solicitado)
         # Em um ambiente de produção, a chave seria armazenada de forma segura
         # e não hardcoded no código
@@ -85,6 +198,151 @@ class AIIntegration:
         except Exception as e:
             logger.error(f"Erro ao salvar dados de notícias: {e}")
     
+    def _chat_messages(self, system_prompt, prompt, temperature, max_tokens, task, validate=None):
+        """
+        Monta as mensagens de uma chamada e consulta o cache.
+        
+        Returns:
+            tuple: (mensagens, chave no cache ou None, resposta em cache ou None)
+        """
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ]
+        key = cache_key(CHAT_MODEL, messages, temperature, max_tokens) if task else None
+        cached = self.llm_cache.get(key, task) if key is not None else None
+        if cached is not None and validate is not None and not validate(cached):
+            cached = None
+        return messages, key, cached
+    
+    @staticmethod
+    def _has_json_object(text):
+        """Verifica se a resposta do modelo contém um objeto JSON válido (validação antes do cache)."""
+        json_match = re.search(r'{.*}', text, re.DOTALL)
+        if not json_match:
+            return False
+        try:
+            return isinstance(json.loads(json_match.group(0)), dict)
+        except ValueError:
+            return False
+    
+    async def _acreate(self, messages, temperature, max_tokens, key=None, task=None, validate=None):
+        """
+        Chamada à OpenAI (no laço do executor), guardando a resposta no cache.
+        
+        Só vão para o cache respostas não vazias e aceitas por `validate`: uma
+        resposta que o chamador não consegue interpretar é paga de novo na
+        próxima vez, em vez de ser servida do cache até expirar.
+        
+        Returns:
+            str: Texto da resposta
+        """
+        # Sessão do executor (a OpenAI criaria e, se cancelada, deixaria aberta uma por chamada)
+        openai.aiosession.set(self.llm.http_session())
+        with metrics.upstream_call('openai', CHAT_MODEL):
+            response = await openai.ChatCompletion.acreate(
+                model=CHAT_MODEL,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                request_timeout=LLM_TIMEOUT
+            )
+        text = response.choices[0].message.content.strip()
+        if key is not None and text and (validate is None or validate(text)):
+            self.llm_cache.put(key, task, text, (response.get('usage') or {}).get('total_tokens'))
+        return text
+    
+    async def _acreate_stream(self, messages, temperature, max_tokens):
+        """
+        Chamada à OpenAI em streaming (no laço do executor).
+        
+        Yields:
+            str: Trechos do texto da resposta, à medida que são gerados
+        """
+        openai.aiosession.set(self.llm.http_session())
+        with metrics.upstream_call('openai', CHAT_MODEL):
+            response = await openai.ChatCompletion.acreate(
+                model=CHAT_MODEL,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                request_timeout=LLM_TIMEOUT,
+                stream=True
+            )
+            try:
+                async for chunk in response:
+                    text = chunk.choices[0].delta.get('content')
+                    if text:
+                        yield text
+            finally:
+                # Interrompido (prazo ou desistência): liberar a conexão da resposta
+                await response.aclose()
+    
+    def _chat_call(self, system_prompt, prompt, temperature=0.7, max_tokens=500, task=None, validate=None):
+        """
+        Prepara uma chamada ao modelo de chat para o executor.
+        
+        Args:
+            system_prompt (str): Instrução de sistema
+            prompt (str): Mensagem do usuário
+            temperature (float): Temperatura da amostragem
+            max_tokens (int): Limite de tokens da resposta
+            task (str): Tarefa (ex: 'sentiment'); com ela, respostas idênticas vêm do cache
+            validate (callable): Recebe o texto e retorna True se ele pode ir para o cache
+            
+        Returns:
+            callable: Função sem argumentos que retorna a corrotina da chamada
+        """
+        messages, key, cached = self._chat_messages(system_prompt, prompt, temperature, max_tokens, task, validate)
+        if cached is not None:
+            async def from_cache():
+                return cached
+            return from_cache
+        return lambda: self._acreate(messages, temperature, max_tokens, key, task, validate)
+    
+    def _chat_completion(self, system_prompt, prompt, temperature=0.7, max_tokens=500, task=None, validate=None):
+        """
+        Faz uma chamada ao modelo de chat da OpenAI pelo executor compartilhado.
+        
+        Args:
+            system_prompt (str): Instrução de sistema
+            prompt (str): Mensagem do usuário
+            temperature (float): Temperatura da amostragem
+            max_tokens (int): Limite de tokens da resposta
+            task (str): Tarefa (ex: 'sentiment'); com ela, respostas idênticas vêm do cache
+            validate (callable): Recebe o texto e retorna True se ele pode ir para o cache
+            
+        Returns:
+            str: Texto da resposta
+            
+        Raises:
+            DeadlineExceeded: Se o prazo da chamada esgotou
+        """
+        messages, key, cached = self._chat_messages(system_prompt, prompt, temperature, max_tokens, task, validate)
+        if cached is not None:
+            return cached
+        return self.llm.run(lambda: self._acreate(messages, temperature, max_tokens, key, task, validate))
+    
+    async def _achat_completion(self, system_prompt, prompt, temperature=0.7, max_tokens=500, task=None, validate=None):
+        """
+        Versão assíncrona de _chat_completion: aguarda a OpenAI sem ocupar uma thread.
+        
+        Args:
+            system_prompt (str): Instrução de sistema
+            prompt (str): Mensagem do usuário
+            temperature (float): Temperatura da amostragem
+            max_tokens (int): Limite de tokens da resposta
+            task (str): Tarefa (ex: 'report'); com ela, respostas idênticas vêm do cache
+            validate (callable): Recebe o texto e retorna True se ele pode ir para o cache
+            
+        Returns:
+            str: Texto da resposta
+        """
+        messages, key, cached = self._chat_messages(system_prompt, prompt, temperature, max_tokens, task, validate)
+        if cached is not None:
+            return cached
+        return await self.llm.arun(lambda: self._acreate(messages, temperature, max_tokens, key, task, validate))
+    
     def fetch_financial_news(self, limit=20, language="pt-br"):
         """
         Busca notícias financeiras de diversas fontes.
@@ -213,7 +471,7 @@ class AIIntegration:
                 'relevance': None
             },
             {
-                'title': 'Microsoft's cloud revenue surges 30% in latest quarter',
+                'title': "Microsoft's cloud revenue surges 30% in latest quarter",
                 'date': datetime.now().isoformat(),
                 'summary': 'Microsoft reported a 30% increase in cloud revenue for its Azure platform, highlighting the continued strong demand for cloud computing services.',
                 'source': 'Wall Street Journal',
@@ -237,10 +495,11 @@ class AIIntegration:
         # Limitar quantidade
         news = news[:limit]
         
-        # Atualizar dados de notícias
+        # Atualizar dados de notícias (a última busca) e o histórico
         self.news_data["news"] = news
         self.news_data["last_update"] = datetime.now().isoformat()
         self.save_news_data()
+        self.news_store.add(news)
         
         return news
     
@@ -259,8 +518,27 @@ class AIIntegration:
         # Se temos acesso à API OpenAI, usar para análise de sentimento
         if self.use_openai:
             try:
-                # Preparar prompt para análise de sentimento
-                prompt = f"""
+                # Fazer chamada à API
+                result_text = self._chat_completion(*self._sentiment_request(news))
+                self._apply_sentiment(news, result_text)
+            except Exception as e:
+                logger.error(f"Erro na análise de sentimento com OpenAI: {e}")
+                # Fallback para análise simples
+                news = self._simple_sentiment_analysis(news)
+        else:
+            # Fallback para análise simples se não temos acesso à API
+            news = self._simple_sentiment_analysis(news)
+        
+        return news
+    
+    def _sentiment_request(self, news):
+        """
+        Argumentos da chamada de análise de sentimento de uma notícia.
+        
+        Returns:
+            tuple: (instrução de sistema, prompt, temperatura, limite de tokens, tarefa, validação)
+        """
+        prompt = f"""
                 Analise o sentimento da seguinte notícia financeira:
                 
                 Título: {news['title']}
@@ -281,91 +559,205 @@ class AIIntegration:
                     "explanation": "breve explicação da análise"
                 }}
                 """
-                
-                # Fazer chamada à API
-                response = openai.ChatCompletion.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": "Você é um analista financeiro especializado em análise de notícias do mercado."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.3,
-                    max_tokens=150
-                )
-                
-                # Extrair resposta
-                result_text = response.choices[0].message.content.strip()
-                
-                # Extrair JSON da resposta
-                json_match = re.search(r'{.*}', result_text, re.DOTALL)
-                if json_match:
-                    result = json.loads(json_match.group(0))
-                    
-                    # Atualizar notícia com análise
-                    news['sentiment'] = result.get('sentiment', 'neutro')
-                    news['relevance'] = result.get('relevance', 5)
-                    news['sentiment_explanation'] = result.get('explanation', '')
-                    
-                    logger.info(f"Análise de sentimento concluída: {news['sentiment']}, relevância: {news['relevance']}")
-                else:
-                    # Fallback se não conseguir extrair JSON
-                    logger.warning("Não foi possível extrair JSON da resposta da API")
-                    news['sentiment'] = 'neutro'
-                    news['relevance'] = 5
-            except Exception as e:
-                logger.error(f"Erro na análise de sentimento com OpenAI: {e}")
-                # Fallback para análise simples
-                news = self._simple_sentiment_analysis(news)
-        else:
-            # Fallback para análise simples se não temos acesso à API
-            news = self._simple_sentiment_analysis(news)
+        return SENTIMENT_SYSTEM_PROMPT, prompt, 0.3, 150, 'sentiment', self._has_json_object
+    
+    def _apply_sentiment(self, news, result_text):
+        """
+        Aplica a resposta do modelo à notícia.
         
-        return news
+        Returns:
+            bool: True se a resposta tinha o JSON da análise
+        """
+        # Extrair JSON da resposta
+        json_match = re.search(r'{.*}', result_text, re.DOTALL)
+        if not json_match:
+            # Fallback se não conseguir extrair JSON
+            logger.warning("Não foi possível extrair JSON da resposta da API")
+            news['sentiment'] = 'neutro'
+            news['relevance'] = 5
+            return False
+        result = json.loads(json_match.group(0))
+        
+        # Atualizar notícia com análise
+        news['sentiment'] = result.get('sentiment', 'neutro')
+        news['relevance'] = result.get('relevance', 5)
+        news['sentiment_explanation'] = result.get('explanation', '')
+        
+        logger.info(f"Análise de sentimento concluída: {news['sentiment']}, relevância: {news['relevance']}")
+        return True
     
-    def _simple_sentiment_analysis(self, news):
+    @staticmethod
+    def _sentiment_item(news):
+        """Linha JSON de uma notícia num lote de sentimento (sem o id, que depende da posição no lote)."""
+        return json.dumps({
+            'title': news.get('title', ''),
+            'summary': (news.get('summary') or '')[:SENTIMENT_SUMMARY_CHARS],
+            'source': news.get('source', '')
+        }, ensure_ascii=False)
+    
+    @staticmethod
+    def _sentiment_item_key(item):
+        """Chave, no cache de respostas, do resultado em lote de uma notícia (pelo conteúdo, não pela posição)."""
+        messages = [
+            {"role": "system", "content": SENTIMENT_SYSTEM_PROMPT},
+            {"role": "user", "content": SENTIMENT_BATCH_PROMPT.format(items=item)}
+        ]
+        return cache_key(CHAT_MODEL, messages, 0.3, SENTIMENT_TOKENS_PER_ITEM)
+    
+    def analyze_news_sentiment_batch(self, news_list, token_budget=SENTIMENT_BATCH_TOKENS):
         """
-        Análise de sentimento simples baseada em palavras-chave.
+        Analisa o sentimento de várias notícias com poucas chamadas ao modelo.
+        
+        O resultado de cada notícia fica no cache pelo seu conteúdo: só as notícias
+        ainda não analisadas são agrupadas em lotes dentro de `token_budget`, e
+        cada lote é classificado em uma única chamada, que responde um array JSON
+        de {id, sentiment, relevance}. Notícias ausentes ou inválidas na resposta
+        (ou de um lote que falhou) são analisadas individualmente, ao mesmo tempo.
         
         Args:
-            news (dict): Notícia a ser analisada
+            news_list (list): Notícias a serem analisadas (atualizadas no lugar)
+            token_budget (int): Tokens de entrada por lote
             
         Returns:
-            dict: Notícia com análise de sentimento
+            list: Notícias com análise de sentimento
         """
-        # Palavras-chave positivas
-        positive_words = [
-            'aumento', 'crescimento', 'lucro', 'recorde', 'supera', 'alta',
-            'positivo', 'expansão', 'valorização', 'sucesso', 'melhora',
-            'increase', 'growth', 'profit', 'record', 'exceeds', 'rise',
-            'positive', 'expansion', 'appreciation', 'success', 'improvement'
+        if not self.use_openai:
+            return keyword_sentiment.analyze(news_list)
+        
+        items = [self._sentiment_item(news) for news in news_list]
+        keys = [self._sentiment_item_key(item) for item in items]
+        
+        pending = []
+        for index, key in enumerate(keys):
+            result = self._cached_sentiment(key)
+            if result is None:
+                pending.append(index)
+                continue
+            news_list[index]['sentiment'] = result['sentiment']
+            news_list[index]['relevance'] = result['relevance']
+        
+        # O id de cada linha é a posição da notícia em news_list
+        lines = [json.dumps(dict(json.loads(items[index]), id=str(index)), ensure_ascii=False) for index in pending]
+        batches = [[pending[position] for position in batch] for batch in plan_sentiment_batches(lines, token_budget)]
+        line_of = dict(zip(pending, lines))
+        
+        # Os lotes seguem ao mesmo tempo (até o limite de concorrência do executor)
+        futures = [
+            self.llm.submit(self._chat_call(
+                SENTIMENT_SYSTEM_PROMPT,
+                SENTIMENT_BATCH_PROMPT.format(items='\n'.join(line_of[index] for index in batch)),
+                temperature=0.3,
+                max_tokens=len(batch) * SENTIMENT_TOKENS_PER_ITEM + 20
+            ))
+            for batch in batches
         ]
         
-        # Palavras-chave negativas
-        negative_words = [
-            'queda', 'redução', 'prejuízo', 'abaixo', 'crise', 'baixa',
-            'negativo', 'contração', 'desvalorização', 'fracasso', 'piora',
-            'decline', 'reduction', 'loss', 'below', 'crisis', 'fall',
-            'negative', 'contraction', 'depreciation', 'failure', 'worsening'
-        ]
+        retry = []
+        for batch, future in zip(batches, futures):
+            try:
+                results = self._parse_sentiment_batch(future.result())
+            except Exception as e:
+                logger.error(f"Erro na análise de sentimento em lote com OpenAI: {e}")
+                results = {}
+            
+            for index in batch:
+                result = results.get(str(index))
+                if result is None:
+                    retry.append(index)
+                    continue
+                news_list[index]['sentiment'] = result['sentiment']
+                news_list[index]['relevance'] = result['relevance']
+                self._remember_sentiment(index, items, keys, result)
+        
+        # Itens que o lote não resolveu: uma chamada por notícia, todas ao mesmo tempo (com o fallback simples)
+        retries = {index: self.llm.submit(self._chat_call(*self._sentiment_request(news_list[index]))) for index in retry}
+        for index, future in retries.items():
+            news = news_list[index]
+            try:
+                if self._apply_sentiment(news, future.result()):
+                    result = self._valid_sentiment(news)
+                    if result is not None:
+                        self._remember_sentiment(index, items, keys, result)
+            except Exception as e:
+                logger.error(f"Erro na análise de sentimento com OpenAI: {e}")
+                self._simple_sentiment_analysis(news)
         
-        # Combinar título e resumo para análise
-        text = (news['title'] + ' ' + news['summary']).lower()
+        logger.info(f"Sentimento de {len(news_list)} notícias ({len(news_list) - len(pending)} do cache) em {len(batches)} lote(s) e {len(retry)} chamada(s) individuais")
+        return news_list
+    
+    def _remember_sentiment(self, index, items, keys, result):
+        """Guarda no cache o resultado de uma notícia, para os próximos lotes que a incluírem."""
+        self.llm_cache.put(keys[index], 'sentiment', json.dumps(result, ensure_ascii=False),
+                           estimate_tokens(items[index]) + SENTIMENT_TOKENS_PER_ITEM)
+    
+    @staticmethod
+    def _valid_sentiment(item):
+        """
+        Normaliza o resultado de uma notícia respondido pelo modelo.
         
-        # Contar ocorrências de palavras positivas e negativas
-        positive_count = sum(1 for word in positive_words if word.lower() in text)
-        negative_count = sum(1 for word in negative_words if word.lower() in text)
+        Args:
+            item (dict): Objeto com 'sentiment' e 'relevance'
+            
+        Returns:
+            dict: {'sentiment', 'relevance'}, ou None se inválido
+        """
+        if not isinstance(item, dict):
+            return None
+        sentiment = str(item.get('sentiment', '')).lower()
+        try:
+            relevance = int(item.get('relevance'))
+        except (TypeError, ValueError):
+            return None
+        if sentiment in SENTIMENTS and 1 <= relevance <= 10:
+            return {'sentiment': sentiment, 'relevance': relevance}
+        return None
+    
+    def _cached_sentiment(self, key):
+        """Resultado em cache de uma notícia, ou None se ausente ou inválido."""
+        cached = self.llm_cache.get(key, 'sentiment')
+        if cached is None:
+            return None
+        try:
+            return self._valid_sentiment(json.loads(cached))
+        except ValueError:
+            return None
+    
+    @classmethod
+    def _parse_sentiment_batch(cls, result_text):
+        """
+        Interpreta a resposta de um lote de análise de sentimento.
         
-        # Determinar sentimento
-        if positive_count > negative_count:
-            sentiment = 'positivo'
-        elif negative_count > positive_count:
-            sentiment = 'negativo'
-        else:
-            sentiment = 'neutro'
+        Args:
+            result_text (str): Resposta do modelo
+            
+        Returns:
+            dict: id -> {'sentiment', 'relevance'}, somente os itens válidos
+        """
+        json_match = re.search(r'\[.*\]', result_text, re.DOTALL)
+        if not json_match:
+            logger.warning("Não foi possível extrair o array JSON da resposta em lote")
+            return {}
+        
+        results = {}
+        for item in json.loads(json_match.group(0)):
+            result = cls._valid_sentiment(item)
+            if result is not None:
+                results[str(item.get('id'))] = result
+        return results
+    
+    def _simple_sentiment_analysis(self, news):
+        """
+        Análise de sentimento simples baseada em palavras-chave.
         
-        # Determinar relevância (simples)
-        # Notícias com mais palavras-chave (positivas ou negativas) são consideradas mais relevantes
-        relevance = min(10, max(1, positive_count + negative_count))
+        Args:
+            news (dict): Notícia a ser analisada
+            
+        Returns:
+            dict: Notícia com análise de sentimento
+        """
+        # Léxico ponderado compilado: uma varredura do texto, com limites de palavra
+        positive, negative = keyword_sentiment.score(f"{news['title']} {news['summary']}")
+        sentiment, relevance = keyword_sentiment.classify(positive, negative)
         
         # Atualizar notícia
         news['sentiment'] = sentiment
@@ -388,59 +780,19 @@ class AIIntegration:
         if news['language'] == target_language:
             return news
         
+        # Notícia já traduzida antes: sem chamada à API nem dicionário
+        remembered = self._remembered_translation(news, target_language)
+        if remembered is not None:
+            return remembered
+        
         logger.info(f"Traduzindo notícia de {news['language']} para {target_language}: {news['title']}")
         
         # Se temos acesso à API OpenAI, usar para tradução
         if self.use_openai:
             try:
-                # Preparar prompt para tradução
-                language_name = "português brasileiro" if target_language == "pt-br" else "inglês"
-                prompt = f"""
-                Traduza o seguinte texto para {language_name}:
-                
-                Título: {news['title']}
-                Resumo: {news['summary']}
-                
-                Responda apenas com um JSON no formato:
-                {{
-                    "title": "título traduzido",
-                    "summary": "resumo traduzido"
-                }}
-                """
-                
                 # Fazer chamada à API
-                response = openai.ChatCompletion.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": "Você é um tradutor profissional especializado em finanças e economia."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.3,
-                    max_tokens=300
-                )
-                
-                # Extrair resposta
-                result_text = response.choices[0].message.content.strip()
-                
-                # Extrair JSON da resposta
-                json_match = re.search(r'{.*}', result_text, re.DOTALL)
-                if json_match:
-                    result = json.loads(json_match.group(0))
-                    
-                    # Criar cópia da notícia com tradução
-                    translated_news = news.copy()
-                    translated_news['title'] = result.get('title', news['title'])
-                    translated_news['summary'] = result.get('summary', news['summary'])
-                    translated_news['language'] = target_language
-                    translated_news['original_language'] = news['language']
-                    
-                    logger.info(f"Tradução concluída: {translated_news['title']}")
-                    
-                    return translated_news
-                else:
-                    # Fallback se não conseguir extrair JSON
-                    logger.warning("Não foi possível extrair JSON da resposta da API")
-                    return news
+                result_text = self._chat_completion(*self._translation_request(news, target_language))
+                return self._apply_translation(news, result_text, target_language)
             except Exception as e:
                 logger.error(f"Erro na tradução com OpenAI: {e}")
                 # Fallback para tradução simples
@@ -449,91 +801,152 @@ class AIIntegration:
             # Fallback para tradução simples se não temos acesso à API
             return self._simple_translation(news, target_language)
     
-    def _simple_translation(self, news, target_language):
+    def translate_news_many(self, news_list, target_language="pt-br"):
         """
-        Tradução simples baseada em dicionário.
+        Traduz várias notícias ao mesmo tempo (até o limite de concorrência do executor).
         
         Args:
-            news (dict): Notícia a ser traduzida
+            news_list (list): Notícias a serem traduzidas
             target_language (str): Idioma alvo (pt-br ou en-us)
             
         Returns:
-            dict: Notícia com tradução simples
+            list: Notícias traduzidas, na mesma ordem
         """
-        # Este é um método de fallback muito simples
-        # Em uma implementação real, usaríamos uma API de tradução como Google Translate
-        
-        # Dicionário simples de tradução (apenas para demonstração)
-        en_to_pt = {
-            "Fed": "Fed",
-            "interest rate": "taxa de juros",
-            "cut": "corte",
-            "Apple": "Apple",
-            "AI": "IA",
-            "features": "recursos",
-            "iPhone": "iPhone",
-            "Mac": "Mac",
-            "Tesla": "Tesla",
-            "delivers": "entrega",
-            "record": "recorde",
-            "vehicles": "veículos",
-            "Amazon": "Amazon",
-            "expands": "expande",
-            "same-day delivery": "entrega no mesmo dia",
-            "cities": "cidades",
-            "Microsoft": "Microsoft",
-            "cloud": "nuvem",
-            "revenue": "receita",
-            "surges": "aumenta",
-            "quarter": "trimestre"
+        translated = list(news_list)
+        pending = []
+        for index, news in enumerate(news_list):
+            if news.get('language', target_language) == target_language:
+                continue
+            remembered = self._remembered_translation(news, target_language)
+            if remembered is not None:
+                translated[index] = remembered
+            else:
+                pending.append(index)
+        if not self.use_openai:
+            for index in pending:
+                translated[index] = self._simple_translation(news_list[index], target_language)
+            return translated
+        
+        futures = {
+            index: self.llm.submit(self._chat_call(*self._translation_request(news_list[index], target_language)))
+            for index in pending
         }
+        for index, future in futures.items():
+            news = news_list[index]
+            try:
+                translated[index] = self._apply_translation(news, future.result(), target_language)
+            except Exception as e:
+                logger.error(f"Erro na tradução com OpenAI: {e}")
+                translated[index] = self._simple_translation(news, target_language)
+        return translated
+    
+    def _translation_request(self, news, target_language):
+        """
+        Argumentos da chamada de tradução de uma notícia.
         
-        pt_to_en = {v: k for k, v in en_to_pt.items()}
+        Returns:
+            tuple: (instrução de sistema, prompt, temperatura, limite de tokens, tarefa, validação)
+        """
+        language_name = "português brasileiro" if target_language == "pt-br" else "inglês"
+        prompt = f"""
+                Traduza o seguinte texto para {language_name}:
+                
+                Título: {news['title']}
+                Resumo: {news['summary']}
+                
+                Responda apenas com um JSON no formato:
+                {{
+                    "title": "título traduzido",
+                    "summary": "resumo traduzido"
+                }}
+                """
+        return ("Você é um tradutor profissional especializado em finanças e economia.",
+                prompt, 0.3, 300, 'translation', self._has_json_object)
+    
+    def _remembered_translation(self, news, target_language):
+        """
+        Monta a tradução de uma notícia a partir da memória de tradução.
         
-        # Selecionar dicionário com base no idioma de origem e destino
-        translation_dict = {}
-        if news['language'] == "en-us" and target_language == "pt-br":
-            translation_dict = en_to_pt
-        elif news['language'] == "pt-br" and target_language == "en-us":
-            translation_dict = pt_to_en
+        Com a OpenAI disponível, só valem trechos traduzidos pelo modelo (os do
+        dicionário são traduzidos de novo, e a memória é melhorada).
         
-        # Criar cópia da notícia
+        Returns:
+            dict: Notícia traduzida, ou None se algum trecho ainda não foi traduzido
+        """
+        engines = ('openai',) if self.use_openai else ('openai', 'dictionary')
+        segments = []
+        for text in (news['title'], news['summary']):
+            translated = self.translation_memory.get(news['language'], target_language, text, engines) if text else text
+            if translated is None:
+                return None
+            segments.append(translated)
+        return self._translated_copy(news, segments[0], segments[1], target_language)
+    
+    @staticmethod
+    def _translated_copy(news, title, summary, target_language):
+        """Cópia da notícia com título e resumo traduzidos."""
         translated_news = news.copy()
-        
-        # Traduzir título e resumo (substituição simples de palavras)
-        title = news['title']
-        summary = news['summary']
-        
-        for source, target in translation_dict.items():
-            title = title.replace(source, target)
-            summary = summary.replace(source, target)
-        
         translated_news['title'] = title
         translated_news['summary'] = summary
         translated_news['language'] = target_language
         translated_news['original_language'] = news['language']
+        return translated_news
+    
+    def _apply_translation(self, news, result_text, target_language):
+        """
+        Aplica a resposta do modelo a uma cópia da notícia.
+        
+        Returns:
+            dict: Notícia traduzida (a original, se a resposta não tiver JSON)
+        """
+        # Extrair JSON da resposta
+        json_match = re.search(r'{.*}', result_text, re.DOTALL)
+        if not json_match:
+            # Fallback se não conseguir extrair JSON
+            logger.warning("Não foi possível extrair JSON da resposta da API")
+            return news
+        result = json.loads(json_match.group(0))
+        
+        # Criar cópia da notícia com tradução
+        translated_news = self._translated_copy(
+            news, result.get('title', news['title']), result.get('summary', news['summary']), target_language)
+        self.translation_memory.put(news['language'], target_language, [
+            (news['title'], translated_news['title']),
+            (news['summary'], translated_news['summary'])
+        ], 'openai')
+        
+        logger.info(f"Tradução concluída: {translated_news['title']}")
         
         return translated_news
     
-    def generate_stock_report(self, stock_data, fundamentals, evaluation):
+    def _simple_translation(self, news, target_language):
         """
-        Gera um relatório em linguagem natural para uma ação.
+        Tradução simples baseada em dicionário.
         
         Args:
-            stock_data (dict): Dados da ação
-            fundamentals (dict): Indicadores fundamentalistas
-            evaluation (dict): Avaliação da ação
+            news (dict): Notícia a ser traduzida
+            target_language (str): Idioma alvo (pt-br ou en-us)
             
         Returns:
-            str: Relatório em texto
+            dict: Notícia com tradução simples
         """
-        logger.info(f"Gerando relatório para {stock_data.get('symbol', 'ação desconhecida')}")
+        # Dicionário compilado (termo mais longo em cada posição, em uma passada);
+        # os trechos traduzidos ficam na memória de tradução
+        segments = []
+        for text in (news['title'], news['summary']):
+            translated = self.translation_memory.get(news['language'], target_language, text) if text else text
+            if translated is None:
+                translated = translate_text(text, news['language'], target_language)
+                self.translation_memory.put(news['language'], target_language, [(text, translated)], 'dictionary')
+            segments.append(translated)
+        
+        translated_news = self._translated_copy(news, segments[0], segments[1], target_language)
         
-        # Se temos acesso à API OpenAI, usar para geração de relatório
-        if self.use_openai:
-            try:
-                # Preparar prompt para geração de relatório
-                prompt = f"""
+        return translated_news
+    
+    def _stock_report_prompt(self, stock_data, fundamentals, evaluation):
+        """Monta o prompt do relatório em linguagem natural de uma ação."""
+        return f"""
                 Gere um relatório em linguagem natural para a seguinte ação:
                 
                 Símbolo: {stock_data.get('symbol', '')}
@@ -551,21 +964,33 @@ class AIIntegration:
                 Deve explicar de forma clara os pontos fortes e fracos da ação, e justificar a recomendação (Compra, Manter ou Venda).
                 Use linguagem em português brasileiro.
                 """
-                
+    
+    def generate_stock_report(self, stock_data, fundamentals, evaluation):
+        """
+        Gera um relatório em linguagem natural para uma ação.
+        
+        Args:
+            stock_data (dict): Dados da ação
+            fundamentals (dict): Indicadores fundamentalistas
+            evaluation (dict): Avaliação da ação
+            
+        Returns:
+            str: Relatório em texto
+        """
+        logger.info(f"Gerando relatório para {stock_data.get('symbol', 'ação desconhecida')}")
+        
+        # Se temos acesso à API OpenAI, usar para geração de relatório
+        if self.use_openai:
+            try:
                 # Fazer chamada à API
-                response = openai.ChatCompletion.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": "Você é um analista financeiro da Clearview Capital, especializado em análise fundamentalista de ações."},
-                        {"role": "user", "content": prompt}
-                    ],
+                report = self._chat_completion(
+                    REPORT_SYSTEM_PROMPT,
+                    self._stock_report_prompt(stock_data, fundamentals, evaluation),
                     temperature=0.7,
-                    max_tokens=800
+                    max_tokens=800,
+                    task='report'
                 )
                 
-                # Extrair resposta
-                report = response.choices[0].message.content.strip()
-                
                 logger.info(f"Relatório gerado com sucesso: {len(report)} caracteres")
                 
                 return report
@@ -577,6 +1002,98 @@ class AIIntegration:
             # Fallback para geração simples se não temos acesso à API
             return self._generate_simple_report(stock_data, fundamentals, evaluation)
     
+    def generate_stock_reports(self, items):
+        """
+        Gera relatórios de várias ações ao mesmo tempo (até o limite de concorrência do executor).
+        
+        Chamadas que falham ou esgotam o prazo recebem o relatório simples.
+        
+        Args:
+            items (list): Tuplas (stock_data, fundamentals, evaluation)
+            
+        Returns:
+            list: Relatórios em texto, na mesma ordem
+        """
+        if not self.use_openai:
+            return [self._generate_simple_report(*item) for item in items]
+        
+        return self.llm.map([
+            (
+                self._chat_call(
+                    REPORT_SYSTEM_PROMPT,
+                    self._stock_report_prompt(*item),
+                    temperature=0.7,
+                    max_tokens=800,
+                    task='report'
+                ),
+                lambda item=item: self._generate_simple_report(*item)
+            )
+            for item in items
+        ])
+    
+    def stream_stock_report(self, stock_data, fundamentals, evaluation):
+        """
+        Gera o relatório de uma ação com a OpenAI em streaming.
+        
+        Args:
+            stock_data (dict): Dados da ação
+            fundamentals (dict): Indicadores fundamentalistas
+            evaluation (dict): Avaliação da ação
+            
+        Returns:
+            generator: Trechos do relatório, à medida que o modelo os gera
+            
+        Raises:
+            RuntimeError: Se a OpenAI não está configurada
+            DeadlineExceeded: Se o primeiro trecho não chegou no prazo (ao consumir o gerador)
+        """
+        if not self.use_openai:
+            raise RuntimeError("OpenAI não configurada")
+        logger.info(f"Gerando relatório em streaming para {stock_data.get('symbol', 'ação desconhecida')}")
+        messages, _, _ = self._chat_messages(
+            REPORT_SYSTEM_PROMPT, self._stock_report_prompt(stock_data, fundamentals, evaluation), 0.7, 800, None)
+        return self.llm.stream(lambda: self._acreate_stream(messages, 0.7, 800))
+    
+    def astream_stock_report(self, stock_data, fundamentals, evaluation):
+        """Versão assíncrona de stream_stock_report (servidor asyncio): iterável assíncrono dos trechos."""
+        if not self.use_openai:
+            raise RuntimeError("OpenAI não configurada")
+        logger.info(f"Gerando relatório em streaming para {stock_data.get('symbol', 'ação desconhecida')}")
+        messages, _, _ = self._chat_messages(
+            REPORT_SYSTEM_PROMPT, self._stock_report_prompt(stock_data, fundamentals, evaluation), 0.7, 800, None)
+        return self.llm.astream(lambda: self._acreate_stream(messages, 0.7, 800))
+    
+    async def agenerate_stock_report(self, stock_data, fundamentals, evaluation):
+        """
+        Versão assíncrona de generate_stock_report (servidor asyncio).
+        
+        Args:
+            stock_data (dict): Dados da ação
+            fundamentals (dict): Indicadores fundamentalistas
+            evaluation (dict): Avaliação da ação
+            
+        Returns:
+            str: Relatório em texto
+        """
+        logger.info(f"Gerando relatório para {stock_data.get('symbol', 'ação desconhecida')}")
+        
+        if self.use_openai:
+            try:
+                report = await self._achat_completion(
+                    REPORT_SYSTEM_PROMPT,
+                    self._stock_report_prompt(stock_data, fundamentals, evaluation),
+                    temperature=0.7,
+                    max_tokens=800,
+                    task='report'
+                )
+                
+                logger.info(f"Relatório gerado com sucesso: {len(report)} caracteres")
+                
+                return report
+            except Exception as e:
+                logger.error(f"Erro na geração de relatório com OpenAI: {e}")
+        return self._generate_simple_report(stock_data, fundamentals, evaluation)
+    
     def _generate_simple_report(self, stock_data, fundamentals, evaluation):
         """
         Gera um relatório simples para uma ação.
@@ -646,12 +1163,23 @@ class AIIntegration:
         
         return report
     
+    def market_snapshot(self):
+        """
+        Dados do instantâneo de mercado compartilhado com a API.
+        
+        Returns:
+            dict: Índices, moedas e commodities (vazio sem market_overview)
+        """
+        if self.market_overview is None:
+            return {}
+        return self.market_overview.snapshot()['data']
+    
     def generate_market_summary(self, market_data, portfolio, news):
         """
         Gera um resumo do mercado para a newsletter diária.
         
         Args:
-            market_data (dict): Dados do mercado
+            market_data (dict): Dados do mercado (None usa o instantâneo de market_overview)
             portfolio (dict): Dados da carteira
             news (list): Lista de notícias
             
@@ -660,6 +1188,9 @@ class AIIntegration:
         """
         logger.info("Gerando resumo do mercado para newsletter")
         
+        if market_data is None:
+            market_data = self.market_snapshot()
+        
         # Se temos acesso à API OpenAI, usar para geração de resumo
         if self.use_openai:
             try:
@@ -687,19 +1218,14 @@ class AIIntegration:
                 """
                 
                 # Fazer chamada à API
-                response = openai.ChatCompletion.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": "Você é um analista financeiro da Clearview Capital, especializado em análise de mercado e comunicação com investidores."},
-                        {"role": "user", "content": prompt}
-                    ],
+                summary = self._chat_completion(
+                    "Você é um analista financeiro da Clearview Capital, especializado em análise de mercado e comunicação com investidores.",
+                    prompt,
                     temperature=0.7,
-                    max_tokens=1000
+                    max_tokens=1000,
+                    task='market_summary'
                 )
                 
-                # Extrair resposta
-                summary = response.choices[0].message.content.strip()
-                
                 logger.info(f"Resumo de mercado gerado com sucesso: {len(summary)} caracteres")
                 
                 return summary
@@ -950,7 +1476,7 @@ class AIIntegration:
         Gera a newsletter diária.
         
         Args:
-            market_data (dict): Dados do mercado
+            market_data (dict): Dados do mercado (None usa o instantâneo de market_overview)
             portfolio (dict): Dados da carteira
             favorites (list): Lista de ações favoritas
             news (list): Lista de notícias
@@ -963,8 +1489,11 @@ class AIIntegration:
         # Data atual
         today = datetime.now().strftime("%d/%m/%Y")
         
-        # Gerar resumo do mercado
+        # Gerar resumo do mercado (o mesmo instantâneo servido em /api/market)
+        if market_data is None:
+            market_data = self.market_snapshot()
         market_summary = self.generate_market_summary(market_data, portfolio, news)
+        market_summary_html = market_summary.replace('\n', '<br>')
         
         # Construir assunto
         subject = f"Newsletter Clearview Capital - {today}"
@@ -1039,7 +1568,7 @@ class AIIntegration:
             
             <div class="section">
                 <h2>Resumo do Mercado</h2>
-                <p>{market_summary.replace('\n', '<br>')}</p>
+                <p>{market_summary_html}</p>
             </div>
             
             <div class="section">
@@ -1120,8 +1649,8 @@ class AIIntegration:
                 <h2>Notícias do Dia</h2>
         """
         
-        # Adicionar notícias
-        for news_item in news[:5]:
+        # Adicionar notícias (as internacionais traduzidas ao mesmo tempo)
+        for news_item in self.translate_news_many(news[:5], "pt-br"):
             title = news_item.get('title', '')
             summary = news_item.get('summary', '')
             source = news_item.get('source', '')
@@ -1161,9 +1690,9 @@ def main():
     news = ai.fetch_financial_news(limit=5)
     print(f"Notícias obtidas: {len(news)}")
     
-    # Analisar sentimento da primeira notícia
+    # Analisar o sentimento de todas as notícias em lote
     if news:
-        analyzed_news = ai.analyze_news_sentiment(news[0])
+        analyzed_news = ai.analyze_news_sentiment_batch(news)[0]
         print(f"Sentimento: {analyzed_news.get('sentiment')}")
         print(f"Relevância: {analyzed_news.get('relevance')}")
     
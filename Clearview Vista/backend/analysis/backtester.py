@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de backtesting para a Plataforma Inteligente da Clearview Capital.
+Este módulo reproduz o histórico diário de preços e fundamentals armazenado,
+rebalanceia a carteira com a mesma regra de pontuação e seleção usada em
+update_portfolio e calcula retorno, giro e drawdown de forma vetorizada com NumPy.
+
+Uso:
+    python backend/analysis/backtester.py --start 2020-01-01 --frequency monthly
+"""
+
+import os
+import sys
+import json
+import logging
+import argparse
+
+import numpy as np
+
+# Adicionar diretório pai ao path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from analysis.history_store import forward_fill
+
+logger = logging.getLogger("Backtester")
+
+TRADING_DAYS = 252
+
+def rebalance_indices(dates, frequency):
+    """
+    Determina os pregões de rebalanceamento (primeiro pregão de cada período).
+
+    Args:
+        dates (np.ndarray): Datas dos pregões (datetime64[D])
+        frequency (str|int): 'daily', 'weekly', 'monthly', 'quarterly' ou
+            um número de pregões entre rebalanceamentos
+
+    Returns:
+        np.ndarray: Índices das datas de rebalanceamento
+    """
+    if isinstance(frequency, int) or str(frequency).isdigit():
+        return np.arange(0, len(dates), max(int(frequency), 1))
+
+    days = dates.astype('datetime64[D]').astype(np.int64)
+    if frequency == 'daily':
+        period = days
+    elif frequency == 'weekly':
+        # 01/01/1970 foi uma quinta-feira: deslocar para semanas de segunda a domingo
+        period = (days + 3) // 7
+    elif frequency == 'monthly':
+        period = dates.astype('datetime64[M]').astype(np.int64)
+    elif frequency == 'quarterly':
+        period = dates.astype('datetime64[M]').astype(np.int64) // 3
+    else:
+        raise ValueError(f"Frequência de rebalanceamento inválida: {frequency}")
+
+    return np.flatnonzero(np.r_[True, period[1:] != period[:-1]])
+
+class Backtester:
+    """
+    Motor de backtesting da regra de seleção da carteira.
+
+    Em cada data de rebalanceamento as ações com preço e fundamentals disponíveis
+    são pontuadas em lote pelo Screener do StockAnalyzer (Graham + avaliação) e
+    selecionadas pelo mesmo PortfolioSelector de update_portfolio, com pesos
+    iguais. Entre rebalanceamentos os pesos flutuam com os preços.
+    """
+
+    def __init__(self, analyzer, selector=None):
+        """
+        Inicializa o motor de backtesting.
+
+        Args:
+            analyzer (StockAnalyzer): Analisador com o histórico e a regra de avaliação
+            selector (PortfolioSelector): Seletor da carteira (padrão: o do analisador)
+        """
+        self.analyzer = analyzer
+        self.history = analyzer.history
+        self.selector = selector or analyzer.portfolio_selector
+
+    def _select(self, date, symbols, prices):
+        """
+        Aplica a regra de avaliação e seleção em uma data.
+
+        Args:
+            date (str): Data de referência (AAAA-MM-DD)
+            symbols (list): Códigos das ações
+            prices (np.ndarray): Preços das ações na data
+
+        Returns:
+            list: Ações selecionadas (com a coluna correspondente em 'column')
+        """
+        available = []
+        for column, symbol in enumerate(symbols):
+            price = prices[column]
+            if not np.isfinite(price) or price <= 0:
+                continue
+
+            fundamentals = self.history.fundamentals_at(symbol, date)
+            if fundamentals is None:
+                continue
+            available.append((column, symbol, float(price), fundamentals))
+
+        # Mesma avaliação em lote de update_portfolio
+        results = self.analyzer.screener.evaluate(
+            [price for _, _, price, _ in available],
+            [fundamentals for _, _, _, fundamentals in available]
+        )
+
+        candidates = []
+        for (column, symbol, price, _), (_, evaluation) in zip(available, results):
+            candidates.append({
+                'symbol': symbol,
+                'price': price,
+                'region': "US" if symbol in self.analyzer.us_stocks else "BR",
+                'sector': self.analyzer.sector_of(symbol),
+                'evaluation': evaluation,
+                'column': column
+            })
+
+        return self.selector.select(candidates)
+
+    def run(self, start=None, end=None, frequency='monthly', symbols=None, cost_bps=0.0):
+        """
+        Executa o backtest.
+
+        Args:
+            start (str): Data inicial (AAAA-MM-DD)
+            end (str): Data final (AAAA-MM-DD)
+            frequency (str|int): Frequência de rebalanceamento
+            symbols (list): Universo de ações (padrão: todas com histórico)
+            cost_bps (float): Custo de transação em pontos-base sobre o giro
+
+        Returns:
+            dict: Métricas, curva de patrimônio e composição em cada rebalanceamento
+        """
+        if symbols is None:
+            # Índices de referência (ex: ^BVSP) não fazem parte do universo investível
+            symbols = [s for s in self.history.symbols() if not s.startswith('^')]
+        symbols = [s.upper() for s in symbols]
+
+        dates, prices = self.history.price_matrix(symbols, start, end)
+        if len(dates) < 2:
+            raise ValueError("Histórico insuficiente para o período solicitado")
+
+        logger.info(f"Backtest de {dates[0]} a {dates[-1]} com {len(symbols)} ações ({frequency})")
+
+        prices = forward_fill(prices)
+        returns = np.zeros_like(prices)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns[1:] = prices[1:] / prices[:-1] - 1
+        returns[~np.isfinite(returns)] = 0.0
+
+        rebalances = rebalance_indices(dates, frequency)
+        bounds = np.r_[rebalances[1:], len(dates) - 1]
+
+        values = np.ones(len(dates))
+        weights = np.zeros(len(symbols))
+        value = 1.0
+        turnovers = []
+        holdings = []
+
+        for t, t_next in zip(rebalances, bounds):
+            date = str(dates[t])
+            selected = self._select(date, symbols, prices[t])
+
+            target = np.zeros(len(symbols))
+            if selected:
+                target[[stock['column'] for stock in selected]] = 1.0 / len(selected)
+
+            # Giro entre os pesos atuais (já deslocados pelos preços) e os novos
+            turnover = 0.5 * np.abs(target - weights).sum()
+            value *= 1 - turnover * cost_bps / 10000
+            values[t] = value
+            turnovers.append(turnover)
+            holdings.append({'date': date, 'symbols': [stock['symbol'] for stock in selected]})
+
+            weights = target
+            cash = 1.0 - weights.sum()
+            if t_next > t:
+                # Evolução vetorizada até o próximo rebalanceamento
+                growth = np.cumprod(1 + returns[t + 1:t_next + 1], axis=0)
+                path = value * (growth @ weights + cash)
+                values[t + 1:t_next + 1] = path
+                value = path[-1]
+                drifted = weights * growth[-1]
+                weights = drifted / (drifted.sum() + cash)
+
+        return {
+            'start': str(dates[0]),
+            'end': str(dates[-1]),
+            'frequency': frequency,
+            'cost_bps': cost_bps,
+            'universe': len(symbols),
+            'metrics': self.compute_metrics(values, np.array(turnovers)),
+            'equity_curve': [
+                {'date': str(d), 'value': round(float(v), 6)} for d, v in zip(dates, values)
+            ],
+            'holdings': holdings
+        }
+
+    @staticmethod
+    def compute_metrics(values, turnovers):
+        """
+        Calcula as métricas de desempenho da curva de patrimônio.
+
+        Args:
+            values (np.ndarray): Patrimônio diário (começando em 1)
+            turnovers (np.ndarray): Giro em cada rebalanceamento
+
+        Returns:
+            dict: Retorno total e anualizado, volatilidade, Sharpe, drawdown máximo e giro
+        """
+        daily = values[1:] / values[:-1] - 1
+        years = max(len(daily), 1) / TRADING_DAYS
+        volatility = float(daily.std() * np.sqrt(TRADING_DAYS)) if len(daily) else 0.0
+        drawdown = values / np.maximum.accumulate(values) - 1
+
+        return {
+            'total_return': round(float(values[-1] - 1) * 100, 2),
+            'annualized_return': round(float(values[-1] ** (1 / years) - 1) * 100, 2),
+            'volatility': round(volatility * 100, 2),
+            'sharpe': round(float(daily.mean() * TRADING_DAYS / volatility), 2) if volatility > 0 else 0.0,
+            'max_drawdown': round(float(drawdown.min()) * 100, 2),
+            'average_turnover': round(float(turnovers.mean()) * 100, 2) if len(turnovers) else 0.0,
+            'total_turnover': round(float(turnovers.sum()) * 100, 2),
+            'rebalances': int(len(turnovers))
+        }
+
+def main():
+    """Executa um backtest pela linha de comando."""
+    parser = argparse.ArgumentParser(description="Backtest da regra de seleção da carteira Clearview")
+    parser.add_argument('--data-dir', default=os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data"))
+    parser.add_argument('--start', default=None, help="Data inicial (AAAA-MM-DD)")
+    parser.add_argument('--end', default=None, help="Data final (AAAA-MM-DD)")
+    parser.add_argument('--frequency', default='monthly',
+                        help="daily, weekly, monthly, quarterly ou número de pregões")
+    parser.add_argument('--cost-bps', type=float, default=0.0, help="Custo de transação em pontos-base")
+    parser.add_argument('--symbols', nargs='*', default=None, help="Universo de ações (padrão: todo o histórico)")
+    parser.add_argument('--output', default=None, help="Arquivo JSON para salvar o resultado completo")
+    args = parser.parse_args()
+
+    from analysis.stock_analyzer import StockAnalyzer
+
+    analyzer = StockAnalyzer(data_dir=args.data_dir)
+    try:
+        result = Backtester(analyzer).run(
+            start=args.start,
+            end=args.end,
+            frequency=args.frequency,
+            symbols=args.symbols,
+            cost_bps=args.cost_bps
+        )
+    except ValueError as e:
+        print(f"Erro: {e}")
+        sys.exit(1)
+
+    print(f"Backtest {result['start']} - {result['end']} ({result['frequency']}, {result['universe']} ações)")
+    for key, value in result['metrics'].items():
+        print(f"- {key}: {value}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"Resultado salvo em {args.output}")
+
+if __name__ == "__main__":
+    main()
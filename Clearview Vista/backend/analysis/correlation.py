@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de correlação entre ativos para a Plataforma Inteligente da Clearview Capital.
+Este módulo mantém a matriz de correlação dos retornos diários a partir do
+histórico de preços, atualizando somas acumuladas a cada nova barra em vez de
+recalcular sobre todo o histórico.
+"""
+
+import logging
+import threading
+
+import numpy as np
+
+from analysis.history_store import daily_returns, incremental_start
+
+logger = logging.getLogger("CorrelationEngine")
+
+class CorrelationEngine:
+    """
+    Matriz de correlação de retornos diários mantida incrementalmente.
+
+    Para cada par de ações (i, j) são acumulados, apenas nos dias em que as duas
+    têm retorno, o número de observações e as somas Σxi, Σxi², Σxi·xj. Cada
+    nova barra atualiza essas matrizes com produtos externos em O(n²), e a
+    correlação de Pearson é derivada delas sob demanda e mantida em cache.
+    """
+
+    def __init__(self, history, min_periods=20):
+        """
+        Inicializa o motor de correlação.
+
+        Args:
+            history (HistoryStore): Histórico de preços
+            min_periods (int): Mínimo de retornos em comum para reportar a correlação de um par
+        """
+        self.history = history
+        self.min_periods = min_periods
+
+        self.symbols = []
+        self._index = {}
+        self._history_version = None
+        self.last_date = None
+        self._last_prices = None
+
+        self._reset(0)
+
+        # Matriz de correlação em cache e a versão das somas que a originou
+        self.version = 0
+        self._matrix = None
+        self._matrix_version = -1
+
+        self._lock = threading.RLock()
+
+    def _reset(self, n):
+        """Zera as somas acumuladas para n ações."""
+        self._count = np.zeros((n, n))
+        self._sum = np.zeros((n, n))
+        self._sum_sq = np.zeros((n, n))
+        self._sum_prod = np.zeros((n, n))
+
+    def rebuild(self, symbols):
+        """
+        Recalcula as somas acumuladas a partir de todo o histórico (passada vetorizada).
+
+        Args:
+            symbols (list): Ações que compõem a matriz
+        """
+        with self._lock:
+            self.symbols = [s.upper() for s in symbols]
+            self._index = {symbol: i for i, symbol in enumerate(self.symbols)}
+            self._history_version = self.history.version
+
+            dates, prices = self.history.price_matrix(self.symbols)
+            self._reset(len(self.symbols))
+
+            if len(dates):
+                returns, filled = daily_returns(prices)
+                mask = np.isfinite(returns)
+                x = np.where(mask, returns, 0.0)
+                m = mask.astype(float)
+
+                self._count = m.T @ m
+                self._sum = x.T @ m
+                self._sum_sq = (x * x).T @ m
+                self._sum_prod = x.T @ x
+
+                self.last_date = str(dates[-1])
+                self._last_prices = filled[-1]
+            else:
+                self.last_date = None
+                self._last_prices = np.full(len(self.symbols), np.nan)
+
+            self.version += 1
+            logger.info(f"Matriz de correlação reconstruída: {len(self.symbols)} ações, {len(dates)} pregões")
+
+    def update(self, closes):
+        """
+        Incorpora uma nova barra diária em O(n²).
+
+        Args:
+            closes (np.ndarray): Fechamentos do dia na ordem de `symbols` (NaN se ausente)
+        """
+        with self._lock:
+            closes = np.asarray(closes, dtype=float)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                returns = closes / self._last_prices - 1
+            mask = np.isfinite(returns)
+            x = np.where(mask, returns, 0.0)
+            m = mask.astype(float)
+
+            self._count += np.outer(m, m)
+            self._sum += np.outer(x, m)
+            self._sum_sq += np.outer(x * x, m)
+            self._sum_prod += np.outer(x, x)
+
+            self._last_prices = np.where(np.isnan(closes), self._last_prices, closes)
+            self.version += 1
+
+    def sync(self, symbols=None):
+        """
+        Incorpora as barras novas do histórico desde a última sincronização.
+
+        Args:
+            symbols (list): Universo desejado; se diferente do atual, a matriz é reconstruída
+        """
+        with self._lock:
+            if symbols is not None and [s.upper() for s in symbols] != self.symbols:
+                self.rebuild(symbols)
+                return
+            if self._history_version == self.history.version:
+                return
+
+            # Barras novas ou revisadas até a última data incorporada exigem reconstrução
+            start, version = incremental_start(self.history, self._history_version, self.last_date, self.symbols)
+            if start is None:
+                self.rebuild(self.symbols)
+                return
+
+            self._history_version = version
+            dates, prices = self.history.price_matrix(self.symbols, start=start)
+            for row in prices:
+                self.update(row)
+            if len(dates):
+                self.last_date = str(dates[-1])
+                logger.info(f"Matriz de correlação atualizada com {len(dates)} pregões novos")
+
+    def matrix(self):
+        """
+        Retorna a matriz de correlação (NaN para pares com poucas observações em comum).
+
+        Returns:
+            np.ndarray: Matriz n x n de correlações
+        """
+        with self._lock:
+            if self._matrix_version == self.version:
+                return self._matrix
+
+            n = self._count
+            with np.errstate(divide='ignore', invalid='ignore'):
+                covariance = n * self._sum_prod - self._sum * self._sum.T
+                variance = n * self._sum_sq - self._sum ** 2
+                corr = covariance / np.sqrt(variance * variance.T)
+            corr[(n < self.min_periods) | ~np.isfinite(corr)] = np.nan
+            np.fill_diagonal(corr, 1.0)
+            np.clip(corr, -1.0, 1.0, out=corr)
+
+            self._matrix = corr
+            self._matrix_version = self.version
+            return corr
+
+    def top_pairs(self, symbol=None, symbols=None, k=5):
+        """
+        Retorna os pares mais e menos correlacionados.
+
+        Args:
+            symbol (str): Ação de referência (pares dela com todas as demais)
+            symbols (list): Conjunto de ações (pares entre elas, ex: a carteira atual)
+            k (int): Quantidade de pares em cada lista
+
+        Returns:
+            dict: {'most_correlated': [...], 'least_correlated': [...]}
+        """
+        corr = self.matrix()
+
+        if symbol is not None:
+            row = self._index.get(symbol.upper())
+            if row is None:
+                raise KeyError(symbol)
+            cols = np.array([j for j in range(len(self.symbols)) if j != row], dtype=int)
+            values = corr[row, cols]
+            pairs = [(row, j) for j in cols]
+        else:
+            members = [self._index[s.upper()] for s in (symbols or self.symbols) if s.upper() in self._index]
+            rows, cols = np.triu_indices(len(members), k=1)
+            members = np.array(members, dtype=int)
+            values = corr[members[rows], members[cols]] if len(members) else np.array([])
+            pairs = list(zip(members[rows], members[cols])) if len(members) else []
+
+        valid = np.flatnonzero(np.isfinite(values))
+        values = values[valid]
+        k = min(k, len(values))
+
+        def describe(order):
+            return [{
+                'symbols': [self.symbols[pairs[valid[i]][0]], self.symbols[pairs[valid[i]][1]]],
+                'correlation': round(float(values[i]), 4),
+                'observations': int(self._count[pairs[valid[i]]])
+            } for i in order]
+
+        if k == 0:
+            return {'most_correlated': [], 'least_correlated': []}
+
+        # Seleção parcial O(m) seguida da ordenação apenas dos k escolhidos
+        top = np.argpartition(-values, k - 1)[:k]
+        bottom = np.argpartition(values, k - 1)[:k]
+        return {
+            'most_correlated': describe(top[np.argsort(-values[top])]),
+            'least_correlated': describe(bottom[np.argsort(values[bottom])])
+        }
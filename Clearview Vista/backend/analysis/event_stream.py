@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de eventos em tempo real para a Plataforma Inteligente da Clearview Capital.
+Este módulo distribui eventos (ex: variações de cotação e de rating) a clientes
+conectados via Server-Sent Events, serializando cada evento uma única vez e
+entregando-o a filas limitadas por cliente.
+"""
+
+import json
+import queue
+import asyncio
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger("EventStream")
+
+def format_event(data, event=None, event_id=None):
+    """
+    Formata um evento no protocolo Server-Sent Events.
+
+    Args:
+        data (dict|str): Conteúdo do evento (dicts são serializados em JSON)
+        event (str): Tipo do evento
+        event_id: Identificador do evento
+
+    Returns:
+        str: Quadro SSE pronto para envio
+    """
+    if not isinstance(data, str):
+        data = json.dumps(data, ensure_ascii=False)
+    frame = ''
+    if event_id is not None:
+        frame += f"id: {event_id}\n"
+    if event:
+        frame += f"event: {event}\n"
+    for line in data.split('\n'):
+        frame += f"data: {line}\n"
+    return frame + "\n"
+
+def quote_deltas(previous, published):
+    """
+    Compara visões de ações e extrai apenas o que mudou.
+
+    Args:
+        previous (dict): Visões anteriores por ação (ausente se a ação é nova)
+        published (list): Visões recém-publicadas
+
+    Returns:
+        list: Variações de preço, change_1d e transições de rating
+    """
+    deltas = []
+    for view in published:
+        old = previous.get(view['symbol']) or {}
+        rating = view.get('evaluation', {}).get('rating')
+        old_rating = old.get('evaluation', {}).get('rating')
+
+        if (old and view.get('price') == old.get('price')
+                and view.get('change_1d') == old.get('change_1d') and rating == old_rating):
+            continue
+
+        delta = {
+            'symbol': view['symbol'],
+            'price': view.get('price'),
+            'change_1d': view.get('change_1d'),
+            'rating': rating,
+            'version': view.get('version'),
+            'last_update': view.get('last_update')
+        }
+        if old:
+            delta['previous_price'] = old.get('price')
+            if rating != old_rating:
+                delta['previous_rating'] = old_rating
+        deltas.append(delta)
+    return deltas
+
+class Subscription:
+    """Assinatura de um cliente: fila limitada de quadros SSE já formatados."""
+
+    def __init__(self, topics, max_queue):
+        """
+        Inicializa a assinatura.
+
+        Args:
+            topics (frozenset): Tópicos assinados (None para todos)
+            max_queue (int): Tamanho máximo da fila do cliente
+        """
+        self.topics = topics
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.dropped = False
+
+    def offer(self, frame):
+        """
+        Enfileira um quadro sem bloquear (chamado pelo distribuidor).
+
+        Raises:
+            queue.Full: Se a fila do cliente está cheia
+        """
+        self.queue.put_nowait(frame)
+
+    def next(self, timeout=15):
+        """
+        Aguarda o próximo quadro.
+
+        Args:
+            timeout (float): Tempo máximo de espera em segundos
+
+        Returns:
+            str: Quadro SSE, ou None se o tempo esgotou (ou a assinatura foi descartada)
+        """
+        if self.dropped:
+            return None
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+class AsyncSubscription:
+    """
+    Assinatura de um cliente servido por um loop asyncio.
+
+    Os quadros podem ser publicados de qualquer thread; o loop é acordado com
+    call_soon_threadsafe e o cliente os consome com `await anext()`, sem ocupar
+    uma thread por conexão.
+    """
+
+    def __init__(self, topics, max_queue, loop):
+        """
+        Inicializa a assinatura.
+
+        Args:
+            topics (frozenset): Tópicos assinados (None para todos)
+            max_queue (int): Tamanho máximo da fila do cliente
+            loop (asyncio.AbstractEventLoop): Loop que consome os quadros
+        """
+        self.topics = topics
+        self.max_queue = max_queue
+        self.loop = loop
+        self.frames = deque()
+        self.ready = asyncio.Event()
+        self.dropped = False
+
+    def offer(self, frame):
+        """
+        Enfileira um quadro sem bloquear (chamado pelo distribuidor, de qualquer thread).
+
+        Raises:
+            queue.Full: Se a fila do cliente está cheia
+        """
+        if len(self.frames) >= self.max_queue:
+            raise queue.Full
+        self.frames.append(frame)
+        self.loop.call_soon_threadsafe(self.ready.set)
+
+    async def anext(self, timeout=15):
+        """
+        Aguarda o próximo quadro.
+
+        Args:
+            timeout (float): Tempo máximo de espera em segundos
+
+        Returns:
+            str: Quadro SSE, ou None se o tempo esgotou (ou a assinatura foi descartada)
+        """
+        if not self.frames and not self.dropped:
+            self.ready.clear()
+            try:
+                await asyncio.wait_for(self.ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        if self.dropped or not self.frames:
+            return None
+        return self.frames.popleft()
+
+class EventBroker:
+    """
+    Distribuidor de eventos por tópico (ex: código da ação).
+
+    Cada evento é formatado uma única vez e o mesmo quadro é colocado na fila
+    de cada assinante do tópico. Um cliente cuja fila enche (consumidor lento)
+    é descartado em vez de bloquear a distribuição para os demais; ao reconectar
+    ele recebe um novo instantâneo.
+    """
+
+    def __init__(self, max_queue=256):
+        """
+        Inicializa o distribuidor.
+
+        Args:
+            max_queue (int): Tamanho padrão da fila de cada cliente
+        """
+        self.max_queue = max_queue
+        self._by_topic = {}
+        self._wildcard = set()
+        self._lock = threading.Lock()
+
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, topics=None, max_queue=None, loop=None):
+        """
+        Registra um cliente.
+
+        Args:
+            topics (list): Tópicos de interesse (None para todos)
+            max_queue (int): Tamanho da fila do cliente
+            loop (asyncio.AbstractEventLoop): Loop do cliente, para assinaturas assíncronas
+
+        Returns:
+            Subscription|AsyncSubscription: Assinatura do cliente
+        """
+        topics = frozenset(topics) if topics is not None else None
+        if loop is not None:
+            subscription = AsyncSubscription(topics, max_queue or self.max_queue, loop)
+        else:
+            subscription = Subscription(topics, max_queue or self.max_queue)
+        with self._lock:
+            if topics is None:
+                self._wildcard.add(subscription)
+            else:
+                for topic in topics:
+                    self._by_topic.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Remove um cliente de todos os seus tópicos."""
+        with self._lock:
+            if subscription.topics is None:
+                self._wildcard.discard(subscription)
+                return
+            for topic in subscription.topics:
+                subscribers = self._by_topic.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._by_topic[topic]
+
+    @property
+    def subscribers(self):
+        """Número de clientes conectados."""
+        with self._lock:
+            unique = set(self._wildcard)
+            for subscribers in self._by_topic.values():
+                unique.update(subscribers)
+            return len(unique)
+
+    def publish(self, topic, data, event=None, event_id=None):
+        """
+        Entrega um evento a todos os assinantes do tópico.
+
+        Args:
+            topic (str): Tópico do evento
+            data (dict): Conteúdo do evento
+            event (str): Tipo do evento
+            event_id: Identificador do evento
+
+        Returns:
+            int: Número de clientes que receberam o evento
+        """
+        with self._lock:
+            targets = list(self._by_topic.get(topic, ())) + list(self._wildcard)
+        if not targets:
+            return 0
+
+        frame = format_event(data, event=event, event_id=event_id)
+        delivered = 0
+        slow = []
+        for subscription in targets:
+            try:
+                subscription.offer(frame)
+                delivered += 1
+            except queue.Full:
+                slow.append(subscription)
+
+        for subscription in slow:
+            subscription.dropped = True
+            if isinstance(subscription, AsyncSubscription):
+                subscription.loop.call_soon_threadsafe(subscription.ready.set)
+            self.unsubscribe(subscription)
+        if slow:
+            self.dropped += len(slow)
+            logger.warning(f"{len(slow)} cliente(s) lento(s) descartado(s) no tópico {topic}")
+
+        self.published += 1
+        return delivered
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de histórico de dados para a Plataforma Inteligente da Clearview Capital.
+Este módulo armazena as séries diárias de preços de fechamento e os instantâneos
+de indicadores fundamentalistas de cada ação, e as disponibiliza como matrizes
+NumPy alinhadas por data para backtests e métricas de risco.
+"""
+
+import os
+import json
+import bisect
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+logger = logging.getLogger("HistoryStore")
+
+def forward_fill(prices):
+    """
+    Propaga o último preço válido de cada coluna sobre as lacunas (NaN).
+
+    Args:
+        prices (np.ndarray): Matriz datas x ações
+
+    Returns:
+        np.ndarray: Matriz com as lacunas preenchidas (NaN antes do primeiro preço)
+    """
+    valid = ~np.isnan(prices)
+    index = np.where(valid, np.arange(prices.shape[0])[:, None], 0)
+    np.maximum.accumulate(index, axis=0, out=index)
+    filled = prices[index, np.arange(prices.shape[1])]
+    # Antes da primeira observação não há preço a propagar
+    filled[np.cumsum(valid, axis=0) == 0] = np.nan
+    return filled
+
+def daily_returns(prices):
+    """
+    Calcula os retornos diários de uma matriz de preços com lacunas.
+
+    O retorno de um dia com preço é medido contra o último preço válido anterior;
+    dias sem preço (ou sem preço anterior) ficam como NaN.
+
+    Args:
+        prices (np.ndarray): Matriz datas x ações
+
+    Returns:
+        tuple: (retornos com uma linha a menos que `prices`, preços propagados)
+    """
+    filled = forward_fill(prices)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = prices[1:] / filled[:-1] - 1
+    returns[~np.isfinite(returns)] = np.nan
+    return returns, filled
+
+def incremental_start(history, version, last_date, symbols=None):
+    """
+    Decide se um consumidor incremental do histórico pode apenas acrescentar barras.
+
+    Barras registradas ou revisadas até `last_date` (ex: o histórico de um ano
+    gravado na primeira busca de uma ação) não cabem numa atualização que só lê
+    as datas posteriores: nesse caso o consumidor deve se reconstruir.
+
+    Args:
+        history (HistoryStore): Histórico de preços
+        version (int): Versão do histórico na última sincronização do consumidor
+        last_date (str): Última data incorporada pelo consumidor (AAAA-MM-DD)
+        symbols (list): Ações acompanhadas pelo consumidor (padrão: todas)
+
+    Returns:
+        tuple: (data inicial das barras a ler, ou None se for preciso reconstruir,
+                versão do histórico que a decisão considerou)
+    """
+    earliest, current = history.changed_since(version, symbols)
+    if last_date is None or (earliest is not None and earliest <= last_date):
+        return None, current
+    start = (datetime.strptime(last_date, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+    return start, current
+
+class HistoryStore:
+    """
+    Armazena o histórico diário de preços e fundamentals por ação.
+
+    Cada ação ocupa um arquivo JSON em `<data_dir>/history/<SÍMBOLO>.json` com as
+    datas (AAAA-MM-DD) e os fechamentos correspondentes, além da lista de
+    instantâneos de fundamentals. As séries lidas ficam em memória.
+    """
+
+    def __init__(self, data_dir="/home/ubuntu/clearview_project/data"):
+        """
+        Inicializa o armazenamento de histórico.
+
+        Args:
+            data_dir (str): Diretório para armazenamento de dados
+        """
+        self.history_dir = os.path.join(data_dir, "history")
+        os.makedirs(self.history_dir, exist_ok=True)
+
+        # Cache em memória: símbolo -> {'prices': {data: fechamento}, 'fundamentals': {data: dict}}
+        self._series = {}
+        self._lock = threading.RLock()
+        
+        # Incrementado a cada alteração de preços, para que consumidores detectem barras novas
+        self.version = 0
+        
+        # Versões recentes, com a ação e a data mais antiga alteradas em cada uma (ver changed_since)
+        self._changes = deque(maxlen=1024)
+
+    def _file_for(self, symbol):
+        """Retorna o caminho do arquivo de histórico de uma ação."""
+        return os.path.join(self.history_dir, f"{symbol.upper()}.json")
+
+    def _load(self, symbol):
+        """Carrega (e mantém em memória) o histórico de uma ação."""
+        symbol = symbol.upper()
+        series = self._series.get(symbol)
+        if series is not None:
+            return series
+
+        series = {'prices': {}, 'fundamentals': {}}
+        try:
+            history_file = self._file_for(symbol)
+            if os.path.exists(history_file):
+                with open(history_file, 'r', encoding='utf-8') as f:
+                    stored = json.load(f)
+                series['prices'] = dict(zip(stored.get('dates', []), stored.get('close', [])))
+                series['fundamentals'] = {
+                    snapshot['date']: snapshot['values'] for snapshot in stored.get('fundamentals', [])
+                }
+        except Exception as e:
+            logger.error(f"Erro ao carregar histórico de {symbol}: {e}")
+
+        self._series[symbol] = series
+        return series
+
+    def _save(self, symbol):
+        """Salva o histórico de uma ação em arquivo JSON (arquivo temporário + os.replace)."""
+        symbol = symbol.upper()
+        series = self._series[symbol]
+        dates = sorted(series['prices'])
+        try:
+            history_file = self._file_for(symbol)
+            temp_file = history_file + '.tmp'
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'symbol': symbol,
+                    'dates': dates,
+                    'close': [series['prices'][d] for d in dates],
+                    'fundamentals': [
+                        {'date': d, 'values': series['fundamentals'][d]}
+                        for d in sorted(series['fundamentals'])
+                    ]
+                }, f, ensure_ascii=False)
+            os.replace(temp_file, history_file)
+        except Exception as e:
+            logger.error(f"Erro ao salvar histórico de {symbol}: {e}")
+
+    def record_prices(self, symbol, timestamps, closes):
+        """
+        Registra fechamentos diários de uma ação.
+
+        Args:
+            symbol (str): Código da ação
+            timestamps (list): Timestamps Unix (ou datas AAAA-MM-DD) de cada barra
+            closes (list): Preços de fechamento (None para barras sem negociação)
+
+        Returns:
+            int: Número de barras novas registradas
+        """
+        with self._lock:
+            prices = self._load(symbol)['prices']
+            added = 0
+            earliest = None
+            for ts, close in zip(timestamps, closes):
+                if close is None:
+                    continue
+                day = ts if isinstance(ts, str) else datetime.fromtimestamp(ts, timezone.utc).strftime('%Y-%m-%d')
+                if day not in prices:
+                    added += 1
+                if prices.get(day) != float(close):
+                    prices[day] = float(close)
+                    earliest = day if earliest is None else min(earliest, day)
+            if earliest is not None:
+                self.version += 1
+                self._changes.append((self.version, symbol.upper(), earliest))
+                self._save(symbol)
+            return added
+
+    def changed_since(self, version, symbols=None):
+        """
+        Retorna a data mais antiga com preço alterado depois de uma versão.
+
+        Args:
+            version (int): Versão do histórico já conhecida pelo consumidor
+            symbols (list): Considerar só estas ações (padrão: todas)
+
+        Returns:
+            tuple: (data AAAA-MM-DD, ou None se nada mudou; versão atual). Se a
+                versão é anterior às alterações ainda registradas, a data é
+                '0000-00-00' (tudo pode ter mudado)
+        """
+        with self._lock:
+            if version is None or (self._changes and version < self._changes[0][0] - 1):
+                return '0000-00-00', self.version
+            wanted = None if symbols is None else {s.upper() for s in symbols}
+            days = [day for changed, symbol, day in self._changes
+                    if changed > version and (wanted is None or symbol in wanted)]
+            return (min(days) if days else None), self.version
+
+    def record_fundamentals(self, symbol, fundamentals, date=None):
+        """
+        Registra um instantâneo de indicadores fundamentalistas (um por dia).
+
+        Args:
+            symbol (str): Código da ação
+            fundamentals (dict): Indicadores fundamentalistas
+            date (str): Data do instantâneo (AAAA-MM-DD); hoje por padrão
+        """
+        with self._lock:
+            day = date or datetime.now().strftime('%Y-%m-%d')
+            series = self._load(symbol)
+            # O mesmo instantâneo registrado de novo no dia não reescreve o arquivo
+            if series['fundamentals'].get(day) == fundamentals:
+                return
+            series['fundamentals'][day] = dict(fundamentals)
+            series.pop('fundamental_dates', None)
+            self._save(symbol)
+
+    def symbols(self):
+        """Retorna os símbolos com histórico armazenado."""
+        stored = {name[:-5] for name in os.listdir(self.history_dir) if name.endswith('.json')}
+        return sorted(stored | set(self._series))
+
+    def last_date(self, symbol):
+        """Retorna a última data com preço registrado de uma ação, ou None."""
+        with self._lock:
+            prices = self._load(symbol)['prices']
+            return max(prices) if prices else None
+
+    def price_matrix(self, symbols, start=None, end=None):
+        """
+        Monta a matriz de fechamentos alinhada por data.
+
+        Args:
+            symbols (list): Códigos das ações (colunas)
+            start (str): Data inicial (AAAA-MM-DD), inclusiva
+            end (str): Data final (AAAA-MM-DD), inclusiva
+
+        Returns:
+            tuple: (datas como np.datetime64[D], matriz datas x ações com NaN nas lacunas)
+        """
+        with self._lock:
+            series = [self._load(symbol)['prices'] for symbol in symbols]
+
+        all_dates = set()
+        for prices in series:
+            all_dates.update(prices)
+        dates = sorted(d for d in all_dates if (start is None or d >= start) and (end is None or d <= end))
+
+        matrix = np.full((len(dates), len(symbols)), np.nan)
+        position = {d: i for i, d in enumerate(dates)}
+        for col, prices in enumerate(series):
+            rows = [(position[d], close) for d, close in prices.items() if d in position]
+            if rows:
+                idx, values = zip(*rows)
+                matrix[list(idx), col] = values
+
+        return np.array(dates, dtype='datetime64[D]'), matrix
+
+    def fundamentals_at(self, symbol, date):
+        """
+        Retorna o último instantâneo de fundamentals disponível até uma data.
+
+        Args:
+            symbol (str): Código da ação
+            date (str): Data de referência (AAAA-MM-DD)
+
+        Returns:
+            dict: Indicadores fundamentalistas, ou None se não houver instantâneo
+        """
+        with self._lock:
+            series = self._load(symbol)
+            dates = series.get('fundamental_dates')
+            if dates is None:
+                dates = series['fundamental_dates'] = sorted(series['fundamentals'])
+            position = bisect.bisect_right(dates, date)
+            return series['fundamentals'][dates[position - 1]] if position else None
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de instrumentação para a Plataforma Inteligente da Clearview Capital.
+Este módulo registra, com custo mínimo por requisição, histogramas de latência e
+de tamanho de resposta por rota, requisições em andamento, as chamadas a
+serviços externos (API Client, endpoint de gráficos, OpenAI) e as consultas aos
+caches, e os exporta no formato texto do Prometheus.
+"""
+
+import time
+import bisect
+import threading
+import contextvars
+
+# Limites dos histogramas (segundos e bytes)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+def _escape(value):
+    """Escapa o valor de um rótulo Prometheus."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(names, values, extra=None):
+    """Formata os rótulos de uma série (ex: {route="/api/stocks",method="GET"})."""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _number(value):
+    """Formata um número no padrão Prometheus."""
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Histogram:
+    """Histograma de faixas fixas (contagens por faixa, soma e total)."""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        """Registra uma observação (chamado com a trava do registro)."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class Family:
+    """Conjunto de séries de uma métrica, uma por combinação de rótulos."""
+
+    def __init__(self, name, kind, help_text, label_names, buckets=None):
+        self.name = name
+        self.kind = kind
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self.series = {}
+
+    def render(self, lines):
+        """Acrescenta as linhas da métrica no formato texto do Prometheus."""
+        lines.append(f"# HELP {self.name} {self.help_text}")
+        lines.append(f"# TYPE {self.name} {self.kind}")
+        for values, series in sorted(self.series.items()):
+            if self.kind != 'histogram':
+                lines.append(f"{self.name}{_labels(self.label_names, values)} {_number(series)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series.counts):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, values)} {_number(series.sum)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, values)} {series.count}")
+
+class RequestStats:
+    """Chamadas externas feitas durante uma requisição."""
+
+    __slots__ = ('upstream_calls', 'upstream_seconds')
+
+    def __init__(self):
+        self.upstream_calls = 0
+        self.upstream_seconds = 0.0
+
+# Requisição em andamento no contexto atual (thread do Flask ou tarefa asyncio)
+_current_request = contextvars.ContextVar('clearview_request_stats', default=None)
+
+class UpstreamCall:
+    """Gerenciador de contexto que mede uma chamada a um serviço externo."""
+
+    __slots__ = ('registry', 'service', 'operation', 'start')
+
+    def __init__(self, registry, service, operation):
+        self.registry = registry
+        self.service = service
+        self.operation = operation
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.record_upstream(self.service, self.operation, time.perf_counter() - self.start, exc_type is None)
+        return False
+
+class MetricsRegistry:
+    """
+    Registro das métricas do servidor.
+
+    Todas as séries são atualizadas sob uma única trava, mantida apenas pelo
+    tempo de alguns incrementos; a formatação no padrão Prometheus só acontece
+    quando /api/metrics é consultado.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._collectors = []
+        self.started_at = time.time()
+
+        self.requests = Family('clearview_http_requests_total', 'counter',
+                               'Requisições atendidas por rota, método e status.', ('route', 'method', 'status'))
+        self.latency = Family('clearview_http_request_duration_seconds', 'histogram',
+                              'Latência das requisições por rota.', ('route', 'method'), LATENCY_BUCKETS)
+        self.sizes = Family('clearview_http_response_size_bytes', 'histogram',
+                            'Tamanho do corpo das respostas por rota.', ('route', 'method'), SIZE_BUCKETS)
+        self.in_flight = Family('clearview_http_requests_in_flight', 'gauge',
+                                'Requisições em andamento por rota.', ('route',))
+        self.request_upstream_calls = Family('clearview_http_request_upstream_calls', 'histogram',
+                                             'Chamadas a serviços externos por requisição, por rota.', ('route',), COUNT_BUCKETS)
+        self.request_upstream_seconds = Family('clearview_http_request_upstream_seconds', 'histogram',
+                                               'Tempo em serviços externos por requisição, por rota.', ('route',), LATENCY_BUCKETS)
+        self.upstream = Family('clearview_upstream_calls_total', 'counter',
+                               'Chamadas a serviços externos por serviço, operação e resultado.', ('service', 'operation', 'outcome'))
+        self.upstream_latency = Family('clearview_upstream_call_duration_seconds', 'histogram',
+                                       'Latência das chamadas a serviços externos.', ('service', 'operation'), LATENCY_BUCKETS)
+        self.cache_lookups = Family('clearview_cache_lookups_total', 'counter',
+                                    'Consultas a caches por cache e resultado (hit/miss).', ('cache', 'outcome'))
+        self._families = (
+            self.requests, self.latency, self.sizes, self.in_flight,
+            self.request_upstream_calls, self.request_upstream_seconds,
+            self.upstream, self.upstream_latency, self.cache_lookups
+        )
+
+    def _histogram(self, family, key):
+        series = family.series.get(key)
+        if series is None:
+            series = family.series[key] = Histogram(family.buckets)
+        return series
+
+    def start_request(self, route):
+        """
+        Marca o início de uma requisição.
+
+        Args:
+            route (str): Padrão da rota (ex: '/api/stock/<symbol>')
+
+        Returns:
+            tuple: Estado a devolver em finish_request
+        """
+        with self._lock:
+            self.in_flight.series[(route,)] = self.in_flight.series.get((route,), 0) + 1
+        stats = RequestStats()
+        return time.perf_counter(), stats, _current_request.set(stats)
+
+    def finish_request(self, state, route, method, status, size=None):
+        """
+        Registra o fim de uma requisição.
+
+        Args:
+            state (tuple): Valor devolvido por start_request
+            route (str): Padrão da rota
+            method (str): Método HTTP
+            status (int): Status da resposta
+            size (int): Tamanho do corpo em bytes (None se desconhecido, ex: streaming)
+        """
+        start, stats, token = state
+        elapsed = time.perf_counter() - start
+        try:
+            _current_request.reset(token)
+        except ValueError:
+            # Token criado em outro contexto (ex: hooks do Flask em contextos distintos)
+            _current_request.set(None)
+
+        with self._lock:
+            self.in_flight.series[(route,)] -= 1
+            key = (route, method, str(status))
+            self.requests.series[key] = self.requests.series.get(key, 0) + 1
+            self._histogram(self.latency, (route, method)).observe(elapsed)
+            if size is not None:
+                self._histogram(self.sizes, (route, method)).observe(size)
+            self._histogram(self.request_upstream_calls, (route,)).observe(stats.upstream_calls)
+            if stats.upstream_calls:
+                self._histogram(self.request_upstream_seconds, (route,)).observe(stats.upstream_seconds)
+
+    def upstream_call(self, service, operation):
+        """
+        Mede uma chamada a um serviço externo.
+
+        Args:
+            service (str): Serviço (ex: 'api_client', 'chart_http', 'openai')
+            operation (str): Operação (ex: 'YahooFinance/get_stock_chart')
+
+        Returns:
+            UpstreamCall: Gerenciador de contexto (também usável em corrotinas)
+        """
+        return UpstreamCall(self, service, operation)
+
+    def record_upstream(self, service, operation, seconds, ok=True):
+        """Registra uma chamada externa já medida e a atribui à requisição atual."""
+        stats = _current_request.get()
+        with self._lock:
+            key = (service, operation, 'success' if ok else 'error')
+            self.upstream.series[key] = self.upstream.series.get(key, 0) + 1
+            self._histogram(self.upstream_latency, (service, operation)).observe(seconds)
+            if stats is not None:
+                stats.upstream_calls += 1
+                stats.upstream_seconds += seconds
+
+    def record_cache(self, cache, outcome):
+        """
+        Registra uma consulta a um cache.
+
+        Args:
+            cache (str): Nome do cache (ex: 'llm_sentiment')
+            outcome (str): 'hit' ou 'miss'
+        """
+        with self._lock:
+            key = (cache, outcome)
+            self.cache_lookups.series[key] = self.cache_lookups.series.get(key, 0) + 1
+
+    def bind_request(self, fn):
+        """
+        Associa uma função à requisição atual, para chamadas feitas em outras threads.
+
+        Args:
+            fn (callable): Função executada em um pool de threads
+
+        Returns:
+            callable: Função que, em qualquer thread, atribui suas chamadas externas à requisição atual
+        """
+        stats = _current_request.get()
+        if stats is None:
+            return fn
+
+        def bound(*args, **kwargs):
+            token = _current_request.set(stats)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _current_request.reset(token)
+        return bound
+
+    def add_collector(self, collector):
+        """
+        Registra uma função consultada a cada exportação.
+
+        Args:
+            collector (callable): Retorna uma lista de (nome, tipo, descrição, valor)
+        """
+        self._collectors.append(collector)
+
+    def render(self):
+        """
+        Exporta todas as métricas.
+
+        Returns:
+            str: Métricas no formato texto do Prometheus (versão 0.0.4)
+        """
+        lines = []
+        with self._lock:
+            for family in self._families:
+                family.render(lines)
+
+        lines.append("# HELP clearview_process_uptime_seconds Tempo desde o início do processo.")
+        lines.append("# TYPE clearview_process_uptime_seconds gauge")
+        lines.append(f"clearview_process_uptime_seconds {_number(time.time() - self.started_at)}")
+        for collector in self._collectors:
+            for name, kind, help_text, value in collector():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name} {_number(value)}")
+        return '\n'.join(lines) + '\n'
+
+# Registro único do processo, compartilhado pela API e pelos módulos de análise
+metrics = MetricsRegistry()
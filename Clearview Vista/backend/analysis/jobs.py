@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de tarefas em segundo plano para a Plataforma Inteligente da Clearview Capital.
+Este módulo executa tarefas demoradas (como a reconstrução da carteira) em uma
+thread dedicada, fora das requisições HTTP, com acompanhamento de progresso e
+sem duplicar uma tarefa do mesmo tipo que já esteja na fila ou em execução.
+"""
+
+import uuid
+import queue
+import logging
+import threading
+from datetime import datetime
+from collections import OrderedDict
+
+logger = logging.getLogger("JobManager")
+
+class Job:
+    """Tarefa submetida ao gerenciador, com estado e progresso."""
+
+    def __init__(self, kind, run, describe=None):
+        """
+        Inicializa a tarefa.
+
+        Args:
+            kind (str): Tipo da tarefa (ex: 'portfolio-update'), usado na deduplicação
+            run (callable): Função executada; recebe progress(done, total)
+            describe (callable): Resume o resultado para a consulta da tarefa
+        """
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = 'queued'
+        self.done = 0
+        self.total = None
+        self.created_at = datetime.now().isoformat()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+
+        self._run = run
+        self._describe = describe
+        self._finished = threading.Event()
+
+    def progress(self, done, total):
+        """Atualiza o progresso (chamado pela função da tarefa)."""
+        self.done = done
+        self.total = total
+
+    def wait(self, timeout=None):
+        """
+        Aguarda o fim da tarefa.
+
+        Args:
+            timeout (float): Tempo máximo de espera em segundos (None espera indefinidamente)
+
+        Returns:
+            object: Resultado da função da tarefa
+
+        Raises:
+            TimeoutError: Se a tarefa não terminou no tempo dado
+            RuntimeError: Se a tarefa falhou
+        """
+        if not self._finished.wait(timeout):
+            raise TimeoutError(f"Tarefa {self.id} ainda em execução")
+        if self.status == 'failed':
+            raise RuntimeError(self.error)
+        return self.result
+
+    def execute(self):
+        """Executa a tarefa na thread do gerenciador."""
+        self.status = 'running'
+        self.started_at = datetime.now().isoformat()
+        try:
+            self.result = self._run(self.progress)
+            self.status = 'succeeded'
+        except Exception as e:
+            logger.error(f"Erro na tarefa {self.kind} ({self.id}): {e}")
+            self.error = str(e)
+            self.status = 'failed'
+        finally:
+            self.finished_at = datetime.now().isoformat()
+
+    def to_dict(self):
+        """
+        Estado da tarefa para a API.
+
+        Returns:
+            dict: Identificação, estado, progresso e resultado resumido
+        """
+        data = {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': {
+                'done': self.done,
+                'total': self.total,
+                'percent': round(self.done / self.total * 100, 1) if self.total else None
+            },
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+        if self.status == 'succeeded' and self._describe is not None:
+            data['result'] = self._describe(self.result)
+        if self.error is not None:
+            data['error'] = self.error
+        return data
+
+class JobManager:
+    """
+    Fila de tarefas executadas, uma por vez, por uma thread em segundo plano.
+
+    Enquanto uma tarefa de um tipo está na fila ou em execução, novas submissões
+    do mesmo tipo recebem essa mesma tarefa. As tarefas concluídas ficam
+    consultáveis até serem descartadas pelas mais recentes.
+    """
+
+    def __init__(self, max_finished=100):
+        """
+        Inicializa o gerenciador.
+
+        Args:
+            max_finished (int): Tarefas concluídas mantidas para consulta
+        """
+        self.max_finished = max_finished
+        self._jobs = OrderedDict()
+        self._active = {}
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def submit(self, kind, run, describe=None):
+        """
+        Submete uma tarefa, ou retorna a do mesmo tipo ainda pendente.
+
+        Args:
+            kind (str): Tipo da tarefa
+            run (callable): Função executada; recebe progress(done, total)
+            describe (callable): Resume o resultado para a consulta da tarefa
+
+        Returns:
+            tuple: (tarefa, True se era uma tarefa já existente)
+        """
+        with self._lock:
+            active = self._active.get(kind)
+            if active is not None:
+                return active, True
+
+            job = Job(kind, run, describe)
+            self._jobs[job.id] = job
+            self._active[kind] = job
+            self._trim()
+
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._work, name='jobs', daemon=True)
+                self._worker.start()
+        self._queue.put(job)
+        logger.info(f"Tarefa {kind} ({job.id}) submetida")
+        return job, False
+
+    def get(self, job_id):
+        """
+        Retorna uma tarefa pelo identificador.
+
+        Args:
+            job_id (str): Identificador da tarefa
+
+        Returns:
+            Job: Tarefa, ou None se desconhecida (ou já descartada)
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    @property
+    def running(self):
+        """Número de tarefas na fila ou em execução."""
+        return len(self._active)
+
+    def _trim(self):
+        """Descarta as tarefas concluídas mais antigas (chamado com a trava)."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished_at is not None]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def _work(self):
+        """Laço da thread de tarefas."""
+        while True:
+            job = self._queue.get()
+            job.execute()
+            with self._lock:
+                if self._active.get(job.kind) is job:
+                    del self._active[job.kind]
+            # Só depois de sair das pendentes, para que novas submissões criem outra tarefa
+            job._finished.set()
+            logger.info(f"Tarefa {job.kind} ({job.id}) concluída: {job.status}")
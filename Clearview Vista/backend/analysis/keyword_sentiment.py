@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de análise de sentimento por palavras-chave para a Plataforma Inteligente da Clearview Capital.
+Este módulo é a alternativa local à análise de sentimento com IA: um léxico
+ponderado de termos positivos e negativos (português e inglês) é compilado em
+uma única expressão regular com limites de palavra, em forma de árvore de
+prefixos, de modo que cada texto é percorrido uma vez só, qualquer que seja o
+tamanho do léxico, e "alta" não casa com "altamente".
+"""
+
+import re
+
+# Léxico positivo: termo -> peso
+POSITIVE_TERMS = {
+    'aumento': 1.0, 'crescimento': 1.0, 'lucro': 1.0, 'recorde': 1.5, 'supera': 1.0, 'alta': 1.0,
+    'positivo': 1.0, 'expansão': 1.0, 'valorização': 1.0, 'sucesso': 1.0, 'melhora': 1.0,
+    'increase': 1.0, 'growth': 1.0, 'profit': 1.0, 'record': 1.5, 'exceeds': 1.0, 'rise': 1.0,
+    'positive': 1.0, 'expansion': 1.0, 'appreciation': 1.0, 'success': 1.0, 'improvement': 1.0
+}
+
+# Léxico negativo: termo -> peso
+NEGATIVE_TERMS = {
+    'queda': 1.0, 'redução': 1.0, 'prejuízo': 1.5, 'abaixo': 1.0, 'crise': 1.5, 'baixa': 1.0,
+    'negativo': 1.0, 'contração': 1.0, 'desvalorização': 1.0, 'fracasso': 1.5, 'piora': 1.0,
+    'decline': 1.0, 'reduction': 1.0, 'loss': 1.5, 'below': 1.0, 'crisis': 1.5, 'fall': 1.0,
+    'negative': 1.0, 'contraction': 1.0, 'depreciation': 1.0, 'failure': 1.5, 'worsening': 1.0
+}
+
+def trie_pattern(terms):
+    """
+    Monta uma alternância de termos fatorada por prefixos comuns.
+
+    Em vez de tentar cada termo em cada posição do texto, a expressão avança
+    caractere a caractere pelos ramos da árvore (ex: "crise|crisis" vira
+    "cris(?:e|is)").
+
+    Args:
+        terms (iterable): Termos (já em minúsculas)
+        
+    Returns:
+        str: Expressão regular que casa exatamente os termos
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        ends_here = '' in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1 and not ends_here:
+            return branches[0]
+        group = '(?:' + '|'.join(branches) + ')'
+        return group + '?' if ends_here else group
+
+    return build(trie)
+
+class KeywordSentiment:
+    """
+    Pontuação de sentimento por léxico ponderado, compilada em uma expressão regular.
+
+    Cada termo conta uma vez por texto (com seu peso), aceitando o plural
+    simples ("lucros", "quedas"). O sentimento é o lado de maior pontuação e a
+    relevância cresce com a pontuação total, de 1 a 10.
+    """
+
+    def __init__(self, positive=None, negative=None):
+        """
+        Inicializa e compila o léxico.
+
+        Args:
+            positive (dict): Termos positivos -> peso (padrão: POSITIVE_TERMS)
+            negative (dict): Termos negativos -> peso (padrão: NEGATIVE_TERMS)
+        """
+        positive = POSITIVE_TERMS if positive is None else positive
+        negative = NEGATIVE_TERMS if negative is None else negative
+
+        # Peso com sinal: positivo soma, negativo subtrai
+        self.weights = {term.lower(): weight for term, weight in positive.items()}
+        self.weights.update({term.lower(): -weight for term, weight in negative.items()})
+
+        self.pattern = re.compile(rf"\b({trie_pattern(self.weights)})(?:e?s)?\b")
+
+    def score(self, text):
+        """
+        Pontua um texto.
+
+        Args:
+            text (str): Texto (título e resumo)
+
+        Returns:
+            tuple: (pontuação positiva, pontuação negativa)
+        """
+        return self._totals(set(self.pattern.findall(text.lower())))
+
+    def score_batch(self, texts):
+        """
+        Pontua vários textos.
+
+        Args:
+            texts (list): Textos a pontuar
+
+        Returns:
+            list: (pontuação positiva, pontuação negativa) de cada texto, na mesma ordem
+        """
+        findall = self.pattern.findall
+        return [self._totals(set(findall(text.lower()))) for text in texts]
+
+    def _totals(self, terms):
+        """Soma os pesos dos termos encontrados em cada lado."""
+        positive = sum(self.weights[term] for term in terms if self.weights[term] > 0)
+        negative = -sum(self.weights[term] for term in terms if self.weights[term] < 0)
+        return positive, negative
+
+    @staticmethod
+    def classify(positive, negative):
+        """
+        Converte as pontuações em sentimento e relevância.
+
+        Args:
+            positive (float): Pontuação positiva
+            negative (float): Pontuação negativa
+
+        Returns:
+            tuple: (sentimento: 'positivo', 'neutro' ou 'negativo', relevância de 1 a 10)
+        """
+        if positive > negative:
+            sentiment = 'positivo'
+        elif negative > positive:
+            sentiment = 'negativo'
+        else:
+            sentiment = 'neutro'
+        # Notícias com mais palavras-chave (positivas ou negativas) são consideradas mais relevantes
+        return sentiment, min(10, max(1, round(positive + negative)))
+
+    def analyze(self, news_list):
+        """
+        Preenche sentimento e relevância de um lote de notícias.
+
+        Args:
+            news_list (list): Notícias com 'title' e 'summary' (atualizadas no lugar)
+
+        Returns:
+            list: As mesmas notícias
+        """
+        texts = [f"{news.get('title') or ''} {news.get('summary') or ''}" for news in news_list]
+        for news, (positive, negative) in zip(news_list, self.score_batch(texts)):
+            news['sentiment'], news['relevance'] = self.classify(positive, negative)
+        return news_list
+
+# Léxico padrão, compilado uma vez por processo
+keyword_sentiment = KeywordSentiment()
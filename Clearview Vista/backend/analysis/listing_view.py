@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de listagens paginadas para a Plataforma Inteligente da Clearview Capital.
+Este módulo serve listas de ações (carteira, favoritas) com projeção de campos,
+ordenação e paginação por cursor, a partir de ordenações e projeções calculadas
+uma única vez por versão dos dados.
+"""
+
+import json
+import base64
+import threading
+from collections import OrderedDict
+
+# Limite de itens por página
+MAX_PAGE_SIZE = 100
+
+def parse_fields(fields):
+    """
+    Converte o parâmetro `fields` em caminhos de campos.
+
+    Args:
+        fields (str): Campos separados por vírgula; subcampos com ponto (ex: 'symbol,evaluation.rating')
+
+    Returns:
+        tuple: Caminhos como tuplas de chaves, ou None para todos os campos
+    """
+    if not fields:
+        return None
+    paths = tuple(dict.fromkeys(tuple(f.strip().split('.')) for f in fields.split(',') if f.strip()))
+    return paths or None
+
+def project(item, paths):
+    """
+    Extrai de um item apenas os caminhos pedidos, preservando o aninhamento.
+
+    Args:
+        item (dict): Item completo
+        paths (tuple): Caminhos de parse_fields
+
+    Returns:
+        dict: Item projetado (caminhos ausentes são omitidos)
+    """
+    result = {}
+    for path in paths:
+        value = item
+        for key in path:
+            if not isinstance(value, dict) or key not in value:
+                break
+            value = value[key]
+        else:
+            target = result
+            for key in path[:-1]:
+                target = target.setdefault(key, {})
+            target[path[-1]] = value
+    return result
+
+def encode_cursor(offset, version):
+    """Gera um cursor opaco para a próxima página."""
+    raw = json.dumps({'o': offset, 'v': version}, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, version):
+    """
+    Lê um cursor gerado por encode_cursor.
+
+    Args:
+        cursor (str): Cursor recebido
+        version (str): Versão atual dos dados
+
+    Returns:
+        int: Posição inicial da página
+
+    Raises:
+        ValueError: Se o cursor for inválido ou de outra versão dos dados
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        offset = int(data['o'])
+    except Exception:
+        raise ValueError("Cursor inválido")
+    if data.get('v') != version or offset < 0:
+        raise ValueError("Cursor expirado: os dados foram atualizados, reinicie a paginação")
+    return offset
+
+class ListingView:
+    """
+    Lista de itens de uma versão dos dados, pronta para paginação.
+
+    As ordenações (por campo e direção) e as projeções (por conjunto de campos)
+    são calculadas na primeira vez que são pedidas e reaproveitadas por todas
+    as páginas e requisições seguintes da mesma versão.
+    """
+
+    def __init__(self, items, version, max_projections=16):
+        """
+        Inicializa a listagem.
+
+        Args:
+            items (list): Itens na ordem padrão
+            version (str): Versão dos dados
+            max_projections (int): Número máximo de projeções mantidas em memória
+        """
+        self.items = list(items)
+        self.version = version
+        self.max_projections = max_projections
+
+        self._keys = set()
+        for item in self.items:
+            self._keys.update(item)
+
+        self._orders = {}
+        self._projections = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _validate(self, paths):
+        """Rejeita campos de primeiro nível inexistentes."""
+        unknown = [path[0] for path in paths if self.items and path[0] not in self._keys]
+        if unknown:
+            raise ValueError(f"Campos desconhecidos: {', '.join(unknown)}. Disponíveis: {', '.join(sorted(self._keys))}")
+
+    def _order(self, sort):
+        """Ordem dos itens para um parâmetro de ordenação (ex: '-evaluation.score')."""
+        if not sort:
+            return range(len(self.items))
+
+        with self._lock:
+            order = self._orders.get(sort)
+        if order is not None:
+            return order
+
+        descending = sort.startswith('-')
+        path = tuple(sort.lstrip('+-').split('.'))
+        self._validate([path])
+
+        keyed, missing = [], []
+        for index, item in enumerate(self.items):
+            value = item
+            for key in path:
+                value = value.get(key) if isinstance(value, dict) else None
+            (missing if value is None or isinstance(value, (dict, list)) else keyed).append((value, index))
+
+        try:
+            keyed.sort(key=lambda pair: pair[0], reverse=descending)
+        except TypeError:
+            raise ValueError(f"Campo de ordenação com valores não comparáveis: {sort}")
+        # Itens sem o campo vão para o fim, na ordem padrão
+        order = [index for _, index in keyed] + [index for _, index in missing]
+
+        with self._lock:
+            self._orders[sort] = order
+        return order
+
+    def _projected(self, paths):
+        """Itens projetados em um conjunto de campos (ou os próprios itens)."""
+        if paths is None:
+            return self.items
+
+        with self._lock:
+            projected = self._projections.get(paths)
+            if projected is not None:
+                self._projections.move_to_end(paths)
+                return projected
+
+        self._validate(paths)
+        projected = [project(item, paths) for item in self.items]
+
+        with self._lock:
+            self._projections[paths] = projected
+            while len(self._projections) > self.max_projections:
+                self._projections.popitem(last=False)
+        return projected
+
+    def page(self, fields=None, sort=None, limit=None, cursor=None):
+        """
+        Retorna uma página da listagem.
+
+        Args:
+            fields (str): Campos a incluir (padrão: todos)
+            sort (str): Campo de ordenação, com '-' para ordem decrescente
+            limit (int): Itens por página (padrão: todos, até MAX_PAGE_SIZE se houver cursor)
+            cursor (str): Cursor devolvido pela página anterior
+
+        Returns:
+            tuple: (itens da página, informações de paginação)
+
+        Raises:
+            ValueError: Para campos, ordenação, limite ou cursor inválidos
+        """
+        paths = parse_fields(fields)
+        offset = decode_cursor(cursor, self.version) if cursor else 0
+
+        if limit is not None:
+            limit = int(limit)
+            if limit <= 0:
+                raise ValueError("O parâmetro limit deve ser positivo")
+            limit = min(limit, MAX_PAGE_SIZE)
+        elif cursor:
+            limit = MAX_PAGE_SIZE
+
+        order = self._order(sort)
+        projected = self._projected(paths)
+
+        end = len(order) if limit is None else min(offset + limit, len(order))
+        items = [projected[index] for index in order[offset:end]]
+
+        return items, {
+            'total': len(order),
+            'offset': offset,
+            'limit': limit,
+            'next_cursor': encode_cursor(end, self.version) if end < len(order) else None
+        }
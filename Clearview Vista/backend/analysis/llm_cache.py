@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de cache de respostas de IA para a Plataforma Inteligente da Clearview Capital.
+Este módulo guarda em disco as respostas do modelo de chat, indexadas pelo hash
+de (modelo, mensagens, temperatura, limite de tokens), para que a mesma pergunta
+(a mesma notícia, o mesmo relatório) não seja paga duas vezes em latência e
+tokens. Cada tarefa tem seu prazo de validade e o espaço total é limitado.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+from analysis.instrumentation import metrics
+
+logger = logging.getLogger("LLMCache")
+
+# Validade (segundos) das respostas por tarefa
+DEFAULT_TTLS = {
+    'sentiment': 7 * 86400,
+    'translation': 30 * 86400,
+    'report': 86400,
+    'market_summary': 3600
+}
+
+def cache_key(model, messages, temperature, max_tokens):
+    """
+    Calcula a chave de uma chamada ao modelo.
+
+    Args:
+        model (str): Modelo de chat
+        messages (list): Mensagens (sistema e usuário)
+        temperature (float): Temperatura da amostragem
+        max_tokens (int): Limite de tokens da resposta
+
+    Returns:
+        str: Hash hexadecimal (sha256)
+    """
+    raw = json.dumps([model, messages, round(float(temperature), 4), max_tokens],
+                     ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+class LLMCache:
+    """
+    Respostas do modelo de chat em `<data_dir>/llm_cache/<aa>/<hash>.json`.
+
+    Um índice em memória (chave -> tamanho, em ordem de uso) é reconstruído na
+    inicialização a partir dos arquivos. Ao ultrapassar `max_bytes`, as respostas
+    usadas há mais tempo são removidas; respostas vencidas são descartadas ao
+    serem lidas.
+    """
+
+    def __init__(self, data_dir="/home/ubuntu/clearview_project/data", max_bytes=64 * 1024 * 1024, ttls=None):
+        """
+        Inicializa o cache.
+
+        Args:
+            data_dir (str): Diretório para armazenamento de dados
+            max_bytes (int): Espaço máximo ocupado pelas respostas (0 desativa o cache)
+            ttls (dict): Validade (segundos) por tarefa, sobrepondo DEFAULT_TTLS
+        """
+        self.cache_dir = os.path.join(data_dir, "llm_cache")
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        # Por tarefa: consultas atendidas, não atendidas e tokens economizados
+        self.stats = {}
+        if max_bytes:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._scan()
+
+    def _file_for(self, key):
+        """Retorna o caminho do arquivo de uma resposta."""
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _scan(self):
+        """Reconstrói o índice a partir dos arquivos (usados mais recentemente por último)."""
+        found = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.json'):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    found.append((stat.st_mtime, name[:-5], stat.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._bytes += size
+        if found:
+            logger.info(f"{len(found)} respostas em cache ({self._bytes / 1024:.0f} KB)")
+        self._evict()
+
+    def _count(self, task, field, amount=1):
+        """Atualiza as estatísticas de uma tarefa (chamado com a trava)."""
+        stats = self.stats.setdefault(task, {'hits': 0, 'misses': 0, 'tokens_saved': 0})
+        stats[field] += amount
+
+    def get(self, key, task):
+        """
+        Retorna uma resposta em cache.
+
+        Args:
+            key (str): Chave calculada por cache_key
+            task (str): Tarefa (define a validade e agrupa as estatísticas)
+
+        Returns:
+            str: Texto da resposta, ou None se ausente ou vencida
+        """
+        if not self.max_bytes:
+            return None
+
+        entry = None
+        with self._lock:
+            if key in self._entries:
+                try:
+                    with open(self._file_for(key), 'r', encoding='utf-8') as f:
+                        entry = json.load(f)
+                except (OSError, ValueError):
+                    entry = None
+
+                if entry is None or time.time() > entry['created_at'] + self.ttls.get(entry.get('task'), 0):
+                    # Vencida (ou ilegível): remove já
+                    self._remove(key)
+                    entry = None
+                else:
+                    self._entries.move_to_end(key)
+
+            outcome = 'hit' if entry is not None else 'miss'
+            self._count(task, 'hits' if entry is not None else 'misses')
+            if entry is not None:
+                self._count(task, 'tokens_saved', entry.get('tokens') or 0)
+        metrics.record_cache(f"llm_{task}", outcome)
+
+        if entry is None:
+            return None
+        try:
+            # Ordem de uso sobrevive à reinicialização
+            os.utime(self._file_for(key))
+        except OSError:
+            pass
+        return entry['response']
+
+    def put(self, key, task, response, tokens=None):
+        """
+        Guarda uma resposta.
+
+        Args:
+            key (str): Chave calculada por cache_key
+            task (str): Tarefa que originou a resposta
+            response (str): Texto da resposta
+            tokens (int): Tokens consumidos pela chamada (estatística de economia)
+        """
+        if not self.max_bytes or task not in self.ttls:
+            return
+
+        data = json.dumps({
+            'task': task,
+            'created_at': time.time(),
+            'tokens': tokens,
+            'response': response
+        }, ensure_ascii=False).encode('utf-8')
+
+        path = self._file_for(key)
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                temp_file = path + '.tmp'
+                with open(temp_file, 'wb') as f:
+                    f.write(data)
+                os.replace(temp_file, path)
+            except OSError as e:
+                logger.error(f"Erro ao salvar resposta em cache: {e}")
+                return
+
+            if key in self._entries:
+                self._bytes -= self._entries[key]
+            self._entries[key] = len(data)
+            self._entries.move_to_end(key)
+            self._bytes += len(data)
+            self._evict()
+
+    def _remove(self, key):
+        """Remove uma resposta do índice e do disco (chamado com a trava)."""
+        self._bytes -= self._entries.pop(key)
+        try:
+            os.remove(self._file_for(key))
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Remove as respostas usadas há mais tempo até caber em max_bytes (chamado com a trava)."""
+        evicted = 0
+        while self._bytes > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+            evicted += 1
+        if evicted:
+            logger.info(f"{evicted} resposta(s) removida(s) do cache por espaço")
+
+    def hit_rate(self, task=None):
+        """
+        Taxa de acerto do cache.
+
+        Args:
+            task (str): Tarefa (None considera todas)
+
+        Returns:
+            float: Fração das consultas atendidas pelo cache (None sem consultas)
+        """
+        with self._lock:
+            selected = [self.stats[task]] if task in self.stats else ([] if task else list(self.stats.values()))
+            hits = sum(stats['hits'] for stats in selected)
+            total = hits + sum(stats['misses'] for stats in selected)
+        return hits / total if total else None
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de execução de chamadas de IA para a Plataforma Inteligente da Clearview Capital.
+Este módulo executa as chamadas ao modelo de chat em um laço de eventos próprio,
+compartilhado por todo o processo: no máximo `concurrency` chamadas ficam em
+andamento ao mesmo tempo, erros de limite de taxa (HTTP 429) são repetidos com
+espera exponencial e cada chamada tem um prazo, após o qual é usada a
+alternativa local (as implementações `_simple_*`). Chamadas em streaming têm as
+partes repassadas a quem as consome à medida que chegam.
+"""
+
+import queue
+import random
+import asyncio
+import logging
+import threading
+import contextvars
+import concurrent.futures
+
+import aiohttp
+
+logger = logging.getLogger("LLMExecutor")
+
+class DeadlineExceeded(TimeoutError):
+    """Prazo de uma chamada esgotado sem alternativa local."""
+
+def is_rate_limited(error):
+    """
+    Indica se um erro é de limite de taxa (repetível após uma espera).
+
+    Args:
+        error (Exception): Erro da chamada (ex: openai.error.RateLimitError)
+
+    Returns:
+        bool: True para HTTP 429
+    """
+    return type(error).__name__ == 'RateLimitError' or getattr(error, 'http_status', None) == 429
+
+def retry_after(error):
+    """Espera (segundos) pedida pelo servidor no cabeçalho Retry-After, se houver."""
+    headers = getattr(error, 'headers', None) or {}
+    try:
+        return float(headers.get('retry-after') or headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+class LLMExecutor:
+    """
+    Executor de chamadas assíncronas com limite de concorrência, prazo e repetição.
+
+    As chamadas são corrotinas criadas por uma função sem argumentos (recriadas a
+    cada tentativa) e rodam em uma thread com um laço de eventos dedicado, então
+    podem ser submetidas tanto por código síncrono (`run`, `map`) quanto por
+    corrotinas de outro laço (`arun`). O prazo conta desde a submissão: inclui a
+    espera por uma vaga e as esperas entre tentativas.
+    """
+
+    def __init__(self, concurrency=4, deadline=60.0, max_retries=4, backoff=0.5, max_backoff=8.0):
+        """
+        Inicializa o executor.
+
+        Args:
+            concurrency (int): Máximo de chamadas em andamento ao mesmo tempo
+            deadline (float): Prazo padrão (segundos) de cada chamada
+            max_retries (int): Repetições após erros de limite de taxa
+            backoff (float): Espera (segundos) antes da primeira repetição, dobrada a cada nova
+            max_backoff (float): Espera máxima entre repetições
+        """
+        self.concurrency = concurrency
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self._loop = None
+        self._thread = None
+        self._semaphore = None
+        self._session = None
+        self._lock = threading.Lock()
+
+        # Chamadas concluídas, repetições, prazos esgotados e alternativas locais usadas
+        self.stats = {'calls': 0, 'retries': 0, 'deadlines': 0, 'fallbacks': 0}
+
+    def _ensure_loop(self):
+        """Inicia a thread do laço de eventos (também após um fork, em que ela não é herdada)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._loop = asyncio.new_event_loop()
+            self._semaphore = None
+            self._session = None
+            ready = threading.Event()
+            self._thread = threading.Thread(target=self._run_loop, args=(ready,), name='llm-executor', daemon=True)
+            self._thread.start()
+            ready.wait()
+
+    def _run_loop(self, ready):
+        """Laço da thread do executor."""
+        asyncio.set_event_loop(self._loop)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._loop.call_soon(ready.set)
+        self._loop.run_forever()
+
+    def http_session(self):
+        """
+        Sessão aiohttp compartilhada pelas chamadas (chamar de dentro do laço do executor).
+
+        Criada no próprio laço na primeira chamada. Uma chamada cancelada (prazo
+        esgotado) não deixa sessão aberta: a conexão volta ao pool da sessão.
+
+        Returns:
+            aiohttp.ClientSession: Sessão do laço do executor
+        """
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        return self._session
+
+    def close(self):
+        """Fecha a sessão HTTP compartilhada e encerra o laço do executor."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                return
+            if self._session is not None:
+                asyncio.run_coroutine_threadsafe(self._session.close(), self._loop).result()
+                self._session = None
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+
+    async def _attempts(self, call):
+        """Executa a chamada, repetindo após erros de limite de taxa."""
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    return await call()
+            except Exception as e:
+                if not is_rate_limited(e) or attempt >= self.max_retries:
+                    raise
+                # A espera acontece fora do semáforo: a vaga fica para outras chamadas
+                delay = retry_after(e) or min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+                attempt += 1
+                self.stats['retries'] += 1
+                logger.warning(f"Limite de taxa atingido; nova tentativa ({attempt}/{self.max_retries}) em {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    async def _execute(self, call, fallback, deadline):
+        """Executa a chamada dentro do prazo, recorrendo à alternativa local se preciso."""
+        try:
+            result = await asyncio.wait_for(self._attempts(call), deadline)
+            self.stats['calls'] += 1
+            return result
+        except asyncio.TimeoutError:
+            self.stats['deadlines'] += 1
+            logger.warning(f"Prazo de {deadline:.1f}s esgotado na chamada ao modelo")
+            if fallback is None:
+                raise DeadlineExceeded(f"Prazo de {deadline:.1f}s esgotado")
+        except Exception as e:
+            if fallback is None:
+                raise
+            logger.error(f"Erro na chamada ao modelo: {e}")
+        self.stats['fallbacks'] += 1
+        return fallback()
+
+    def submit(self, call, fallback=None, deadline=None):
+        """
+        Submete uma chamada.
+
+        Args:
+            call (callable): Função sem argumentos que retorna a corrotina da chamada
+            fallback (callable): Função sem argumentos cujo resultado substitui o da chamada
+                se o prazo esgotar ou a chamada falhar (None propaga o erro)
+            deadline (float): Prazo em segundos (None usa o padrão do executor)
+
+        Returns:
+            concurrent.futures.Future: Resultado da chamada (ou da alternativa)
+        """
+        self._ensure_loop()
+        future = concurrent.futures.Future()
+        # O contexto de quem submete (ex: a requisição atual, nas métricas) segue para a chamada
+        context = contextvars.copy_context()
+        coro = self._execute(call, fallback, deadline or self.deadline)
+        self._loop.call_soon_threadsafe(self._start, coro, future, context)
+        return future
+
+    def _start(self, coro, future, context):
+        """Cria a tarefa no laço do executor e liga seu resultado ao futuro (na thread do laço)."""
+        if not future.set_running_or_notify_cancel():
+            coro.close()
+            return
+        task = context.run(self._loop.create_task, coro)
+
+        def done(task):
+            if task.cancelled():
+                future.set_exception(concurrent.futures.CancelledError())
+            elif task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result(task.result())
+        task.add_done_callback(done)
+
+    async def _pump(self, call, emit, deadline):
+        """
+        Executa uma chamada em streaming, repassando cada parte a `emit`.
+
+        A vaga é mantida até o fim do streaming. O prazo vale até a primeira parte
+        (incluindo a espera por vaga e as repetições após limite de taxa) e, depois
+        dela, como intervalo máximo entre partes. `emit` recebe ('chunk', parte),
+        depois ('end', None) ou ('error', erro).
+        """
+        loop = asyncio.get_running_loop()
+        expires = loop.time() + deadline
+        attempt = 0
+        iterator = None
+        try:
+            while True:
+                await asyncio.wait_for(self._semaphore.acquire(), max(0.0, expires - loop.time()))
+                started = False
+                try:
+                    iterator = call().__aiter__()
+                    while True:
+                        timeout = deadline if started else max(0.0, expires - loop.time())
+                        try:
+                            chunk = await asyncio.wait_for(iterator.__anext__(), timeout)
+                        except StopAsyncIteration:
+                            break
+                        started = True
+                        emit(('chunk', chunk))
+                    break
+                except asyncio.TimeoutError:
+                    raise
+                except Exception as e:
+                    # Só dá para repetir se nada foi repassado ainda
+                    if started or not is_rate_limited(e) or attempt >= self.max_retries:
+                        raise
+                    delay = retry_after(e) or min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+                    attempt += 1
+                    self.stats['retries'] += 1
+                    logger.warning(f"Limite de taxa atingido; nova tentativa ({attempt}/{self.max_retries}) em {delay:.2f}s")
+                finally:
+                    self._semaphore.release()
+                await asyncio.sleep(min(delay, max(0.0, expires - loop.time())))
+            self.stats['calls'] += 1
+            emit(('end', None))
+        except asyncio.TimeoutError:
+            self.stats['deadlines'] += 1
+            logger.warning(f"Prazo de {deadline:.1f}s esgotado na chamada ao modelo em streaming")
+            emit(('error', DeadlineExceeded(f"Prazo de {deadline:.1f}s esgotado")))
+        except Exception as e:
+            emit(('error', e))
+        finally:
+            # Prazo esgotado ou consumidor desistiu (tarefa cancelada): fechar a resposta em andamento
+            if iterator is not None and hasattr(iterator, 'aclose'):
+                try:
+                    await iterator.aclose()
+                except Exception as e:
+                    logger.warning(f"Erro ao fechar a resposta em streaming: {e}")
+
+    def _spawn(self, coro):
+        """
+        Cria, no laço do executor, a tarefa de uma corrotina (com o contexto de quem chama).
+
+        Returns:
+            callable: Cancela a tarefa (chamável de qualquer thread)
+        """
+        self._ensure_loop()
+        context = contextvars.copy_context()
+        holder = []
+        self._loop.call_soon_threadsafe(lambda: holder.append(context.run(self._loop.create_task, coro)))
+        # As chamadas agendadas rodam em ordem: a tarefa já existe quando o cancelamento roda
+        return lambda: self._loop.call_soon_threadsafe(lambda: holder and holder[0].cancel())
+
+    def stream(self, call, deadline=None):
+        """
+        Executa uma chamada em streaming e entrega as partes à medida que chegam (código síncrono).
+
+        Se o consumidor desiste (fecha o gerador), a chamada é cancelada.
+
+        Args:
+            call (callable): Função sem argumentos que retorna um iterável assíncrono das partes
+            deadline (float): Prazo até a primeira parte (e entre partes), em segundos
+            
+        Yields:
+            object: Partes da resposta
+            
+        Raises:
+            DeadlineExceeded: Se o prazo esgotou
+        """
+        items = queue.Queue()
+        cancel = self._spawn(self._pump(call, items.put, deadline or self.deadline))
+        try:
+            while True:
+                kind, value = items.get()
+                if kind == 'chunk':
+                    yield value
+                elif kind == 'error':
+                    raise value
+                else:
+                    return
+        finally:
+            cancel()
+
+    async def astream(self, call, deadline=None):
+        """Versão assíncrona de stream, para corrotinas de outro laço de eventos (ex: servidor asyncio)."""
+        loop = asyncio.get_running_loop()
+        items = asyncio.Queue()
+        cancel = self._spawn(self._pump(call, lambda item: loop.call_soon_threadsafe(items.put_nowait, item),
+                                        deadline or self.deadline))
+        try:
+            while True:
+                kind, value = await items.get()
+                if kind == 'chunk':
+                    yield value
+                elif kind == 'error':
+                    raise value
+                else:
+                    return
+        finally:
+            cancel()
+
+    def run(self, call, fallback=None, deadline=None):
+        """
+        Executa uma chamada e aguarda o resultado (código síncrono).
+
+        Args:
+            call (callable): Função sem argumentos que retorna a corrotina da chamada
+            fallback (callable): Alternativa local (ver submit)
+            deadline (float): Prazo em segundos
+
+        Returns:
+            object: Resultado da chamada (ou da alternativa)
+
+        Raises:
+            DeadlineExceeded: Se o prazo esgotou e não há alternativa
+        """
+        return self.submit(call, fallback, deadline).result()
+
+    async def arun(self, call, fallback=None, deadline=None):
+        """Versão assíncrona de run, para corrotinas de outro laço de eventos (ex: servidor asyncio)."""
+        return await asyncio.wrap_future(self.submit(call, fallback, deadline))
+
+    def map(self, calls, deadline=None):
+        """
+        Executa várias chamadas ao mesmo tempo (até o limite de concorrência).
+
+        Args:
+            calls (list): Pares (call, fallback), como em submit
+            deadline (float): Prazo de cada chamada
+
+        Returns:
+            list: Resultados na ordem das chamadas
+        """
+        futures = [self.submit(call, fallback, deadline) for call, fallback in calls]
+        return [future.result() for future in futures]
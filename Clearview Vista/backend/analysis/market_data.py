@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de cotações via HTTP para a Plataforma Inteligente da Clearview Capital.
+Este módulo busca o gráfico diário de uma ação em um endpoint compatível com o
+Yahoo Finance (`/v8/finance/chart`), de forma síncrona (requests) ou assíncrona
+(aiohttp), e interpreta a resposta no mesmo formato usado pelo analisador.
+"""
+
+import os
+import logging
+import requests
+
+from analysis.instrumentation import metrics
+
+logger = logging.getLogger("MarketData")
+
+# Endpoint de gráficos, com {symbol} e {region} (ex: https://query1.finance.yahoo.com/v8/finance/chart/{symbol});
+# vazio desativa a busca por HTTP
+CHART_URL = os.environ.get("CLEARVIEW_CHART_URL", "")
+
+# Tempo máximo (segundos) de uma busca de gráfico
+CHART_TIMEOUT = float(os.environ.get("CLEARVIEW_CHART_TIMEOUT", 10))
+
+# Parâmetros do gráfico: um ano de fechamentos diários
+CHART_PARAMS = {'interval': '1d', 'range': '1y'}
+
+def chart_url(symbol, region="BR"):
+    """
+    Monta a URL do gráfico de uma ação.
+
+    Args:
+        symbol (str): Código da ação
+        region (str): Região da ação (BR ou US)
+
+    Returns:
+        str: URL, ou None se a busca por HTTP não estiver configurada
+    """
+    if not CHART_URL:
+        return None
+    return CHART_URL.format(symbol=symbol, region=region)
+
+def parse_chart(symbol, chart_data):
+    """
+    Interpreta a resposta de um gráfico diário.
+
+    Args:
+        symbol (str): Código da ação
+        chart_data (dict): Resposta do endpoint de gráficos
+
+    Returns:
+        tuple: (dados da ação, timestamps, fechamentos), ou None se a resposta não tem resultado
+    """
+    if not chart_data or 'chart' not in chart_data or not chart_data['chart'].get('result'):
+        return None
+
+    result = chart_data['chart']['result'][0]
+
+    # Extrair metadados
+    meta = result['meta']
+    stock_data = {
+        'symbol': symbol,
+        'currency': meta.get('currency'),
+        'exchange': meta.get('exchangeName'),
+        'name': meta.get('shortName', ''),
+        'long_name': meta.get('longName', '')
+    }
+
+    # Extrair preços
+    closes = result['indicators']['quote'][0]['close']
+    timestamps = result['timestamp']
+
+    # Obter último preço disponível
+    last_valid_idx = -1
+    for i in range(len(closes) - 1, -1, -1):
+        if closes[i] is not None:
+            last_valid_idx = i
+            break
+
+    if last_valid_idx >= 0:
+        stock_data['price'] = closes[last_valid_idx]
+        stock_data['last_update'] = timestamps[last_valid_idx]
+
+        # Calcular variação em 1 dia
+        if last_valid_idx > 0 and closes[last_valid_idx - 1] is not None:
+            prev_price = closes[last_valid_idx - 1]
+            stock_data['change_1d'] = (stock_data['price'] - prev_price) / prev_price * 100
+        else:
+            stock_data['change_1d'] = 0
+
+        # Calcular variação em 1 ano
+        first_valid_idx = 0
+        for i in range(len(closes)):
+            if closes[i] is not None:
+                first_valid_idx = i
+                break
+
+        if first_valid_idx < last_valid_idx:
+            first_price = closes[first_valid_idx]
+            stock_data['change_1y'] = (stock_data['price'] - first_price) / first_price * 100
+        else:
+            stock_data['change_1y'] = 0
+
+    return stock_data, timestamps, closes
+
+def fetch_chart(symbol, region="BR"):
+    """
+    Busca o gráfico de uma ação (bloqueante).
+
+    Args:
+        symbol (str): Código da ação
+        region (str): Região da ação (BR ou US)
+
+    Returns:
+        dict: Resposta do endpoint, ou None se não configurado
+    """
+    url = chart_url(symbol, region)
+    if url is None:
+        return None
+    with metrics.upstream_call('chart_http', 'chart'):
+        response = requests.get(url, params=CHART_PARAMS, timeout=CHART_TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+
+async def afetch_chart(session, symbol, region="BR"):
+    """
+    Busca o gráfico de uma ação sem bloquear o loop de eventos.
+
+    Args:
+        session (aiohttp.ClientSession): Sessão HTTP compartilhada
+        symbol (str): Código da ação
+        region (str): Região da ação (BR ou US)
+
+    Returns:
+        dict: Resposta do endpoint, ou None se não configurado
+    """
+    url = chart_url(symbol, region)
+    if url is None:
+        return None
+    with metrics.upstream_call('chart_http', 'chart'):
+        async with session.get(url, params=CHART_PARAMS) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de panorama do mercado para a Plataforma Inteligente da Clearview Capital.
+Este módulo mantém em memória um instantâneo de índices, moedas e commodities,
+renovado periodicamente em segundo plano a partir de um provedor de cotações
+(gráficos do Yahoo Finance ou um arquivo local para uso offline). A API, a
+newsletter e o resumo de mercado leem esse mesmo instantâneo, cuja versão só
+muda quando os dados mudam.
+"""
+
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime
+
+from analysis.market_data import parse_chart
+
+logger = logging.getLogger("MarketOverview")
+
+# Instrumentos acompanhados: seção -> código -> (nome, código no Yahoo Finance)
+INSTRUMENTS = {
+    'indices': {
+        'IBOV': ('Ibovespa', '^BVSP'),
+        'IFIX': ('Índice de Fundos Imobiliários', 'IFIX.SA'),
+        'SP500': ('S&P 500', '^GSPC'),
+        'NASDAQ': ('Nasdaq Composite', '^IXIC')
+    },
+    'currencies': {
+        'USD/BRL': ('Dólar/Real', 'BRL=X'),
+        'EUR/BRL': ('Euro/Real', 'EURBRL=X'),
+        'BTC/USD': ('Bitcoin/Dólar', 'BTC-USD')
+    },
+    'commodities': {
+        'OIL': ('Petróleo Brent', 'BZ=F'),
+        'GOLD': ('Ouro', 'GC=F'),
+        'IRON': ('Minério de Ferro', 'TIO=F')
+    }
+}
+
+# Cotações de referência do provedor local (código -> valor e variação em %)
+FIXTURE_QUOTES = {
+    'IBOV': {'value': 125430.45, 'change': 1.2},
+    'IFIX': {'value': 3245.67, 'change': 0.5},
+    'SP500': {'value': 5230.18, 'change': 0.8},
+    'NASDAQ': {'value': 16780.45, 'change': 1.1},
+    'USD/BRL': {'value': 5.12, 'change': -0.3},
+    'EUR/BRL': {'value': 5.58, 'change': -0.2},
+    'BTC/USD': {'value': 68450.25, 'change': 2.5},
+    'OIL': {'value': 82.45, 'change': 1.8},
+    'GOLD': {'value': 2345.67, 'change': 0.7},
+    'IRON': {'value': 120.34, 'change': -0.5}
+}
+
+class FixtureProvider:
+    """
+    Provedor local de cotações, para uso offline e em testes.
+
+    Lê um arquivo JSON no formato {"as_of": "...", "quotes": {"IBOV": {"value": ..., "change": ...}}}
+    ou, sem arquivo, usa FIXTURE_QUOTES. As cotações não mudam entre renovações.
+    """
+
+    name = 'fixture'
+
+    def __init__(self, path=None):
+        """
+        Inicializa o provedor.
+
+        Args:
+            path (str): Arquivo JSON com as cotações (None usa FIXTURE_QUOTES)
+        """
+        self.path = path
+        self.as_of = datetime.now().replace(microsecond=0).isoformat()
+        self._quotes = dict(FIXTURE_QUOTES)
+        if path:
+            with open(path, 'r', encoding='utf-8') as f:
+                fixture = json.load(f)
+            self._quotes = fixture.get('quotes', fixture)
+            self.as_of = fixture.get('as_of', self.as_of)
+
+    def quotes(self):
+        """
+        Retorna as cotações de todos os instrumentos.
+
+        Returns:
+            dict: Código -> {'value', 'change', 'as_of'}
+        """
+        return {
+            code: {'value': quote['value'], 'change': quote.get('change', 0), 'as_of': quote.get('as_of', self.as_of)}
+            for code, quote in self._quotes.items()
+        }
+
+class ChartProvider:
+    """Provedor de cotações a partir dos gráficos diários de cada instrumento."""
+
+    name = 'chart'
+
+    def __init__(self, fetch):
+        """
+        Inicializa o provedor.
+
+        Args:
+            fetch (callable): Recebe o código no Yahoo Finance e retorna a resposta de gráfico
+        """
+        self.fetch = fetch
+
+    def quotes(self):
+        """
+        Busca as cotações de todos os instrumentos (os que falham ficam de fora).
+
+        Returns:
+            dict: Código -> {'value', 'change', 'as_of'}
+        """
+        quotes = {}
+        for section in INSTRUMENTS.values():
+            for code, (_, provider_symbol) in section.items():
+                try:
+                    parsed = parse_chart(provider_symbol, self.fetch(provider_symbol))
+                except Exception as e:
+                    logger.error(f"Erro ao buscar cotação de {code} ({provider_symbol}): {e}")
+                    continue
+                if parsed is None or parsed[0].get('price') is None:
+                    continue
+                stock_data = parsed[0]
+                quotes[code] = {
+                    'value': round(stock_data['price'], 4),
+                    'change': round(stock_data.get('change_1d', 0), 2),
+                    'as_of': datetime.fromtimestamp(stock_data['last_update']).isoformat()
+                }
+        return quotes
+
+class MarketOverview:
+    """
+    Instantâneo do mercado compartilhado, renovado por uma thread em segundo plano.
+
+    O instantâneo é substituído por inteiro a cada renovação, então leitores
+    concorrentes sempre veem versão e dados consistentes. A versão é um hash do
+    conteúdo: renovações sem mudança de cotação mantêm a versão (e o ETag).
+    Instrumentos que falham mantêm a última cotação conhecida.
+    """
+
+    def __init__(self, provider, refresh_seconds=60, fallback=None):
+        """
+        Inicializa o panorama do mercado.
+
+        Args:
+            provider: Provedor com o método quotes()
+            refresh_seconds (float): Intervalo entre renovações
+            fallback: Provedor usado se ainda não há cotações (ex: FixtureProvider)
+        """
+        self.provider = provider
+        self.refresh_seconds = refresh_seconds
+        self.fallback = fallback
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._first_refresh = threading.Lock()
+        self._scheduler_lock = threading.Lock()
+        self._scheduler = None
+        self._stop = threading.Event()
+        self.refreshes = 0
+
+    def _build(self, quotes, source):
+        """Monta o instantâneo a partir das cotações (mantendo as anteriores que faltarem)."""
+        previous = self._snapshot['data'] if self._snapshot else {}
+        data = {}
+        for section, instruments in INSTRUMENTS.items():
+            data[section] = {}
+            for code, (name, _) in instruments.items():
+                quote = quotes.get(code)
+                if quote is None:
+                    if code in previous.get(section, {}):
+                        data[section][code] = previous[section][code]
+                    continue
+                data[section][code] = {
+                    'name': name,
+                    'value': quote['value'],
+                    'change': quote['change'],
+                    'last_update': quote['as_of']
+                }
+
+        raw = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+        version = hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+        now = datetime.now().replace(microsecond=0).isoformat()
+        if self._snapshot is not None and self._snapshot['version'] == version:
+            return dict(self._snapshot, refreshed_at=now)
+        return {
+            'version': version,
+            'updated_at': now,
+            'refreshed_at': now,
+            'source': source,
+            'data': data
+        }
+
+    def refresh(self):
+        """
+        Renova o instantâneo a partir do provedor.
+
+        Returns:
+            dict: Instantâneo vigente após a renovação
+        """
+        with self._lock:
+            source = self.provider.name
+            try:
+                quotes = self.provider.quotes()
+            except Exception as e:
+                logger.error(f"Erro ao renovar panorama do mercado: {e}")
+                quotes = {}
+
+            if not quotes and self._snapshot is None and self.fallback is not None:
+                logger.warning("Sem cotações do provedor; usando cotações locais")
+                source, quotes = self.fallback.name, self.fallback.quotes()
+
+            if quotes or self._snapshot is None:
+                self._snapshot = self._build(quotes, source)
+            self.refreshes += 1
+            return self._snapshot
+
+    def snapshot(self):
+        """
+        Retorna o instantâneo vigente (iniciando a renovação periódica, se necessário).
+
+        Returns:
+            dict: {'version', 'updated_at', 'refreshed_at', 'source', 'data'}
+        """
+        if self._snapshot is None:
+            # Primeira leitura: renova aqui (uma vez só, mesmo com leitores concorrentes)
+            with self._first_refresh:
+                if self._snapshot is None:
+                    self.refresh()
+        self.start()
+        return self._snapshot
+
+    def start(self):
+        """Inicia a renovação periódica (também após um fork, em que a thread não é herdada)."""
+        if self._scheduler is not None and self._scheduler.is_alive():
+            return
+        with self._scheduler_lock:
+            if self._scheduler is not None and self._scheduler.is_alive():
+                return
+            self._stop.clear()
+            self._scheduler = threading.Thread(target=self._run, name='market-overview', daemon=True)
+            self._scheduler.start()
+
+    def stop(self):
+        """Interrompe a renovação periódica."""
+        self._stop.set()
+
+    def _run(self):
+        """Laço da thread de renovação."""
+        while not self._stop.wait(self.refresh_seconds):
+            self.refresh()
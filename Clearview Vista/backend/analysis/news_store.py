@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de armazenamento de notícias para a Plataforma Inteligente da Clearview Capital.
+Este módulo guarda as notícias buscadas sem duplicatas (pelo hash de URL e
+título), mantém um índice invertido ação -> notícias em ordem cronológica, para
+que as mais recentes de uma ação sejam lidas sem percorrer as demais, e descarta
+as notícias mais antigas que o período de retenção.
+"""
+
+import os
+import json
+import heapq
+import bisect
+import hashlib
+import logging
+import threading
+from itertools import islice
+from datetime import datetime, timedelta
+
+logger = logging.getLogger("NewsStore")
+
+# Chave do índice para notícias sem ações relacionadas (notícias gerais)
+GENERAL = '*'
+
+def news_id(item):
+    """
+    Calcula o identificador de uma notícia.
+
+    Args:
+        item (dict): Notícia com 'url' e 'title'
+
+    Returns:
+        str: Hash hexadecimal (sha1) da URL e do título normalizados
+    """
+    url = (item.get('url') or '').strip().lower().rstrip('/')
+    title = ' '.join((item.get('title') or '').lower().split())
+    return hashlib.sha1(f"{url}|{title}".encode('utf-8')).hexdigest()
+
+def news_timestamp(item):
+    """Data da notícia em segundos desde a época (agora, se ausente ou inválida)."""
+    try:
+        return datetime.fromisoformat(item['date']).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return datetime.now().timestamp()
+
+class NewsStore:
+    """
+    Notícias persistidas em `<data_dir>/news_store.jsonl`, uma por linha.
+
+    Notícias novas são acrescentadas ao fim do arquivo; a compactação reescreve
+    o arquivo somente com as notícias dentro do período de retenção. Em memória,
+    cada ação (e GENERAL) tem a lista de (data, id) das suas notícias em ordem
+    cronológica; a consulta intercala as listas da ação e das notícias gerais a
+    partir do fim, lendo apenas `limit` itens.
+    """
+
+    def __init__(self, data_dir="/home/ubuntu/clearview_project/data", retention_days=30, max_items=5000):
+        """
+        Inicializa o armazenamento de notícias.
+
+        Args:
+            data_dir (str): Diretório para armazenamento de dados
+            retention_days (int): Dias mantidos na compactação
+            max_items (int): Máximo de notícias mantidas na compactação (as mais antigas saem primeiro)
+        """
+        self.store_file = os.path.join(data_dir, "news_store.jsonl")
+        self.retention_days = retention_days
+        self.max_items = max_items
+
+        self._items = {}
+        self._index = {}
+        self._timeline = []
+        self._lock = threading.Lock()
+        self._appended = 0
+        self._compacted_at = None
+
+        # Data da última alteração: versão das respostas de /api/news
+        self.last_update = None
+        self.load()
+
+    def load(self):
+        """Carrega as notícias salvas e reconstrói o índice."""
+        try:
+            if os.path.exists(self.store_file):
+                with open(self.store_file, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        if line.strip():
+                            self._insert(json.loads(line))
+                self.last_update = datetime.fromtimestamp(os.path.getmtime(self.store_file)).isoformat()
+                logger.info(f"{len(self._items)} notícias carregadas de {self.store_file}")
+        except Exception as e:
+            logger.error(f"Erro ao carregar notícias: {e}")
+
+    def _insert(self, item):
+        """
+        Guarda uma notícia e a indexa (chamado com a trava).
+
+        Returns:
+            str: 'new', 'updated' (já existia e ganhou campos) ou None (já existia, sem mudança)
+        """
+        item_id = item['id']
+        existing = self._items.get(item_id)
+        if existing is not None:
+            # Mesma notícia buscada de novo: completa os campos ainda vazios (ex: sentimento)
+            filled = {key: value for key, value in item.items() if value is not None and existing.get(key) is None}
+            existing.update(filled)
+            return 'updated' if filled else None
+
+        self._items[item_id] = item
+        entry = (item['timestamp'], item_id)
+        bisect.insort(self._timeline, entry)
+        for symbol in item.get('related_stocks') or [GENERAL]:
+            bisect.insort(self._index.setdefault(symbol.upper(), []), entry)
+        return 'new'
+
+    def add(self, news):
+        """
+        Acrescenta notícias, ignorando as já armazenadas.
+
+        Args:
+            news (list): Notícias com 'url', 'title', 'date' e 'related_stocks'
+
+        Returns:
+            int: Número de notícias novas
+        """
+        added = 0
+        changed = []
+        with self._lock:
+            for item in news:
+                item = dict(item, id=item.get('id') or news_id(item))
+                item.setdefault('timestamp', news_timestamp(item))
+                outcome = self._insert(item)
+                if outcome is not None:
+                    # Atualizações também vão ao arquivo; na carga, as linhas repetidas se combinam
+                    changed.append(self._items[item['id']])
+                    added += outcome == 'new'
+
+            if changed:
+                try:
+                    with open(self.store_file, 'a', encoding='utf-8') as f:
+                        for item in changed:
+                            f.write(json.dumps(item, ensure_ascii=False) + '\n')
+                except Exception as e:
+                    logger.error(f"Erro ao salvar notícias: {e}")
+                self._appended += len(changed)
+                self.last_update = datetime.now().isoformat()
+
+        # Compactar uma vez por dia, ou assim que o limite de notícias for ultrapassado
+        if changed and (self._compacted_at is None or self._compacted_at < datetime.now() - timedelta(days=1)
+                        or len(self._items) > self.max_items):
+            self.compact()
+        return added
+
+    def query(self, symbol=None, limit=10, include_general=True):
+        """
+        Retorna as notícias mais recentes.
+
+        Args:
+            symbol (str): Código da ação (None retorna notícias de todas as ações)
+            limit (int): Número máximo de notícias
+            include_general (bool): Inclui notícias gerais (sem ações relacionadas) ao filtrar por ação
+
+        Returns:
+            list: Notícias da mais recente para a mais antiga
+        """
+        with self._lock:
+            if symbol is None:
+                entries = reversed(self._timeline)
+            else:
+                lists = [self._index.get(symbol.upper(), [])]
+                if include_general:
+                    lists.append(self._index.get(GENERAL, []))
+                entries = heapq.merge(*(reversed(entries) for entries in lists), reverse=True)
+            return [self._public(self._items[item_id]) for _, item_id in islice(entries, limit)]
+
+    @staticmethod
+    def _public(item):
+        """Notícia sem os campos internos de indexação."""
+        return {key: value for key, value in item.items() if key != 'timestamp'}
+
+    def __len__(self):
+        return len(self._items)
+
+    def compact(self, now=None):
+        """
+        Descarta as notícias fora do período de retenção (e além de max_items) e reescreve o arquivo.
+
+        Args:
+            now (datetime): Referência para a retenção (padrão: agora)
+
+        Returns:
+            int: Número de notícias descartadas
+        """
+        now = now or datetime.now()
+        cutoff = (now - timedelta(days=self.retention_days)).timestamp()
+        with self._lock:
+            # A linha do tempo está ordenada: as que saem são um prefixo dela
+            start = bisect.bisect_left(self._timeline, (cutoff, ''))
+            start = max(start, len(self._timeline) - self.max_items)
+            removed = self._timeline[:start]
+            self._compacted_at = now
+            if not removed and self._appended == 0:
+                return 0
+
+            for _, item_id in removed:
+                self._items.pop(item_id, None)
+            self._timeline = self._timeline[start:]
+            kept = set(self._items)
+            for symbol in list(self._index):
+                entries = [entry for entry in self._index[symbol] if entry[1] in kept]
+                if entries:
+                    self._index[symbol] = entries
+                else:
+                    del self._index[symbol]
+
+            try:
+                temp_file = self.store_file + '.tmp'
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    for _, item_id in self._timeline:
+                        f.write(json.dumps(self._items[item_id], ensure_ascii=False) + '\n')
+                os.replace(temp_file, self.store_file)
+                self._appended = 0
+            except Exception as e:
+                logger.error(f"Erro ao compactar notícias: {e}")
+
+            if removed:
+                self.last_update = datetime.now().isoformat()
+                logger.info(f"{len(removed)} notícia(s) descartada(s) na compactação; {len(self._items)} mantida(s)")
+            return len(removed)
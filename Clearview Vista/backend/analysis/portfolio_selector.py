@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de seleção de carteira com restrições para a Plataforma Inteligente da Clearview Capital.
+Este módulo implementa a escolha das melhores ações por pontuação respeitando
+cotas mínimas por região e setor, limites por região, setor e emissor e uma nota mínima,
+usando heaps para que o custo cresça pouco com o tamanho do universo.
+"""
+
+import heapq
+import logging
+
+logger = logging.getLogger("PortfolioSelector")
+
+def default_score(stock):
+    """Pontuação padrão de um candidato: o score da avaliação fundamentalista."""
+    return stock.get('evaluation', {}).get('score', 0)
+
+def default_issuer(stock):
+    """
+    Identifica o emissor de uma ação para aplicar o limite por nome.
+
+    Usa o campo 'issuer' quando existir; caso contrário, para tickers da B3
+    considera as quatro primeiras letras (PETR3 e PETR4 são a mesma empresa).
+    """
+    issuer = stock.get('issuer')
+    if issuer:
+        return issuer
+    symbol = stock.get('symbol', '')
+    if stock.get('region') == 'BR' and len(symbol) > 4 and symbol[4:].isdigit():
+        return symbol[:4]
+    return symbol
+
+class PortfolioSelector:
+    """
+    Seleciona as k melhores ações de um universo respeitando restrições.
+
+    Cada região mantém uma heap de mínimo limitada às `depth` melhores ações
+    (top-k em O(n log k) numa única passada). A seleção consome essas listas em
+    ordem de pontuação: primeiro para preencher as cotas mínimas por região e por
+    setor e depois, intercalando as regiões, para completar as vagas restantes.
+    Se uma cota ou a carteira ficar incompleta depois de esgotar uma lista
+    truncada, a passada é refeita com profundidade maior.
+    """
+
+    def __init__(self, size=10, min_per_region=None, max_per_region=None,
+                 min_per_sector=None, max_per_sector=None, max_per_issuer=None, min_score=None,
+                 score_fn=default_score, issuer_fn=default_issuer):
+        """
+        Inicializa o seletor de carteira.
+
+        Args:
+            size (int): Número de ações da carteira
+            min_per_region (dict): Quantidade mínima de ações por região (ex: {'BR': 7})
+            max_per_region (dict): Quantidade máxima de ações por região
+            min_per_sector (dict): Quantidade mínima de ações por setor (ex: {'Utilidades': 1})
+            max_per_sector (int): Quantidade máxima de ações de um mesmo setor
+            max_per_issuer (int): Quantidade máxima de ações de um mesmo emissor
+            min_score (float): Pontuação mínima para uma ação ser elegível
+            score_fn (callable): Função que retorna a pontuação de um candidato
+            issuer_fn (callable): Função que identifica o emissor de um candidato
+        """
+        self.size = size
+        self.min_per_region = dict(min_per_region or {})
+        self.max_per_region = dict(max_per_region or {})
+        self.min_per_sector = dict(min_per_sector or {})
+        self.max_per_sector = max_per_sector
+        self.max_per_issuer = max_per_issuer
+        self.min_score = min_score
+        self.score_fn = score_fn
+        self.issuer_fn = issuer_fn
+
+        if sum(self.min_per_region.values()) > size:
+            raise ValueError("A soma das cotas mínimas por região excede o tamanho da carteira")
+        if sum(self.min_per_sector.values()) > size:
+            raise ValueError("A soma das cotas mínimas por setor excede o tamanho da carteira")
+
+    def _top_by_region(self, candidates, depth):
+        """
+        Mantém as `depth` melhores ações de cada região numa única passada.
+
+        Args:
+            candidates (list): Ações analisadas
+            depth (int): Quantidade de ações mantidas por região
+
+        Returns:
+            tuple: (listas ordenadas da melhor para a pior por região,
+                    regiões cuja lista pode ter sido truncada)
+        """
+        score_fn = self.score_fn
+        floor = self.min_score
+        heappush = heapq.heappush
+        heapreplace = heapq.heapreplace
+        heaps = {}
+        # Menor pontuação de cada heap cheia: candidatos abaixo dela são descartados sem tocar a heap
+        cutoff = {}
+        cutoff_of = cutoff.get
+
+        for position, stock in enumerate(candidates):
+            score = score_fn(stock)
+            region = stock.get('region', 'BR')
+            # Caminho mais comum (heap cheia, candidato abaixo do corte) com uma só consulta;
+            # o corte já respeita a nota mínima, pois a heap só contém ações elegíveis
+            low = cutoff_of(region)
+            if low is not None:
+                if score > low:
+                    heap = heaps[region]
+                    # -position faz a ação mais antiga vencer empates, como numa ordenação estável
+                    heapreplace(heap, (score, -position, stock))
+                    cutoff[region] = heap[0][0]
+                continue
+            if floor is not None and score < floor:
+                continue
+            heap = heaps.setdefault(region, [])
+            heappush(heap, (score, -position, stock))
+            if len(heap) == depth:
+                cutoff[region] = heap[0][0]
+
+        ranked = {region: sorted(heap, reverse=True) for region, heap in heaps.items()}
+        # Uma heap cheia pode ter descartado candidatos
+        truncated = set(cutoff)
+        return ranked, truncated
+
+    def _admit(self, stock, counts):
+        """
+        Verifica os limites máximos e, se respeitados, contabiliza a ação.
+
+        Args:
+            stock (dict): Ação candidata
+            counts (dict): Contadores correntes por região, setor e emissor
+
+        Returns:
+            bool: True se a ação foi aceita
+        """
+        region = stock.get('region', 'BR')
+        sector = stock.get('sector')
+        issuer = self.issuer_fn(stock)
+
+        region_cap = self.max_per_region.get(region)
+        if region_cap is not None and counts['region'].get(region, 0) >= region_cap:
+            return False
+        if (self.max_per_sector is not None and sector
+                and counts['sector'].get(sector, 0) >= self.max_per_sector):
+            return False
+        if self.max_per_issuer is not None and counts['issuer'].get(issuer, 0) >= self.max_per_issuer:
+            return False
+
+        counts['region'][region] = counts['region'].get(region, 0) + 1
+        if sector:
+            counts['sector'][sector] = counts['sector'].get(sector, 0) + 1
+        counts['issuer'][issuer] = counts['issuer'].get(issuer, 0) + 1
+        return True
+
+    def _select_from(self, ranked, truncated):
+        """
+        Aplica as cotas e limites sobre as listas por região.
+
+        Args:
+            ranked (dict): Listas por região, da melhor para a pior
+            truncated (set): Regiões cuja lista pode não conter todos os candidatos
+
+        Returns:
+            list: Entradas selecionadas, ou None se uma lista truncada se esgotou
+                antes de completar uma cota ou a carteira
+        """
+        counts = {'region': {}, 'sector': {}, 'issuer': {}}
+        cursor = {region: 0 for region in ranked}
+        # Posições (únicas) das entradas já escolhidas nas passadas de cotas
+        taken = set()
+        selected = []
+
+        def take(entry):
+            if entry[1] in taken or not self._admit(entry[2], counts):
+                return False
+            taken.add(entry[1])
+            selected.append(entry)
+            return True
+
+        # Preencher primeiro as cotas mínimas de cada região
+        for region, quota in self.min_per_region.items():
+            entries = ranked.get(region, [])
+            cursor.setdefault(region, 0)
+            filled = 0
+            while filled < quota and cursor[region] < len(entries):
+                entry = entries[cursor[region]]
+                cursor[region] += 1
+                if take(entry):
+                    filled += 1
+            if filled < quota:
+                if region in truncated:
+                    return None
+                logger.warning(f"Cota mínima da região {region} não atingida: {filled} de {quota}")
+
+        # Depois as cotas mínimas de cada setor, percorrendo todas as regiões pela pontuação.
+        # Abaixo da última entrada de uma lista truncada pode haver candidatos descartados
+        floor = max((ranked[region][-1][:2] for region in truncated), default=None)
+        for sector, quota in self.min_per_sector.items():
+            filled = counts['sector'].get(sector, 0)
+            for entry in heapq.merge(*ranked.values(), reverse=True):
+                if filled >= quota:
+                    break
+                if floor is not None and entry[:2] < floor:
+                    return None
+                if entry[2].get('sector') == sector and take(entry):
+                    filled += 1
+            if filled < quota:
+                if truncated:
+                    return None
+                logger.warning(f"Cota mínima do setor {sector} não atingida: {filled} de {quota}")
+
+        # Uma lista truncada já esgotada nas passadas de cotas não entra na intercalação
+        if len(selected) < self.size and any(cursor[region] >= len(ranked[region]) for region in truncated):
+            return None
+
+        # Completar as vagas restantes intercalando as regiões pela pontuação
+        frontier = [((-entries[cursor[region]][0], -entries[cursor[region]][1]), region)
+                    for region, entries in ranked.items() if cursor[region] < len(entries)]
+        heapq.heapify(frontier)
+        while len(selected) < self.size and frontier:
+            _, region = heapq.heappop(frontier)
+            entries = ranked[region]
+            take(entries[cursor[region]])
+            cursor[region] += 1
+            if cursor[region] < len(entries):
+                heapq.heappush(frontier, ((-entries[cursor[region]][0], -entries[cursor[region]][1]), region))
+            elif region in truncated and len(selected) < self.size:
+                return None
+
+        return selected
+
+    def select(self, candidates):
+        """
+        Seleciona as ações da carteira.
+
+        Args:
+            candidates (iterable): Ações analisadas (dicts com 'symbol', 'region',
+                'evaluation' e, opcionalmente, 'sector' e 'issuer')
+
+        Returns:
+            list: Ações selecionadas, ordenadas da maior para a menor pontuação
+        """
+        candidates = list(candidates)
+        depth = max(self.size, 1)
+
+        while True:
+            ranked, truncated = self._top_by_region(candidates, depth)
+            selected = self._select_from(ranked, truncated)
+            if selected is not None:
+                break
+            # Limites descartaram candidatos demais: aprofundar as listas por região
+            depth *= 4
+
+        selected.sort(reverse=True)
+        return [entry[2] for entry in selected]
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de cache de relatórios para a Plataforma Inteligente da Clearview Capital.
+Este módulo guarda os relatórios de ações indexados por um hash do conteúdo que
+os originou (cotação, fundamentals, valor de Graham e avaliação), de modo que um
+relatório só seja gerado de novo quando esses dados mudam.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from collections import OrderedDict
+
+logger = logging.getLogger("ReportCache")
+
+# Campos da ação que determinam o texto do relatório
+REPORT_FIELDS = ('symbol', 'name', 'price', 'change_1d', 'fundamentals', 'graham_value', 'evaluation')
+
+def content_hash(stock, kind="template"):
+    """
+    Calcula o hash do conteúdo de um relatório.
+
+    Args:
+        stock (dict): Dados da ação (somente REPORT_FIELDS são considerados)
+        kind (str): Tipo de relatório (ex: 'template'), para que gerações diferentes não colidam
+
+    Returns:
+        str: Hash hexadecimal (sha1)
+    """
+    inputs = {field: stock.get(field) for field in REPORT_FIELDS}
+    raw = json.dumps([kind, inputs], sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+class ReportCache:
+    """
+    Relatórios gerados, indexados pelo hash do conteúdo.
+
+    Cada ação mantém apenas o relatório dos seus dados mais recentes: ao guardar
+    um relatório de conteúdo novo, o anterior da mesma ação (e tipo) é descartado.
+    O total de entradas é limitado em LRU e o cache é persistido em arquivo.
+    """
+
+    def __init__(self, data_dir="/home/ubuntu/clearview_project/data", max_entries=4096):
+        """
+        Inicializa o cache de relatórios.
+
+        Args:
+            data_dir (str): Diretório para armazenamento de dados
+            max_entries (int): Número máximo de relatórios mantidos
+        """
+        self.cache_file = os.path.join(data_dir, "report_cache.json")
+        self.max_entries = max_entries
+        self._reports = OrderedDict()
+        self._latest = {}
+        self._lock = threading.Lock()
+        # Salvamentos em série: o instantâneo mais recente é sempre o último gravado
+        self._save_lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.load()
+
+    def load(self):
+        """Carrega os relatórios salvos, se existirem."""
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    stored = json.load(f)
+                for key, entry in stored.items():
+                    self._reports[key] = entry
+                    self._latest[(entry['symbol'], entry['kind'])] = key
+                logger.info(f"{len(self._reports)} relatórios carregados de {self.cache_file}")
+        except Exception as e:
+            logger.error(f"Erro ao carregar cache de relatórios: {e}")
+
+    def save(self):
+        """Salva os relatórios em arquivo JSON (arquivo temporário + os.replace, um salvamento por vez)."""
+        with self._save_lock:
+            try:
+                with self._lock:
+                    snapshot = dict(self._reports)
+                temp_file = self.cache_file + '.tmp'
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    json.dump(snapshot, f, ensure_ascii=False)
+                os.replace(temp_file, self.cache_file)
+            except Exception as e:
+                logger.error(f"Erro ao salvar cache de relatórios: {e}")
+
+    def get(self, key):
+        """
+        Retorna o relatório de um hash de conteúdo.
+
+        Args:
+            key (str): Hash calculado por content_hash
+
+        Returns:
+            dict: Entrada com 'report', 'symbol', 'kind' e 'generated_at', ou None
+        """
+        with self._lock:
+            entry = self._reports.get(key)
+            if entry is not None:
+                self._reports.move_to_end(key)
+            return entry
+
+    def _put(self, key, symbol, kind, report):
+        """Guarda um relatório, substituindo o anterior da mesma ação e tipo."""
+        entry = {
+            'symbol': symbol,
+            'kind': kind,
+            'report': report,
+            'generated_at': datetime.now().isoformat()
+        }
+        with self._lock:
+            previous = self._latest.get((symbol, kind))
+            if previous is not None and previous != key:
+                self._reports.pop(previous, None)
+            self._reports[key] = entry
+            self._reports.move_to_end(key)
+            self._latest[(symbol, kind)] = key
+            while len(self._reports) > self.max_entries:
+                _, evicted = self._reports.popitem(last=False)
+                if self._latest.get((evicted['symbol'], evicted['kind'])) not in self._reports:
+                    self._latest.pop((evicted['symbol'], evicted['kind']), None)
+        return entry
+
+    def put(self, stock, report, kind="template"):
+        """
+        Guarda um relatório gerado fora do cache (ex: por streaming) e persiste o cache.
+
+        Args:
+            stock (dict): Dados da ação que originaram o relatório
+            report (str): Texto do relatório
+            kind (str): Tipo de relatório
+
+        Returns:
+            str: Hash de conteúdo do relatório
+        """
+        key = content_hash(stock, kind)
+        self._put(key, stock.get('symbol', ''), kind, report)
+        self.save()
+        return key
+
+    def render(self, stock, generate, kind="template"):
+        """
+        Retorna o relatório de uma ação, gerando-o só se o conteúdo mudou.
+
+        Args:
+            stock (dict): Dados da ação
+            generate (callable): Função que gera o texto a partir de `stock`
+            kind (str): Tipo de relatório
+
+        Returns:
+            tuple: (texto do relatório, hash de conteúdo, True se veio do cache)
+        """
+        key = content_hash(stock, kind)
+        entry = self.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry['report'], key, True
+
+        self.misses += 1
+        entry = self._put(key, stock.get('symbol', ''), kind, generate(stock))
+        self.save()
+        return entry['report'], key, False
+
+    def prerender(self, stocks, generate, kind="template"):
+        """
+        Gera de uma vez os relatórios de várias ações (somente os de conteúdo novo).
+
+        Args:
+            stocks (list): Dados das ações
+            generate (callable): Função que gera o texto a partir de cada ação
+            kind (str): Tipo de relatório
+
+        Returns:
+            int: Número de relatórios gerados
+        """
+        generated = 0
+        for stock in stocks:
+            key = content_hash(stock, kind)
+            if self.get(key) is None:
+                self._put(key, stock.get('symbol', ''), kind, generate(stock))
+                generated += 1
+        if generated:
+            self.save()
+        logger.info(f"{generated} relatório(s) pré-gerado(s) de {len(stocks)} ações")
+        return generated
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de métricas de risco para a Plataforma Inteligente da Clearview Capital.
+Este módulo calcula, para todas as ações de uma só vez, a volatilidade móvel,
+o drawdown máximo, o beta contra o índice de referência (Ibovespa ou S&P 500)
+e o desvio negativo (downside deviation), atualizando os acumuladores a cada
+nova barra do histórico em vez de recalcular tudo.
+"""
+
+import logging
+import threading
+
+import numpy as np
+
+from analysis.history_store import daily_returns, incremental_start
+
+logger = logging.getLogger("RiskMetrics")
+
+TRADING_DAYS = 252
+
+# Índices de referência para o beta, por região
+DEFAULT_BENCHMARKS = {'BR': '^BVSP', 'US': '^GSPC'}
+
+class RiskMetrics:
+    """
+    Métricas de risco mantidas de forma vetorizada e incremental.
+
+    Os acumuladores são vetores com uma posição por ação: pico e drawdown
+    máximo dos preços, somas para beta (Σr, Σb, Σr·b, Σb²) e para o desvio
+    negativo (Σmin(r, 0)²), além de uma janela circular com os últimos
+    `window` retornos para a volatilidade móvel. A reconstrução percorre o
+    histórico inteiro numa única passada matricial; cada barra nova custa O(n).
+    """
+
+    def __init__(self, history, window=21, benchmarks=None):
+        """
+        Inicializa o serviço de métricas de risco.
+
+        Args:
+            history (HistoryStore): Histórico de preços
+            window (int): Janela (em pregões) da volatilidade móvel
+            benchmarks (dict): Índice de referência por região
+        """
+        self.history = history
+        self.window = window
+        self.benchmarks = dict(benchmarks or DEFAULT_BENCHMARKS)
+
+        self.regions = {}
+        self.symbols = []
+        self._index = {}
+        self._bench_cols = np.zeros(0, dtype=int)
+        self._history_version = None
+        self.last_date = None
+
+        self.version = 0
+        self._cache = None
+        self._cache_version = -1
+
+        self._lock = threading.RLock()
+        self._allocate(0)
+
+    def _allocate(self, n):
+        """Zera os acumuladores para n colunas (ações e índices)."""
+        self._last_prices = np.full(n, np.nan)
+        self._peak = np.full(n, np.nan)
+        self._max_drawdown = np.zeros(n)
+        self._window_returns = np.full((self.window, n), np.nan)
+        self._window_pos = 0
+        self._count = np.zeros(n)
+        self._downside_sq = np.zeros(n)
+        self._beta_n = np.zeros(n)
+        self._beta_sx = np.zeros(n)
+        self._beta_sb = np.zeros(n)
+        self._beta_sxb = np.zeros(n)
+        self._beta_sbb = np.zeros(n)
+
+    def _accumulate(self, returns, prices):
+        """
+        Incorpora um bloco de barras (linhas) aos acumuladores.
+
+        Args:
+            returns (np.ndarray): Retornos (linhas x colunas), NaN onde ausentes
+            prices (np.ndarray): Preços propagados correspondentes às mesmas linhas
+        """
+        if not len(returns):
+            return
+
+        valid = np.isfinite(returns)
+        r = np.where(valid, returns, 0.0)
+
+        # Drawdown: pico corrente de preços e pior queda em relação a ele
+        peaks = np.fmax.accumulate(np.vstack([self._peak, prices]), axis=0)[1:]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            drawdowns = prices / peaks - 1
+        self._peak = peaks[-1]
+        drawdowns = np.where(np.isfinite(drawdowns), drawdowns, 0.0)
+        self._max_drawdown = np.minimum(self._max_drawdown, drawdowns.min(axis=0))
+
+        # Desvio negativo
+        self._count += valid.sum(axis=0)
+        self._downside_sq += (np.minimum(r, 0.0) ** 2).sum(axis=0)
+
+        # Beta: apenas dias em que a ação e seu índice têm retorno
+        b = returns[:, self._bench_cols]
+        both = valid & np.isfinite(b)
+        x = np.where(both, returns, 0.0)
+        b = np.where(both, b, 0.0)
+        self._beta_n += both.sum(axis=0)
+        self._beta_sx += x.sum(axis=0)
+        self._beta_sb += b.sum(axis=0)
+        self._beta_sxb += (x * b).sum(axis=0)
+        self._beta_sbb += (b * b).sum(axis=0)
+
+        # Janela circular dos últimos retornos
+        for row in returns[-self.window:]:
+            self._window_returns[self._window_pos] = row
+            self._window_pos = (self._window_pos + 1) % self.window
+
+        self.version += 1
+
+    def rebuild(self, regions):
+        """
+        Recalcula todos os acumuladores a partir do histórico completo.
+
+        Args:
+            regions (dict): Região ('BR' ou 'US') de cada ação monitorada
+        """
+        with self._lock:
+            self.regions = {symbol.upper(): region for symbol, region in regions.items()}
+            stocks = list(self.regions)
+            indices = [s for s in dict.fromkeys(self.benchmarks.values()) if s not in self.regions]
+            self.symbols = stocks + indices
+            self._index = {symbol: i for i, symbol in enumerate(self.symbols)}
+            # Cada coluna aponta para a coluna do seu índice (índices apontam para si mesmos)
+            self._bench_cols = np.array([
+                self._index.get(self.benchmarks.get(self.regions.get(symbol)), i)
+                for i, symbol in enumerate(self.symbols)
+            ], dtype=int)
+            self._history_version = self.history.version
+
+            dates, prices = self.history.price_matrix(self.symbols)
+            self._allocate(len(self.symbols))
+            if len(dates):
+                returns, filled = daily_returns(prices)
+                self._peak = filled[0].copy()
+                self._accumulate(returns, filled[1:])
+                self._last_prices = filled[-1]
+                self.last_date = str(dates[-1])
+            else:
+                self.last_date = None
+            self.version += 1
+            logger.info(f"Métricas de risco reconstruídas: {len(stocks)} ações, {len(dates)} pregões")
+
+    def update(self, closes):
+        """
+        Incorpora uma nova barra diária em O(n).
+
+        Args:
+            closes (np.ndarray): Fechamentos do dia na ordem de `symbols` (NaN se ausente)
+        """
+        with self._lock:
+            closes = np.asarray(closes, dtype=float)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                returns = closes / self._last_prices - 1
+            returns[~np.isfinite(returns)] = np.nan
+            self._last_prices = np.where(np.isnan(closes), self._last_prices, closes)
+            self._accumulate(returns[None, :], self._last_prices[None, :])
+
+    def sync(self, regions=None):
+        """
+        Incorpora as barras novas do histórico desde a última sincronização.
+
+        Args:
+            regions (dict): Universo desejado (ação -> região); se diferente do atual, reconstrói
+        """
+        with self._lock:
+            if regions is not None and {s.upper(): r for s, r in regions.items()} != self.regions:
+                self.rebuild(regions)
+                return
+            if self._history_version == self.history.version:
+                return
+            # Barras novas ou revisadas até a última data incorporada exigem reconstrução
+            start, version = incremental_start(self.history, self._history_version, self.last_date, self.symbols)
+            if start is None:
+                self.rebuild(self.regions)
+                return
+
+            self._history_version = version
+            dates, prices = self.history.price_matrix(self.symbols, start=start)
+            for row in prices:
+                self.update(row)
+            if len(dates):
+                self.last_date = str(dates[-1])
+
+    def __contains__(self, symbol):
+        """Indica se a ação faz parte do universo indexado (monitoradas e índices)."""
+        return symbol.upper() in self._index
+
+    def _metrics(self):
+        """Deriva (e mantém em cache) as métricas de todas as colunas."""
+        if self._cache_version == self.version:
+            return self._cache
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            window_valid = np.isfinite(self._window_returns)
+            window_count = window_valid.sum(axis=0)
+            window_returns = np.where(window_valid, self._window_returns, 0.0)
+            mean = window_returns.sum(axis=0) / window_count
+            deviations = np.where(window_valid, window_returns - mean, 0.0)
+            volatility = np.sqrt((deviations ** 2).sum(axis=0) / (window_count - 1)) * np.sqrt(TRADING_DAYS)
+            volatility[window_count < 2] = np.nan
+            downside = np.sqrt(self._downside_sq / self._count) * np.sqrt(TRADING_DAYS)
+            n = self._beta_n
+            beta = (n * self._beta_sxb - self._beta_sx * self._beta_sb) / (n * self._beta_sbb - self._beta_sb ** 2)
+            beta[n < 2] = np.nan
+
+        self._cache = {
+            'volatility': volatility,
+            'downside_deviation': downside,
+            'beta': beta,
+            'max_drawdown': self._max_drawdown.copy(),
+            'observations': self._count.copy()
+        }
+        self._cache_version = self.version
+        return self._cache
+
+    @staticmethod
+    def _pct(value):
+        """Converte uma fração em porcentagem arredondada (None se indefinida)."""
+        return round(float(value) * 100, 2) if np.isfinite(value) else None
+
+    def metrics_for(self, symbol):
+        """
+        Retorna as métricas de risco de uma ação.
+
+        Args:
+            symbol (str): Código da ação
+
+        Returns:
+            dict: Volatilidade, drawdown máximo, beta e desvio negativo, ou None sem histórico
+        """
+        with self._lock:
+            i = self._index.get(symbol.upper())
+            metrics = self._metrics()
+            if i is None or not metrics['observations'][i]:
+                return None
+
+            beta = metrics['beta'][i]
+            return {
+                'volatility': self._pct(metrics['volatility'][i]),
+                'volatility_window': self.window,
+                'max_drawdown': self._pct(metrics['max_drawdown'][i]),
+                'beta': round(float(beta), 3) if np.isfinite(beta) else None,
+                'benchmark': self.symbols[self._bench_cols[i]],
+                'downside_deviation': self._pct(metrics['downside_deviation'][i]),
+                'observations': int(metrics['observations'][i]),
+                'as_of': self.last_date
+            }
+
+    def portfolio_metrics(self, symbols, weights=None):
+        """
+        Agrega as métricas de risco de uma carteira.
+
+        Args:
+            symbols (list): Ações da carteira
+            weights (list): Pesos de cada ação (padrão: pesos iguais)
+
+        Returns:
+            dict: Volatilidade da carteira na janela, médias ponderadas e pior drawdown
+        """
+        with self._lock:
+            members = [(self._index[s.upper()], i) for i, s in enumerate(symbols) if s.upper() in self._index]
+            if not members:
+                return None
+
+            cols = np.array([col for col, _ in members], dtype=int)
+            if weights is None:
+                w = np.full(len(cols), 1.0 / len(cols))
+            else:
+                w = np.array([weights[i] for _, i in members], dtype=float)
+                w = w / w.sum()
+
+            metrics = self._metrics()
+
+            # Volatilidade da carteira a partir dos retornos combinados na janela (considera correlações)
+            window = self._window_returns[:, cols]
+            valid = np.isfinite(window)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                combined = (np.where(valid, window, 0.0) @ w) / (valid @ w)
+            combined = combined[np.isfinite(combined)]
+            volatility = combined.std(ddof=1) * np.sqrt(TRADING_DAYS) if len(combined) > 1 else np.nan
+
+            def weighted(values):
+                values = values[cols]
+                mask = np.isfinite(values)
+                return (values[mask] @ w[mask]) / w[mask].sum() if mask.any() else np.nan
+
+            beta = weighted(metrics['beta'])
+            return {
+                'volatility': self._pct(volatility),
+                'volatility_window': self.window,
+                'average_volatility': self._pct(weighted(metrics['volatility'])),
+                'beta': round(float(beta), 3) if np.isfinite(beta) else None,
+                'downside_deviation': self._pct(weighted(metrics['downside_deviation'])),
+                'average_max_drawdown': self._pct(weighted(metrics['max_drawdown'])),
+                'worst_max_drawdown': self._pct(np.nanmin(metrics['max_drawdown'][cols])),
+                'members': len(cols),
+                'as_of': self.last_date
+            }
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de triagem em lote para a Plataforma Inteligente da Clearview Capital.
+Este módulo avalia o universo de ações (valor de Graham e pontuação, pelas regras
+vetorizadas de valuation.py) em lotes, distribuindo-os entre processos quando o
+universo é grande o suficiente para que o trabalho de CPU supere o custo de
+enviar os dados aos processos.
+"""
+
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from analysis.valuation import pack_batch, evaluate_batch, decode_results
+
+logger = logging.getLogger("Screener")
+
+def evaluate_chunk(prices, matrix):
+    """
+    Avalia uma fatia do universo e já a converte nos dicts de resultado.
+
+    Executado nos processos de triagem, para que a montagem dos dicts (a parte
+    mais cara da avaliação) também seja dividida entre os núcleos.
+
+    Args:
+        prices (np.ndarray): Preço de referência de cada ação (NaN se sem cotação)
+        matrix (np.ndarray): Fundamentals no layout de FUNDAMENTAL_FIELDS
+
+    Returns:
+        list: (valor de Graham, avaliação) de cada ação da fatia
+    """
+    return decode_results(*evaluate_batch(prices, matrix))
+
+def pool_context():
+    """
+    Contexto de multiprocessing do pool: forkserver (ou spawn, onde não existe).
+
+    O processo principal já tem threads (tarefas, panorama do mercado, executor
+    de LLM); um fork copiaria travas possivelmente adquiridas por elas. O
+    forkserver pré-carrega este módulo (e o NumPy) uma única vez.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(['__main__', __name__])
+        return context
+    return multiprocessing.get_context('spawn')
+
+class Screener:
+    """
+    Avaliação do universo de ações em série ou em um pool de processos.
+
+    Abaixo de `min_parallel` ações a avaliação roda no próprio processo. Acima,
+    o universo é dividido em fatias contíguas, cada uma enviada como um vetor de
+    preços e uma matriz de fundamentals (em vez de uma lista de dicts); cada
+    processo avalia e decodifica sua fatia, e as listas são concatenadas na
+    ordem original.
+    """
+
+    def __init__(self, workers=None, min_parallel=None, chunks_per_worker=4):
+        """
+        Inicializa o serviço de triagem.
+
+        Args:
+            workers (int): Número de processos (padrão: CLEARVIEW_SCREENING_WORKERS ou nº de CPUs; 0 ou 1 = em série)
+            min_parallel (int): Tamanho mínimo do universo para usar o pool (padrão: CLEARVIEW_SCREENING_MIN_PARALLEL ou 2000)
+            chunks_per_worker (int): Fatias por processo (equilibra a carga entre núcleos)
+        """
+        if workers is None:
+            workers = int(os.environ.get("CLEARVIEW_SCREENING_WORKERS", os.cpu_count() or 1))
+        self.workers = max(int(workers), 0)
+        if min_parallel is None:
+            min_parallel = int(os.environ.get("CLEARVIEW_SCREENING_MIN_PARALLEL", 2000))
+        self.min_parallel = min_parallel
+        self.chunks_per_worker = chunks_per_worker
+
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        """Cria (uma única vez) o pool de processos."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=max(self.workers, 1), mp_context=pool_context())
+                logger.info(f"Pool de triagem iniciado com {self.workers} processos")
+            return self._executor
+
+    def shutdown(self):
+        """Encerra o pool de processos, se existir."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    def evaluate(self, prices, fundamentals, parallel=None):
+        """
+        Calcula o valor de Graham e a avaliação de cada ação.
+
+        Args:
+            prices (list): Preço de referência de cada ação (None se sem cotação)
+            fundamentals (list): Indicadores fundamentalistas de cada ação
+            parallel (bool): Força (True) ou impede (False) o uso do pool; padrão: automático
+
+        Returns:
+            list: (valor de Graham, avaliação) de cada ação, na ordem de entrada
+        """
+        prices, matrix = pack_batch(prices, fundamentals)
+        n = len(prices)
+
+        if parallel is None:
+            parallel = self.workers > 1 and n >= self.min_parallel
+        if not parallel or n == 0:
+            return evaluate_chunk(prices, matrix)
+
+        chunks = min(n, max(self.workers, 1) * self.chunks_per_worker)
+        bounds = np.linspace(0, n, chunks + 1).astype(int)
+        executor = self._pool()
+        futures = [
+            executor.submit(evaluate_chunk, prices[start:end], matrix[start:end])
+            for start, end in zip(bounds[:-1], bounds[1:]) if end > start
+        ]
+
+        # Reunir as fatias (já decodificadas) na ordem original
+        results = []
+        for future in futures:
+            results.extend(future.result())
+        return results
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de busca de ações para a Plataforma Inteligente da Clearview Capital.
+Este módulo mantém um índice de busca construído uma única vez a cada mudança
+dos dados: uma trie de prefixos dos códigos e um índice de n-gramas dos nomes
+sem acentos, com resultados ordenados por relevância.
+"""
+
+import logging
+import threading
+import unicodedata
+
+logger = logging.getLogger("SearchIndex")
+
+def fold(text):
+    """
+    Normaliza um texto para busca: maiúsculas e sem acentos.
+
+    Args:
+        text (str): Texto original
+
+    Returns:
+        str: Texto normalizado (ex: 'Itaú Unibanco' -> 'ITAU UNIBANCO')
+    """
+    decomposed = unicodedata.normalize('NFD', text or '')
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).upper()
+
+# Profundidade máxima das tries (consultas maiores são confirmadas no texto)
+MAX_TRIE_DEPTH = 24
+
+class SearchIndex:
+    """
+    Índice de busca por código e nome.
+
+    Códigos, nomes e cada palavra dos nomes (normalizados por `fold`) ficam em
+    tries cujos nós guardam, já na ordem final, os documentos com aquele prefixo;
+    assim as faixas mais relevantes são lidas direto do nó e a busca para assim
+    que `limit` resultados são encontrados. Para substrings no meio do texto, os
+    nomes são indexados por n-gramas de 1 a `ngram` caracteres: consultas curtas
+    usam a lista do próprio n-grama e as longas intersectam as listas dos seus
+    n-gramas, confirmando a substring só nos candidatos restantes.
+    """
+
+    def __init__(self, ngram=3):
+        """
+        Inicializa o índice vazio.
+
+        Args:
+            ngram (int): Tamanho máximo dos n-gramas indexados
+        """
+        self.ngram = ngram
+        self.version = None
+        self._entries = []
+        self._names = []
+        self._symbols = {}
+        self._symbol_trie = {}
+        self._name_trie = {}
+        self._word_trie = {}
+        self._grams = {}
+        self._order = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _insert(trie, key, doc_id):
+        """Adiciona um documento aos nós da trie ao longo de `key`."""
+        node = trie
+        for char in key[:MAX_TRIE_DEPTH]:
+            node = node.setdefault(char, {'': []})
+            if not node[''] or node[''][-1] != doc_id:
+                node[''].append(doc_id)
+
+    @staticmethod
+    def _finalize(trie, order):
+        """Ordena as listas de documentos de todos os nós pela ordem de exibição."""
+        stack = [trie]
+        while stack:
+            node = stack.pop()
+            for char, child in node.items():
+                if char:
+                    child[''].sort(key=order.__getitem__)
+                    stack.append(child)
+
+    @staticmethod
+    def _lookup(trie, query):
+        """Documentos do nó correspondente ao prefixo `query` (truncado na profundidade máxima)."""
+        node = trie
+        for char in query[:MAX_TRIE_DEPTH]:
+            node = node.get(char)
+            if node is None:
+                return []
+        return node['']
+
+    def build(self, entries, version=None):
+        """
+        Reconstrói o índice.
+
+        Args:
+            entries (list): Documentos com 'symbol', 'name' e 'long_name' (demais campos são devolvidos na busca)
+            version: Versão dos dados de origem
+        """
+        entries = list(entries)
+        symbols = {}
+        symbol_trie, name_trie, word_trie = {}, {}, {}
+        grams = {}
+        names = []
+        for doc_id, entry in enumerate(entries):
+            symbol = entry['symbol'].upper()
+            symbols.setdefault(symbol, doc_id)
+            self._insert(symbol_trie, symbol, doc_id)
+
+            folded = (fold(entry.get('name')), fold(entry.get('long_name')))
+            names.append(folded)
+            self._insert(name_trie, folded[0], doc_id)
+            for word in folded[0].split():
+                self._insert(word_trie, word, doc_id)
+            for text in folded:
+                for size in range(1, self.ngram + 1):
+                    for start in range(len(text) - size + 1):
+                        grams.setdefault(text[start:start + size], set()).add(doc_id)
+
+        # Dentro de cada faixa de relevância: códigos mais curtos primeiro, depois ordem alfabética
+        ranked = sorted(range(len(entries)), key=lambda d: (len(entries[d]['symbol']), entries[d]['symbol']))
+        order = {doc_id: position for position, doc_id in enumerate(ranked)}
+        for trie in (symbol_trie, name_trie, word_trie):
+            self._finalize(trie, order)
+
+        with self._lock:
+            self._entries = entries
+            self._names = names
+            self._order = order
+            self._symbols = symbols
+            self._symbol_trie = symbol_trie
+            self._name_trie = name_trie
+            self._word_trie = word_trie
+            self._grams = grams
+            self.version = version
+        logger.info(f"Índice de busca reconstruído com {len(entries)} ações")
+
+    def _substring(self, query):
+        """Documentos cujo nome ou nome completo contém a consulta."""
+        if len(query) <= self.ngram:
+            return self._grams.get(query, set())
+
+        grams = sorted(
+            (self._grams.get(query[i:i + self.ngram], set()) for i in range(len(query) - self.ngram + 1)),
+            key=len
+        )
+        candidates = set(grams[0])
+        for postings in grams[1:]:
+            candidates &= postings
+            if not candidates:
+                break
+        return candidates
+
+    def _tiers(self, query):
+        """Gera os documentos candidatos faixa a faixa, da mais para a menos relevante."""
+        names = self._names
+
+        # 1. Código exato e 2. prefixo do código
+        exact = self._symbols.get(query)
+        if exact is not None:
+            yield exact
+        yield from self._lookup(self._symbol_trie, query)
+
+        # 3. Nome começando pela consulta
+        for doc_id in self._lookup(self._name_trie, query):
+            if names[doc_id][0].startswith(query):
+                yield doc_id
+
+        # 4. Início de uma palavra do nome
+        first_word = query.split()[0]
+        for doc_id in self._lookup(self._word_trie, first_word):
+            if (' ' + names[doc_id][0]).find(' ' + query) >= 0:
+                yield doc_id
+
+        # 5. Substring no nome e 6. apenas no nome completo (n-gramas, confirmados no texto)
+        candidates = sorted(self._substring(query), key=self._order.__getitem__)
+        for doc_id in candidates:
+            if query in names[doc_id][0]:
+                yield doc_id
+        for doc_id in candidates:
+            if query in names[doc_id][1]:
+                yield doc_id
+
+    def search(self, query, limit=10):
+        """
+        Busca ações por código ou nome.
+
+        Ordem dos resultados: código exato, prefixo do código, nome começando
+        pela consulta, início de palavra no nome, substring no nome e, por fim,
+        substring apenas no nome completo.
+
+        Args:
+            query (str): Texto buscado
+            limit (int): Número máximo de resultados
+
+        Returns:
+            list: Documentos encontrados, do mais ao menos relevante
+        """
+        query = ' '.join(fold(query).split())
+        if not query or limit <= 0:
+            return []
+
+        with self._lock:
+            results = []
+            seen = set()
+            for doc_id in self._tiers(query):
+                if doc_id in seen:
+                    continue
+                seen.add(doc_id)
+                results.append(self._entries[doc_id])
+                if len(results) >= limit:
+                    break
+            return results
@@ -14,8 +14,23 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import time
+import asyncio
 import requests
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Adicionar diretório pai ao path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from analysis.portfolio_selector import PortfolioSelector
+from analysis.valuation import compute_graham_value, evaluate_fundamentals
+from analysis.history_store import HistoryStore
+from analysis.screening import Screener
+from analysis.stock_views import StockViewStore, build_view
+from analysis.event_stream import EventBroker, quote_deltas
+from analysis.report_cache import ReportCache
+from analysis.market_data import CHART_URL, parse_chart, fetch_chart, afetch_chart
+from analysis.instrumentation import metrics
 
 # Configuração de logging
 logging.basicConfig(
@@ -66,6 +81,13 @@ class StockAnalyzer:
         # Dicionário para armazenar dados de ações
         self.stocks_data = {}
         
+        # Protege stocks_data e sua gravação: a reconstrução da carteira (thread de
+        # tarefas) e as requisições (ações buscadas sob demanda) alteram os dados ao mesmo tempo
+        self._data_lock = threading.RLock()
+        
+        # Incrementado a cada carga/gravação de stocks_data (ex: para reconstruir o índice de busca)
+        self.data_version = 0
+        
         # Lista de ações brasileiras para monitorar
         self.br_stocks = [
             "PETR4", "VALE3", "ITUB4", "BBDC4", "ABEV3", 
@@ -78,6 +100,49 @@ class StockAnalyzer:
             "TSLA", "NVDA", "BRK-B", "JPM", "JNJ"
         ]
         
+        # Setor de cada ação monitorada (classificação setorial do Yahoo Finance), usado
+        # quando os insights não informam o setor
+        self.sectors = {
+            "PETR4": "Energy", "VALE3": "Basic Materials", "ITUB4": "Financial Services",
+            "BBDC4": "Financial Services", "ABEV3": "Consumer Defensive", "WEGE3": "Industrials",
+            "RENT3": "Industrials", "BBAS3": "Financial Services", "EGIE3": "Utilities",
+            "TAEE11": "Utilities", "AAPL": "Technology", "MSFT": "Technology",
+            "AMZN": "Consumer Cyclical", "GOOGL": "Communication Services",
+            "META": "Communication Services", "TSLA": "Consumer Cyclical", "NVDA": "Technology",
+            "BRK-B": "Financial Services", "JPM": "Financial Services", "JNJ": "Healthcare"
+        }
+        
+        # Índices de referência de cada região (beta e métricas de risco)
+        self.benchmark_indices = {'BR': '^BVSP', 'US': '^GSPC'}
+        
+        # Histórico diário de preços e fundamentals (usado em backtests e métricas de risco)
+        self.history = HistoryStore(data_dir=data_dir)
+        
+        # Seletor da carteira: 10 ações, com pelo menos 7 brasileiras (a regra de sempre)
+        self.portfolio_selector = PortfolioSelector(size=10, min_per_region={'BR': 7})
+        
+        # Avaliação do universo (em série ou em um pool de processos para universos grandes)
+        self.screener = Screener()
+        
+        # Registros prontos para servir por ação, publicados a cada atualização da carteira
+        self.views = StockViewStore(data_dir=data_dir)
+        
+        # Visões de ações fora das listas monitoradas (buscadas sob demanda): validade
+        # em segundos e quantidade máxima mantida
+        self.adhoc_view_ttl = float(os.environ.get('CLEARVIEW_ADHOC_VIEW_TTL', 3600))
+        self.max_adhoc_views = int(os.environ.get('CLEARVIEW_MAX_ADHOC_VIEWS', 500))
+        
+        # Relatórios gerados, indexados pelo hash dos dados que os originaram
+        self.reports = ReportCache(data_dir=data_dir)
+        
+        # Variações de cotação e rating enviadas aos clientes conectados (/api/stream)
+        self.quote_stream = EventBroker()
+        self.views.add_listener(self.publish_quote_deltas)
+        
+        # Carteira salva, mantida em memória enquanto o arquivo não muda
+        self._portfolio = None
+        self._portfolio_mtime = None
+        
         # Carregar dados salvos, se existirem
         self.load_data()
     
@@ -87,20 +152,80 @@ class StockAnalyzer:
             stocks_file = os.path.join(self.data_dir, "stocks_data.json")
             if os.path.exists(stocks_file):
                 with open(stocks_file, 'r', encoding='utf-8') as f:
-                    self.stocks_data = json.load(f)
+                    stocks_data = json.load(f)
+                with self._data_lock:
+                    self.stocks_data = stocks_data
+                    self.data_version += 1
                 logger.info(f"Dados carregados de {stocks_file}")
         except Exception as e:
             logger.error(f"Erro ao carregar dados: {e}")
     
     def save_data(self):
-        """Salva dados de ações em arquivo JSON."""
+        """Salva dados de ações em arquivo JSON (uma gravação por vez, sem alterações concorrentes)."""
+        with self._data_lock:
+            self.data_version += 1
+            try:
+                stocks_file = os.path.join(self.data_dir, "stocks_data.json")
+                with open(stocks_file, 'w', encoding='utf-8') as f:
+                    json.dump(self.stocks_data, f, ensure_ascii=False, indent=2)
+                logger.info(f"Dados salvos em {stocks_file}")
+            except Exception as e:
+                logger.error(f"Erro ao salvar dados: {e}")
+    
+    def load_portfolio(self):
+        """
+        Retorna a carteira salva, relendo o arquivo apenas quando ele muda.
+        
+        Returns:
+            dict: Carteira salva, ou None se ainda não existir
+        """
+        portfolio_file = os.path.join(self.data_dir, "portfolio.json")
         try:
-            stocks_file = os.path.join(self.data_dir, "stocks_data.json")
-            with open(stocks_file, 'w', encoding='utf-8') as f:
-                json.dump(self.stocks_data, f, ensure_ascii=False, indent=2)
-            logger.info(f"Dados salvos em {stocks_file}")
-        except Exception as e:
-            logger.error(f"Erro ao salvar dados: {e}")
+            mtime = os.path.getmtime(portfolio_file)
+        except OSError:
+            return None
+        
+        if self._portfolio is None or mtime != self._portfolio_mtime:
+            try:
+                with open(portfolio_file, 'r', encoding='utf-8') as f:
+                    self._portfolio = json.load(f)
+                self._portfolio_mtime = mtime
+            except Exception as e:
+                logger.error(f"Erro ao carregar carteira: {e}")
+                return self._portfolio
+        
+        return self._portfolio
+    
+    def get_regions(self):
+        """
+        Retorna a região de cada ação monitorada.
+        
+        Returns:
+            dict: Código da ação -> região (BR ou US)
+        """
+        regions = {symbol: "BR" for symbol in self.br_stocks}
+        regions.update({symbol: "US" for symbol in self.us_stocks})
+        return regions
+    
+    def sector_of(self, symbol):
+        """
+        Retorna o setor de uma ação.
+        
+        Args:
+            symbol (str): Código da ação
+            
+        Returns:
+            str: Setor informado pelos insights ou, na falta dele, o da lista de monitoradas (None se desconhecido)
+        """
+        return self.stocks_data.get(symbol, {}).get('sector') or self.sectors.get(symbol)
+    
+    def refresh_benchmarks(self):
+        """Atualiza o histórico dos índices de referência (Ibovespa e S&P 500)."""
+        today = datetime.now().strftime('%Y-%m-%d')
+        for region, symbol in self.benchmark_indices.items():
+            if self.history.last_date(symbol) != today:
+                # A busca registra os fechamentos do índice no histórico
+                self.fetch_stock_data(symbol, region)
     
     def fetch_stock_data(self, symbol, region="BR"):
         """
@@ -124,86 +249,28 @@ class StockAnalyzer:
         try:
             if self.api_client:
                 # Usar API interna se disponível
-                chart_data = self.api_client.call_api(
-                    'YahooFinance/get_stock_chart', 
-                    query={
-                        'symbol': symbol,
-                        'region': api_region,
-                        'interval': '1d',
-                        'range': '1y'
-                    }
-                )
-                
-                if chart_data and 'chart' in chart_data and 'result' in chart_data['chart']:
-                    result = chart_data['chart']['result'][0]
-                    
-                    # Extrair metadados
-                    meta = result['meta']
-                    stock_data['symbol'] = symbol
-                    stock_data['currency'] = meta.get('currency')
-                    stock_data['exchange'] = meta.get('exchangeName')
-                    stock_data['name'] = meta.get('shortName', '')
-                    stock_data['long_name'] = meta.get('longName', '')
-                    
-                    # Extrair preços
-                    quotes = result['indicators']['quote'][0]
-                    timestamps = result['timestamp']
-                    
-                    # Obter último preço disponível
-                    last_valid_idx = -1
-                    for i in range(len(quotes['close'])-1, -1, -1):
-                        if quotes['close'][i] is not None:
-                            last_valid_idx = i
-                            break
-                    
-                    if last_valid_idx >= 0:
-                        stock_data['price'] = quotes['close'][last_valid_idx]
-                        stock_data['last_update'] = timestamps[last_valid_idx]
-                        
-                        # Calcular variação em 1 dia
-                        if last_valid_idx > 0 and quotes['close'][last_valid_idx-1] is not None:
-                            prev_price = quotes['close'][last_valid_idx-1]
-                            stock_data['change_1d'] = (stock_data['price'] - prev_price) / prev_price * 100
-                        else:
-                            stock_data['change_1d'] = 0
-                        
-                        # Calcular variação em 1 ano
-                        first_valid_idx = 0
-                        for i in range(len(quotes['close'])):
-                            if quotes['close'][i] is not None:
-                                first_valid_idx = i
-                                break
-                        
-                        if first_valid_idx < last_valid_idx:
-                            first_price = quotes['close'][first_valid_idx]
-                            stock_data['change_1y'] = (stock_data['price'] - first_price) / first_price * 100
-                        else:
-                            stock_data['change_1y'] = 0
+                with metrics.upstream_call('api_client', 'YahooFinance/get_stock_chart'):
+                    chart_data = self.api_client.call_api(
+                        'YahooFinance/get_stock_chart', 
+                        query={
+                            'symbol': symbol,
+                            'region': api_region,
+                            'interval': '1d',
+                            'range': '1y'
+                        }
+                    )
+                stock_data = self._apply_chart(symbol, chart_data)
                 
                 # Buscar insights e indicadores fundamentalistas
-                insights_data = self.api_client.call_api(
-                    'YahooFinance/get_stock_insights', 
-                    query={'symbol': symbol}
-                )
-                
-                if insights_data and 'finance' in insights_data and 'result' in insights_data['finance']:
-                    result = insights_data['finance']['result']
-                    
-                    # Extrair indicadores técnicos
-                    if 'instrumentInfo' in result and 'technicalEvents' in result['instrumentInfo']:
-                        tech_events = result['instrumentInfo']['technicalEvents']
-                        stock_data['technical_outlook'] = {
-                            'short_term': tech_events.get('shortTermOutlook', {}).get('direction', ''),
-                            'mid_term': tech_events.get('intermediateTermOutlook', {}).get('direction', ''),
-                            'long_term': tech_events.get('longTermOutlook', {}).get('direction', '')
-                        }
-                    
-                    # Extrair recomendação
-                    if 'recommendation' in result:
-                        stock_data['recommendation'] = {
-                            'rating': result['recommendation'].get('rating', ''),
-                            'target_price': result['recommendation'].get('targetPrice', None)
-                        }
+                with metrics.upstream_call('api_client', 'YahooFinance/get_stock_insights'):
+                    insights_data = self.api_client.call_api(
+                        'YahooFinance/get_stock_insights', 
+                        query={'symbol': symbol}
+                    )
+                self._apply_insights(stock_data, insights_data)
+            elif CHART_URL:
+                # Endpoint de gráficos configurado (CLEARVIEW_CHART_URL)
+                stock_data = self._apply_chart(symbol, fetch_chart(symbol, api_region))
             else:
                 # Usar API pública como fallback
                 # Implementação de fallback usando requests para Yahoo Finance API pública
@@ -215,6 +282,74 @@ class StockAnalyzer:
         
         return stock_data
     
+    async def afetch_stock_data(self, session, symbol, region="BR"):
+        """
+        Versão assíncrona de fetch_stock_data (servidor asyncio).
+        
+        Com um endpoint de gráficos configurado, a busca é feita pela sessão
+        aiohttp sem ocupar uma thread, e só o registro no histórico (em disco)
+        vai ao pool de threads padrão do loop; o API Client (síncrono) é
+        executado inteiro nesse pool.
+        
+        Args:
+            session (aiohttp.ClientSession): Sessão HTTP compartilhada
+            symbol (str): Código da ação
+            region (str): Região da ação (BR ou US)
+            
+        Returns:
+            dict: Dados da ação
+        """
+        if self.api_client or not CHART_URL:
+            return await asyncio.get_running_loop().run_in_executor(
+                None, metrics.bind_request(self.fetch_stock_data), symbol, region
+            )
+        
+        logger.info(f"Buscando dados para {symbol} na região {region}")
+        try:
+            chart_data = await afetch_chart(session, symbol, "BR" if region == "BR" else "US")
+            # A gravação dos fechamentos no histórico é feita fora do loop de eventos
+            return await asyncio.get_running_loop().run_in_executor(None, self._apply_chart, symbol, chart_data)
+        except Exception as e:
+            logger.error(f"Erro ao buscar dados para {symbol}: {e}")
+            return {}
+    
+    def _apply_chart(self, symbol, chart_data):
+        """Extrai os dados de cotação de um gráfico e registra os fechamentos no histórico."""
+        parsed = parse_chart(symbol, chart_data)
+        if parsed is None:
+            return {}
+        stock_data, timestamps, closes = parsed
+        
+        # Registrar fechamentos no histórico
+        self.history.record_prices(symbol, timestamps, closes)
+        return stock_data
+    
+    def _apply_insights(self, stock_data, insights_data):
+        """Acrescenta a perspectiva técnica e a recomendação dos insights aos dados da ação."""
+        if insights_data and 'finance' in insights_data and 'result' in insights_data['finance']:
+            result = insights_data['finance']['result']
+            
+            # Extrair indicadores técnicos
+            if 'instrumentInfo' in result and 'technicalEvents' in result['instrumentInfo']:
+                tech_events = result['instrumentInfo']['technicalEvents']
+                stock_data['technical_outlook'] = {
+                    'short_term': tech_events.get('shortTermOutlook', {}).get('direction', ''),
+                    'mid_term': tech_events.get('intermediateTermOutlook', {}).get('direction', ''),
+                    'long_term': tech_events.get('longTermOutlook', {}).get('direction', '')
+                }
+            
+            # Extrair setor
+            sector = result.get('companySnapshot', {}).get('sectorInfo')
+            if sector:
+                stock_data['sector'] = sector
+            
+            # Extrair recomendação
+            if 'recommendation' in result:
+                stock_data['recommendation'] = {
+                    'rating': result['recommendation'].get('rating', ''),
+                    'target_price': result['recommendation'].get('targetPrice', None)
+                }
+    
     def fetch_fundamentals(self, symbol, region="BR"):
         """
         Busca indicadores fundamentalistas para uma ação.
@@ -243,53 +378,23 @@ class StockAnalyzer:
         
         return fundamentals
     
-    def calculate_graham_value(self, symbol, fundamentals):
+    def calculate_graham_value(self, symbol, fundamentals, price=None):
         """
         Calcula o valor justo de uma ação usando a fórmula de Graham.
         
-        Fórmula de Graham: √(22.5 * LPA * VPA)
-        Onde:
-        - LPA = Lucro por Ação
-        - VPA = Valor Patrimonial por Ação
-        
         Args:
             symbol (str): Código da ação
             fundamentals (dict): Indicadores fundamentalistas
+            price (float): Preço de referência (padrão: última cotação conhecida)
             
         Returns:
-            float: Valor justo calculado
+            dict: Valor justo calculado
         """
-        # Em uma implementação real, esses valores viriam dos dados fundamentalistas
-        # Para este exemplo, vamos simular
-        
-        # Obter preço atual
-        current_price = self.stocks_data.get(symbol, {}).get('price', 100)
-        
-        # Simular LPA e VPA
-        pe_ratio = fundamentals.get('P/L', 15)
-        pb_ratio = fundamentals.get('P/VP', 2)
-        
-        # Calcular LPA e VPA a partir dos múltiplos
-        lpa = current_price / pe_ratio if pe_ratio > 0 else 0
-        vpa = current_price / pb_ratio if pb_ratio > 0 else 0
-        
-        # Aplicar fórmula de Graham
-        if lpa > 0 and vpa > 0:
-            graham_value = np.sqrt(22.5 * lpa * vpa)
-        else:
-            graham_value = current_price  # Fallback se não for possível calcular
-        
-        # Calcular potencial de valorização
-        potential = ((graham_value - current_price) / current_price) * 100
-        
-        return {
-            'fair_value': round(graham_value, 2),
-            'potential': round(potential, 2),
-            'lpa': round(lpa, 2),
-            'vpa': round(vpa, 2)
-        }
+        if price is None:
+            price = self.stocks_data.get(symbol, {}).get('price', 100)
+        return compute_graham_value(price, fundamentals)
     
-    def evaluate_stock(self, symbol, fundamentals, graham_value):
+    def evaluate_stock(self, symbol, fundamentals, graham_value, price=None):
         """
         Avalia uma ação com base em critérios fundamentalistas e valor de Graham.
         
@@ -297,104 +402,204 @@ class StockAnalyzer:
             symbol (str): Código da ação
             fundamentals (dict): Indicadores fundamentalistas
             graham_value (dict): Valor justo e potencial
+            price (float): Preço de referência (padrão: última cotação conhecida)
             
         Returns:
             dict: Avaliação da ação
         """
-        # Critérios para avaliação
-        evaluation = {
-            'rating': 'Neutro',
-            'strengths': [],
-            'weaknesses': [],
-            'opportunity': False,
-            'score': 0
-        }
+        if price is None:
+            price = self.stocks_data.get(symbol, {}).get('price', 0)
+        return evaluate_fundamentals(price, fundamentals, graham_value)
+    
+    def publish_quote_deltas(self, previous, published):
+        """
+        Envia aos assinantes apenas o que mudou nas visões recém-publicadas.
         
-        score = 0
-        
-        # Avaliar P/L
-        pl = fundamentals.get('P/L', 0)
-        if pl > 0:
-            if pl < 10:
-                score += 2
-                evaluation['strengths'].append('P/L baixo, indicando possível subavaliação')
-            elif pl > 25:
-                score -= 2
-                evaluation['weaknesses'].append('P/L alto, indicando possível sobreavaliação')
-        
-        # Avaliar P/VP
-        pvp = fundamentals.get('P/VP', 0)
-        if pvp > 0:
-            if pvp < 1:
-                score += 2
-                evaluation['strengths'].append('P/VP abaixo de 1, indicando possível subavaliação')
-            elif pvp > 3:
-                score -= 1
-                evaluation['weaknesses'].append('P/VP alto, indicando possível sobreavaliação')
-        
-        # Avaliar ROE
-        roe = fundamentals.get('ROE', 0)
-        if roe > 15:
-            score += 2
-            evaluation['strengths'].append('ROE alto, indicando boa rentabilidade')
-        elif roe < 8:
-            score -= 1
-            evaluation['weaknesses'].append('ROE baixo, indicando rentabilidade abaixo da média')
-        
-        # Avaliar Dividend Yield
-        dy = fundamentals.get('Dividend Yield', 0)
-        if dy > 6:
-            score += 2
-            evaluation['strengths'].append('Dividend Yield atrativo')
-        
-        # Avaliar Dívida/EBITDA
-        debt_ebitda = fundamentals.get('Dívida/EBITDA', 0)
-        if debt_ebitda < 1.5:
-            score += 1
-            evaluation['strengths'].append('Baixo endividamento')
-        elif debt_ebitda > 3:
-            score -= 2
-            evaluation['weaknesses'].append('Alto endividamento')
-        
-        # Avaliar potencial de Graham
-        potential = graham_value.get('potential', 0)
-        if potential > 30:
-            score += 3
-            evaluation['strengths'].append('Alto potencial segundo fórmula de Graham')
-            evaluation['opportunity'] = True
-        elif potential > 15:
-            score += 2
-            evaluation['strengths'].append('Bom potencial segundo fórmula de Graham')
-        elif potential < -15:
-            score -= 2
-            evaluation['weaknesses'].append('Potencial negativo segundo fórmula de Graham')
-        
-        # Determinar rating com base no score
-        evaluation['score'] = score
-        if score >= 5:
-            evaluation['rating'] = 'Compra'
-        elif score >= 2:
-            evaluation['rating'] = 'Manter'
-        elif score <= -3:
-            evaluation['rating'] = 'Venda'
-        else:
-            evaluation['rating'] = 'Neutro'
+        Args:
+            previous (dict): Visões anteriores por ação
+            published (list): Visões publicadas
+        """
+        for delta in quote_deltas(previous, published):
+            self.quote_stream.publish(delta['symbol'], delta, event='quote', event_id=delta['version'])
+    
+    def is_monitored(self, symbol):
+        """Verifica se a ação está nas listas monitoradas (atualizadas pela carteira)."""
+        symbol = symbol.upper()
+        return symbol in self.br_stocks or symbol in self.us_stocks
+    
+    def _view_expired(self, view):
+        """Verifica se a visão de uma ação buscada sob demanda passou da validade."""
+        try:
+            age = (datetime.now() - datetime.fromisoformat(view['last_update'])).total_seconds()
+        except (KeyError, TypeError, ValueError):
+            return True
+        return age > self.adhoc_view_ttl
+    
+    def current_view(self, symbol):
+        """
+        Retorna a visão publicada de uma ação, se ainda válida.
+        
+        As ações monitoradas são atualizadas pela carteira; as demais, buscadas
+        sob demanda, valem por `adhoc_view_ttl` segundos.
+        
+        Args:
+            symbol (str): Código da ação
+            
+        Returns:
+            dict: Visão publicada, ou None se ausente ou vencida
+        """
+        view = self.views.get(symbol)
+        if view is not None and not self.is_monitored(symbol) and self._view_expired(view):
+            return None
+        return view
+    
+    def materialize_view(self, symbol, region="BR"):
+        """
+        Analisa uma única ação e publica sua visão (usado quando ela ainda não foi materializada).
+        
+        Args:
+            symbol (str): Código da ação
+            region (str): Região da ação (BR ou US)
+            
+        Returns:
+            dict: Visão publicada, ou None se a cotação não foi encontrada
+        """
+        return self.materialize_views([symbol], {symbol.upper(): region})[symbol.upper()]
+    
+    def materialize_views(self, symbols, regions=None, max_workers=8):
+        """
+        Analisa um conjunto de ações e publica suas visões em uma única versão.
+        
+        As cotações que ainda não estão em memória são buscadas em paralelo (a busca
+        é limitada por rede); a avaliação é feita em lote pelo Screener. Buscas sem
+        cotação (ação inexistente ou provedor indisponível) não são guardadas nem publicadas.
+        
+        Args:
+            symbols (list): Códigos das ações
+            regions (dict): Região de cada ação (padrão: BR)
+            max_workers (int): Buscas de cotação simultâneas
+            
+        Returns:
+            dict: Código da ação -> visão publicada (None para as ações sem cotação)
+        """
+        regions = regions or {}
+        symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
         
-        # Verificar se é uma ótima oportunidade (70% do valor justo)
-        current_price = self.stocks_data.get(symbol, {}).get('price', 0)
-        fair_value = graham_value.get('fair_value', 0)
+        missing = self._stale_quotes(symbols)
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(missing))) as executor:
+                fetch = metrics.bind_request(lambda symbol: self.fetch_stock_data(symbol, regions.get(symbol, "BR")))
+                self._store_quotes(missing, executor.map(fetch, missing))
         
-        if current_price > 0 and fair_value > 0:
-            if current_price <= 0.7 * fair_value:
-                evaluation['opportunity'] = True
-                evaluation['strengths'].append('Cotada abaixo de 70% do valor justo')
+        return self._publish_views(symbols, regions)
+    
+    async def amaterialize_views(self, session, symbols, regions=None):
+        """
+        Versão assíncrona de materialize_views: as cotações ausentes são buscadas
+        concorrentemente no loop de eventos, sem um pool de threads por requisição.
         
-        return evaluation
+        Args:
+            session (aiohttp.ClientSession): Sessão HTTP compartilhada
+            symbols (list): Códigos das ações
+            regions (dict): Região de cada ação (padrão: BR)
+            
+        Returns:
+            dict: Código da ação -> visão publicada (None para as ações sem cotação)
+        """
+        regions = regions or {}
+        symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+        loop = asyncio.get_running_loop()
+        
+        missing = self._stale_quotes(symbols)
+        if missing:
+            fetched = await asyncio.gather(*(
+                self.afetch_stock_data(session, symbol, regions.get(symbol, "BR")) for symbol in missing
+            ))
+            await loop.run_in_executor(None, self._store_quotes, missing, fetched)
+        
+        # Gravações em disco (dados e visões) fora do loop de eventos
+        return await loop.run_in_executor(None, self._publish_views, symbols, regions)
+    
+    @staticmethod
+    def _has_quote(stock_data):
+        """Verifica se uma busca retornou cotação."""
+        return bool(stock_data) and stock_data.get('price') is not None and 'last_update' in stock_data
+    
+    def _store_quotes(self, symbols, fetched):
+        """Guarda as cotações encontradas (as buscas vazias são descartadas) e salva os dados."""
+        stored = 0
+        with self._data_lock:
+            for symbol, stock_data in zip(symbols, fetched):
+                if self._has_quote(stock_data):
+                    self.stocks_data[symbol] = stock_data
+                    stored += 1
+                else:
+                    logger.warning(f"Nenhuma cotação encontrada para {symbol}")
+            if stored:
+                self.save_data()
     
-    def update_portfolio(self):
+    def _stale_quotes(self, symbols):
+        """Ações sem dados em memória, com dados desatualizados ou (fora das monitoradas) com a visão vencida."""
+        return [
+            symbol for symbol in symbols
+            if not self._has_quote(self.stocks_data.get(symbol))
+            or (not self.is_monitored(symbol) and self.current_view(symbol) is None)
+        ]
+    
+    def _publish_views(self, symbols, regions):
+        """Avalia as ações com cotação em memória e publica suas visões em uma única versão."""
+        with self._data_lock:
+            quoted = {
+                symbol: self.stocks_data[symbol] for symbol in symbols
+                if self._has_quote(self.stocks_data.get(symbol))
+            }
+        if quoted:
+            fundamentals = [self.fetch_fundamentals(symbol, regions.get(symbol, "BR")) for symbol in quoted]
+            results = self.screener.evaluate(
+                [stock_data.get('price') for stock_data in quoted.values()],
+                fundamentals
+            )
+            
+            self.views.publish([
+                build_view(symbol, regions.get(symbol, "BR"), stock_data, values, graham_value, evaluation)
+                for (symbol, stock_data), values, (graham_value, evaluation) in zip(quoted.items(), fundamentals, results)
+            ])
+            self._evict_adhoc_views()
+        return {symbol: self.views.get(symbol) if symbol in quoted else None for symbol in symbols}
+    
+    def _evict_adhoc_views(self):
+        """
+        Descarta as visões (e os dados) de ações fora das listas monitoradas que
+        venceram ou excedem `max_adhoc_views`, das mais antigas para as mais novas.
+        """
+        adhoc = []
+        for symbol in self.views.symbols():
+            if not self.is_monitored(symbol):
+                view = self.views.get(symbol)
+                if view is not None:
+                    adhoc.append((view.get('last_update') or '', symbol, view))
+        adhoc.sort()
+        
+        expired = [symbol for _, symbol, view in adhoc if self._view_expired(view)]
+        overflow = [symbol for _, symbol, _ in adhoc[:max(0, len(adhoc) - self.max_adhoc_views)]]
+        evicted = set(expired) | set(overflow)
+        if not evicted:
+            return
+        
+        self.views.remove(evicted)
+        with self._data_lock:
+            for symbol in evicted:
+                self.stocks_data.pop(symbol, None)
+            self.save_data()
+        logger.info(f"{len(evicted)} visões de ações não monitoradas descartadas")
+    
+    def update_portfolio(self, progress=None):
         """
         Atualiza a carteira da Clearview Capital com base nas análises.
         
+        Args:
+            progress (callable): Recebe (ações analisadas, total) após cada ação
+            
         Returns:
             dict: Nova composição da carteira
         """
@@ -404,11 +609,14 @@ class StockAnalyzer:
             'total_score': 0
         }
         
+        # Atualizar os índices de referência usados nas métricas de risco
+        self.refresh_benchmarks()
+        
         # Analisar todas as ações monitoradas
         all_stocks = self.br_stocks + self.us_stocks
-        analyzed_stocks = []
+        collected = []
         
-        for symbol in all_stocks:
+        for index, symbol in enumerate(all_stocks):
             region = "US" if symbol in self.us_stocks else "BR"
             
             # Verificar se já temos dados recentes
@@ -418,17 +626,26 @@ class StockAnalyzer:
             # Se os dados têm mais de 1 dia, atualizar
             if time.time() - last_update > 86400:  # 24 horas em segundos
                 stock_data = self.fetch_stock_data(symbol, region)
-                self.stocks_data[symbol] = stock_data
+                with self._data_lock:
+                    self.stocks_data[symbol] = stock_data
             
             # Buscar ou simular fundamentals
             fundamentals = self.fetch_fundamentals(symbol, region)
+            self.history.record_fundamentals(symbol, fundamentals)
             
-            # Calcular valor de Graham
-            graham_value = self.calculate_graham_value(symbol, fundamentals)
-            
-            # Avaliar ação
-            evaluation = self.evaluate_stock(symbol, fundamentals, graham_value)
+            collected.append((symbol, region, stock_data, fundamentals))
             
+            if progress is not None:
+                progress(index + 1, len(all_stocks))
+        
+        # Calcular valor de Graham e avaliar todas as ações em lote
+        results = self.screener.evaluate(
+            [stock_data.get('price') for _, _, stock_data, _ in collected],
+            [fundamentals for _, _, _, fundamentals in collected]
+        )
+        
+        analyzed_stocks = []
+        for (symbol, region, stock_data, fundamentals), (graham_value, evaluation) in zip(collected, results):
             # Adicionar à lista de ações analisadas
             analyzed_stocks.append({
                 'symbol': symbol,
@@ -438,40 +655,35 @@ class StockAnalyzer:
                 'fundamentals': fundamentals,
                 'graham_value': graham_value,
                 'evaluation': evaluation,
-                'region': region
+                'region': region,
+                'sector': stock_data.get('sector') or self.sectors.get(symbol)
             })
         
         # Salvar dados atualizados
         self.save_data()
         
-        # Selecionar ações para a carteira (as com melhor avaliação)
-        analyzed_stocks.sort(key=lambda x: x['evaluation']['score'], reverse=True)
+        # Materializar as visões de todas as ações analisadas (uma única versão)
+        self.views.publish([
+            build_view(symbol, region, stock_data, fundamentals, graham_value, evaluation)
+            for (symbol, region, stock_data, fundamentals), (graham_value, evaluation) in zip(collected, results)
+        ])
         
         # Selecionar as 10 melhores ações, com pelo menos 7 brasileiras
-        br_count = 0
-        portfolio_stocks = []
-        
-        for stock in analyzed_stocks:
-            if len(portfolio_stocks) < 10:
-                if stock['region'] == 'BR':
-                    br_count += 1
-                portfolio_stocks.append(stock)
-            elif br_count < 7 and stock['region'] == 'BR':
-                # Substituir a pior ação internacional por uma brasileira
-                for i in range(len(portfolio_stocks)-1, -1, -1):
-                    if portfolio_stocks[i]['region'] == 'US':
-                        portfolio_stocks[i] = stock
-                        br_count += 1
-                        break
+        portfolio_stocks = self.portfolio_selector.select(analyzed_stocks)
         
         portfolio['stocks'] = portfolio_stocks
         portfolio['total_score'] = sum(stock['evaluation']['score'] for stock in portfolio_stocks)
         
+        # Pré-gerar os relatórios das ações da carteira (somente os de dados novos)
+        self.reports.prerender(portfolio_stocks, self.generate_report)
+        
         # Salvar a carteira em um arquivo separado
         try:
             portfolio_file = os.path.join(self.data_dir, "portfolio.json")
             with open(portfolio_file, 'w', encoding='utf-8') as f:
                 json.dump(portfolio, f, ensure_ascii=False, indent=2)
+            self._portfolio = portfolio
+            self._portfolio_mtime = os.path.getmtime(portfolio_file)
             logger.info(f"Carteira salva em {portfolio_file}")
         except Exception as e:
             logger.error(f"Erro ao salvar carteira: {e}")
@@ -489,11 +701,8 @@ class StockAnalyzer:
         
         # Carregar dados da carteira
         try:
-            portfolio_file = os.path.join(self.data_dir, "portfolio.json")
-            if os.path.exists(portfolio_file):
-                with open(portfolio_file, 'r', encoding='utf-8') as f:
-                    portfolio = json.load(f)
-                
+            portfolio = self.load_portfolio()
+            if portfolio is not None:
                 # Filtrar ações marcadas como oportunidades
                 for stock in portfolio.get('stocks', []):
                     if stock.get('evaluation', {}).get('opportunity', False):
@@ -525,53 +734,62 @@ class StockAnalyzer:
         graham = stock.get('graham_value', {})
         evaluation = stock.get('evaluation', {})
         
-        # Construir relatório
-        report = f"Análise de {symbol} - {name}\n\n"
+        # Construir relatório (partes unidas uma única vez no final)
+        parts = [f"Análise de {symbol} - {name}\n\n"]
         
         # Resumo
-        report += "Resumo:\n"
-        report += f"Cotação atual: {price:.2f} ({'+' if change >= 0 else ''}{change:.2f}%)\n"
-        report += f"Valor justo (Graham): {graham.get('fair_value', 0):.2f}\n"
-        report += f"Potencial: {'+' if graham.get('potential', 0) >= 0 else ''}{graham.get('potential', 0):.2f}%\n"
-        report += f"Avaliação: {evaluation.get('rating', 'Neutro')}\n\n"
+        parts.append("Resumo:\n")
+        parts.append(f"Cotação atual: {price:.2f} ({'+' if change >= 0 else ''}{change:.2f}%)\n")
+        parts.append(f"Valor justo (Graham): {graham.get('fair_value', 0):.2f}\n")
+        parts.append(f"Potencial: {'+' if graham.get('potential', 0) >= 0 else ''}{graham.get('potential', 0):.2f}%\n")
+        parts.append(f"Avaliação: {evaluation.get('rating', 'Neutro')}\n\n")
         
         # Indicadores
-        report += "Indicadores Fundamentalistas:\n"
-        for key, value in fundamentals.items():
-            report += f"- {key}: {value}\n"
-        report += "\n"
+        parts.append("Indicadores Fundamentalistas:\n")
+        parts.extend(f"- {key}: {value}\n" for key, value in fundamentals.items())
+        parts.append("\n")
         
         # Pontos fortes e fracos
-        report += "Pontos Fortes:\n"
-        for strength in evaluation.get('strengths', []):
-            report += f"- {strength}\n"
+        parts.append("Pontos Fortes:\n")
+        parts.extend(f"- {strength}\n" for strength in evaluation.get('strengths', []))
         
         if not evaluation.get('strengths'):
-            report += "- Nenhum ponto forte identificado\n"
+            parts.append("- Nenhum ponto forte identificado\n")
         
-        report += "\nPontos Fracos:\n"
-        for weakness in evaluation.get('weaknesses', []):
-            report += f"- {weakness}\n"
+        parts.append("\nPontos Fracos:\n")
+        parts.extend(f"- {weakness}\n" for weakness in evaluation.get('weaknesses', []))
         
         if not evaluation.get('weaknesses'):
-            report += "- Nenhum ponto fraco identificado\n"
+            parts.append("- Nenhum ponto fraco identificado\n")
         
         # Conclusão
-        report += "\nConclusão:\n"
+        parts.append("\nConclusão:\n")
         if evaluation.get('rating') == 'Compra':
-            report += f"{symbol} apresenta bons fundamentos e está com preço atrativo. "
-            report += "Recomendamos a compra para investidores de longo prazo."
+            parts.append(f"{symbol} apresenta bons fundamentos e está com preço atrativo. ")
+            parts.append("Recomendamos a compra para investidores de longo prazo.")
         elif evaluation.get('rating') == 'Manter':
-            report += f"{symbol} apresenta fundamentos adequados ao preço atual. "
-            report += "Recomendamos manter para quem já possui a ação."
+            parts.append(f"{symbol} apresenta fundamentos adequados ao preço atual. ")
+            parts.append("Recomendamos manter para quem já possui a ação.")
         elif evaluation.get('rating') == 'Venda':
-            report += f"{symbol} apresenta fundamentos fracos ou está sobreavaliada. "
-            report += "Recomendamos a venda ou substituição por ativos mais atrativos."
+            parts.append(f"{symbol} apresenta fundamentos fracos ou está sobreavaliada. ")
+            parts.append("Recomendamos a venda ou substituição por ativos mais atrativos.")
         else:
-            report += f"{symbol} apresenta um equilíbrio entre pontos fortes e fracos. "
-            report += "Recomendamos análise mais aprofundada antes de tomar decisões."
+            parts.append(f"{symbol} apresenta um equilíbrio entre pontos fortes e fracos. ")
+            parts.append("Recomendamos análise mais aprofundada antes de tomar decisões.")
         
-        return report
+        return ''.join(parts)
+    
+    def render_report(self, stock):
+        """
+        Retorna o relatório de uma ação a partir do cache, gerando-o só se os dados mudaram.
+        
+        Args:
+            stock (dict): Dados da ação
+            
+        Returns:
+            tuple: (texto do relatório, hash de conteúdo, True se veio do cache)
+        """
+        return self.reports.render(stock, self.generate_report)
 
 # Função principal para teste
 def main():
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de visões materializadas para a Plataforma Inteligente da Clearview Capital.
+Este módulo guarda, por ação, o registro pronto para servir (cotação,
+fundamentals, valor de Graham e avaliação) produzido pelo pipeline de análise,
+de modo que a API responda com uma simples consulta por chave.
+"""
+
+import os
+import json
+import logging
+import threading
+from datetime import datetime
+
+logger = logging.getLogger("StockViews")
+
+def build_view(symbol, region, stock_data, fundamentals, graham_value, evaluation):
+    """
+    Monta o registro servido em /api/stock/<symbol>.
+
+    Args:
+        symbol (str): Código da ação
+        region (str): Região da ação (BR ou US)
+        stock_data (dict): Dados de cotação (fetch_stock_data)
+        fundamentals (dict): Indicadores fundamentalistas
+        graham_value (dict): Valor justo e potencial
+        evaluation (dict): Avaliação da ação
+
+    Returns:
+        dict: Registro da visão (sem carimbo de versão)
+    """
+    return {
+        'symbol': symbol.upper(),
+        'name': stock_data.get('name', ''),
+        'price': stock_data.get('price', 0),
+        'change_1d': stock_data.get('change_1d', 0),
+        'change_1y': stock_data.get('change_1y', 0),
+        'currency': stock_data.get('currency', 'BRL'),
+        'exchange': stock_data.get('exchange', ''),
+        'region': region,
+        'fundamentals': fundamentals,
+        'graham_value': graham_value,
+        'evaluation': evaluation
+    }
+
+class StockViewStore:
+    """
+    Visões materializadas por ação, com carimbo de versão.
+
+    Cada publicação incrementa a versão global e carimba os registros publicados
+    com ela. O dicionário de visões é substituído (nunca alterado no lugar), então
+    as leituras não precisam de trava e sempre enxergam um conjunto consistente.
+    Cada visão é salva em um arquivo próprio, de modo que publicar uma ação
+    regrava apenas o arquivo dela (e o da versão global).
+    """
+
+    def __init__(self, data_dir="/home/ubuntu/clearview_project/data"):
+        """
+        Inicializa o armazenamento de visões.
+
+        Args:
+            data_dir (str): Diretório para armazenamento de dados
+        """
+        self.views_file = os.path.join(data_dir, "stock_views.json")
+        self.views_dir = os.path.join(data_dir, "stock_views")
+        os.makedirs(self.views_dir, exist_ok=True)
+        self._views = {}
+        self.version = 0
+        self._lock = threading.Lock()
+        
+        # Funções chamadas a cada publicação com (visões anteriores, visões publicadas)
+        self._listeners = []
+        self.load()
+
+    def _file_for(self, symbol):
+        """Retorna o caminho do arquivo da visão de uma ação."""
+        return os.path.join(self.views_dir, f"{symbol.upper()}.json")
+
+    @staticmethod
+    def _write_json(path, data):
+        """Grava um arquivo JSON de forma atômica (arquivo temporário + os.replace)."""
+        temp_file = path + '.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(temp_file, path)
+
+    def load(self):
+        """Carrega as visões salvas, se existirem (migrando o arquivo único antigo)."""
+        try:
+            stored = {}
+            if os.path.exists(self.views_file):
+                with open(self.views_file, 'r', encoding='utf-8') as f:
+                    stored = json.load(f)
+            self.version = stored.get('version', 0)
+
+            views = {}
+            for name in os.listdir(self.views_dir):
+                if name.endswith('.json'):
+                    with open(os.path.join(self.views_dir, name), 'r', encoding='utf-8') as f:
+                        view = json.load(f)
+                    views[view['symbol']] = view
+            self._views = views
+
+            if 'views' in stored:
+                # Formato antigo: todas as visões em stock_views.json
+                self._views = dict(stored['views'], **views)
+                self.save()
+            logger.info(f"{len(self._views)} visões carregadas de {self.views_dir}")
+        except Exception as e:
+            logger.error(f"Erro ao carregar visões: {e}")
+
+    def save(self, symbols=None):
+        """
+        Salva as visões em arquivos JSON, um por ação, e a versão global.
+
+        Args:
+            symbols (list): Ações cujas visões mudaram (padrão: todas)
+        """
+        try:
+            for symbol in self._views if symbols is None else symbols:
+                self._write_json(self._file_for(symbol), self._views[symbol])
+            self._write_json(self.views_file, {'version': self.version})
+        except Exception as e:
+            logger.error(f"Erro ao salvar visões: {e}")
+
+    def add_listener(self, listener):
+        """
+        Registra uma função notificada a cada publicação.
+
+        Args:
+            listener (callable): Recebe (visões anteriores por ação, lista de visões publicadas)
+        """
+        self._listeners.append(listener)
+
+    def publish(self, views):
+        """
+        Publica (ou substitui) as visões de um conjunto de ações.
+
+        Args:
+            views (list): Registros produzidos por build_view
+
+        Returns:
+            int: Versão atribuída aos registros publicados
+        """
+        with self._lock:
+            version = self.version + 1
+            updated_at = datetime.now().isoformat()
+            previous = self._views
+            merged = dict(previous)
+            published = []
+            for view in views:
+                merged[view['symbol']] = dict(view, version=version, last_update=updated_at)
+                published.append(merged[view['symbol']])
+
+            self._views = merged
+            self.version = version
+            self.save([view['symbol'] for view in published])
+
+        for listener in self._listeners:
+            try:
+                listener(previous, published)
+            except Exception as e:
+                logger.error(f"Erro ao notificar publicação de visões: {e}")
+        return version
+
+    def remove(self, symbols):
+        """
+        Remove as visões de um conjunto de ações (sem notificar os ouvintes).
+
+        Args:
+            symbols (list): Códigos das ações
+
+        Returns:
+            int: Quantidade de visões removidas
+        """
+        symbols = {symbol.upper() for symbol in symbols}
+        with self._lock:
+            removed = [symbol for symbol in self._views if symbol in symbols]
+            if removed:
+                self._views = {symbol: view for symbol, view in self._views.items() if symbol not in symbols}
+                for symbol in removed:
+                    try:
+                        os.remove(self._file_for(symbol))
+                    except OSError as e:
+                        logger.error(f"Erro ao remover visão de {symbol}: {e}")
+        return len(removed)
+
+    def get(self, symbol):
+        """
+        Retorna a visão de uma ação em O(1).
+
+        Args:
+            symbol (str): Código da ação
+
+        Returns:
+            dict: Registro carimbado com 'version' e 'last_update', ou None
+        """
+        return self._views.get(symbol.upper())
+
+    def symbols(self):
+        """Retorna as ações com visão materializada."""
+        return list(self._views)
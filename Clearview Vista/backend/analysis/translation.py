@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de tradução local para a Plataforma Inteligente da Clearview Capital.
+Este módulo traz a alternativa local à tradução com IA, um dicionário compilado
+em uma única expressão regular que substitui, em uma passada, sempre o termo
+mais longo em cada posição, e a memória de tradução, que guarda em disco os
+trechos (títulos e resumos) já traduzidos para que uma notícia vista antes não
+custe de novo uma chamada ao modelo nem uma passada pelo dicionário.
+"""
+
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+from analysis.instrumentation import metrics
+from analysis.keyword_sentiment import trie_pattern
+
+logger = logging.getLogger("Translation")
+
+# Dicionário inglês -> português (nomes próprios mantidos, para não serem alterados na volta)
+EN_TO_PT = {
+    "Fed": "Fed",
+    "interest rate": "taxa de juros",
+    "cut": "corte",
+    "Apple": "Apple",
+    "AI": "IA",
+    "features": "recursos",
+    "iPhone": "iPhone",
+    "Mac": "Mac",
+    "Tesla": "Tesla",
+    "delivers": "entrega",
+    "record": "recorde",
+    "vehicles": "veículos",
+    "Amazon": "Amazon",
+    "expands": "expande",
+    "same-day delivery": "entrega no mesmo dia",
+    "cities": "cidades",
+    "Microsoft": "Microsoft",
+    "cloud": "nuvem",
+    "revenue": "receita",
+    "surges": "aumenta",
+    "quarter": "trimestre"
+}
+
+# Motores de tradução, do melhor para o pior
+ENGINES = ('openai', 'dictionary')
+
+class DictionaryTranslator:
+    """
+    Tradução por dicionário em uma passada.
+
+    Os termos são compilados em uma expressão regular fatorada por prefixos, com
+    limites de palavra: em cada posição vale o termo mais longo ("same-day
+    delivery" antes de "delivers") e o texto já substituído não é lido de novo,
+    então uma substituição não corrompe a seguinte.
+    """
+
+    def __init__(self, mapping):
+        """
+        Inicializa e compila o dicionário.
+
+        Args:
+            mapping (dict): Termo de origem -> termo traduzido (sensível a maiúsculas)
+        """
+        self.mapping = dict(mapping)
+        self.pattern = re.compile(rf"(?<!\w)(?:{trie_pattern(self.mapping)})(?!\w)") if self.mapping else None
+
+    def translate(self, text):
+        """
+        Traduz um texto.
+
+        Args:
+            text (str): Texto de origem
+
+        Returns:
+            str: Texto com os termos do dicionário substituídos
+        """
+        if self.pattern is None or not text:
+            return text
+        return self.pattern.sub(lambda match: self.mapping[match.group(0)], text)
+
+# Tradutores por par de idiomas (origem, destino), compilados uma vez por processo
+TRANSLATORS = {
+    ('en-us', 'pt-br'): DictionaryTranslator(EN_TO_PT),
+    ('pt-br', 'en-us'): DictionaryTranslator({target: source for source, target in EN_TO_PT.items()})
+}
+
+def translate_text(text, source_language, target_language):
+    """
+    Traduz um texto pelo dicionário do par de idiomas (sem dicionário, retorna o texto).
+
+    Args:
+        text (str): Texto de origem
+        source_language (str): Idioma de origem (pt-br ou en-us)
+        target_language (str): Idioma alvo (pt-br ou en-us)
+
+    Returns:
+        str: Texto traduzido
+    """
+    translator = TRANSLATORS.get((source_language, target_language))
+    return translator.translate(text) if translator is not None else text
+
+def segment_key(source_language, target_language, text):
+    """Chave de um trecho na memória de tradução (hash do par de idiomas e do texto)."""
+    return hashlib.sha1(f"{source_language}>{target_language}|{text}".encode('utf-8')).hexdigest()
+
+class TranslationMemory:
+    """
+    Trechos já traduzidos em `<data_dir>/translation_memory.jsonl`, um por linha.
+
+    Cada trecho guarda o motor que o traduziu; uma tradução do modelo substitui
+    a do dicionário, nunca o contrário. Novos trechos são acrescentados ao fim do
+    arquivo, e a memória mantém os `max_entries` usados mais recentemente,
+    reescrevendo o arquivo quando as linhas descartadas se acumulam.
+    """
+
+    def __init__(self, data_dir="/home/ubuntu/clearview_project/data", max_entries=20000):
+        """
+        Inicializa a memória de tradução.
+
+        Args:
+            data_dir (str): Diretório para armazenamento de dados
+            max_entries (int): Máximo de trechos mantidos
+        """
+        self.memory_file = os.path.join(data_dir, "translation_memory.jsonl")
+        self.max_entries = max_entries
+
+        self._entries = OrderedDict()
+        self._lines = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.load()
+
+    def load(self):
+        """Carrega os trechos salvos (linhas posteriores prevalecem)."""
+        try:
+            if os.path.exists(self.memory_file):
+                with open(self.memory_file, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        if line.strip():
+                            entry = json.loads(line)
+                            self._entries[entry['key']] = (entry['engine'], entry['text'])
+                            self._entries.move_to_end(entry['key'])
+                            self._lines += 1
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                logger.info(f"{len(self._entries)} trechos carregados da memória de tradução")
+        except Exception as e:
+            logger.error(f"Erro ao carregar memória de tradução: {e}")
+
+    def get(self, source_language, target_language, text, engines=ENGINES):
+        """
+        Retorna a tradução de um trecho, se já conhecida.
+
+        Args:
+            source_language (str): Idioma de origem
+            target_language (str): Idioma alvo
+            text (str): Trecho de origem
+            engines (tuple): Motores aceitos (ex: ('openai',) ignora traduções do dicionário)
+
+        Returns:
+            str: Trecho traduzido, ou None
+        """
+        key = segment_key(source_language, target_language, text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] in engines:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                outcome = 'hit'
+            else:
+                entry = None
+                self.misses += 1
+                outcome = 'miss'
+        metrics.record_cache('translation_memory', outcome)
+        return entry[1] if entry is not None else None
+
+    def put(self, source_language, target_language, segments, engine):
+        """
+        Guarda trechos traduzidos.
+
+        Args:
+            source_language (str): Idioma de origem
+            target_language (str): Idioma alvo
+            segments (list): Pares (trecho de origem, trecho traduzido)
+            engine (str): Motor que traduziu ('openai' ou 'dictionary')
+        """
+        lines = []
+        with self._lock:
+            for text, translated in segments:
+                if not text:
+                    continue
+                key = segment_key(source_language, target_language, text)
+                existing = self._entries.get(key)
+                # A tradução do dicionário não substitui a do modelo
+                if existing == (engine, translated) or (existing is not None and ENGINES.index(existing[0]) < ENGINES.index(engine)):
+                    continue
+                self._entries[key] = (engine, translated)
+                self._entries.move_to_end(key)
+                lines.append(json.dumps({'key': key, 'engine': engine, 'text': translated}, ensure_ascii=False))
+
+            if not lines:
+                return
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            try:
+                with open(self.memory_file, 'a', encoding='utf-8') as f:
+                    f.write('\n'.join(lines) + '\n')
+                self._lines += len(lines)
+            except Exception as e:
+                logger.error(f"Erro ao salvar memória de tradução: {e}")
+
+            # Linhas substituídas ou descartadas passaram do dobro dos trechos: reescrever
+            if self._lines > 2 * max(len(self._entries), 1000):
+                self._compact()
+
+    def _compact(self):
+        """Reescreve o arquivo só com os trechos mantidos (chamado com a trava)."""
+        try:
+            temp_file = self.memory_file + '.tmp'
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                for key, (engine, text) in self._entries.items():
+                    f.write(json.dumps({'key': key, 'engine': engine, 'text': text}, ensure_ascii=False) + '\n')
+            os.replace(temp_file, self.memory_file)
+            self._lines = len(self._entries)
+        except Exception as e:
+            logger.error(f"Erro ao compactar memória de tradução: {e}")
+
+    def __len__(self):
+        return len(self._entries)
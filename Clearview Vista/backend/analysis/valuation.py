@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Módulo de valuation para a Plataforma Inteligente da Clearview Capital.
+Este módulo reúne as regras puras de avaliação (fórmula de Graham e pontuação
+fundamentalista), sem dependências de rede ou de estado, para que possam ser
+usadas pelo StockAnalyzer, pelo backtest e pelos processos de triagem. As regras
+são definidas uma única vez, em forma vetorizada (evaluate_batch); as funções
+de uma ação só aplicam o lote a uma linha.
+"""
+
+import numpy as np
+
+# Colunas da matriz de fundamentals (também enviada aos processos de triagem)
+FUNDAMENTAL_FIELDS = (
+    'P/L',
+    'P/VP',
+    'ROE',
+    'Dividend Yield',
+    'Dívida/EBITDA',
+    'Margem Líquida',
+    'Margem EBITDA',
+    'Crescimento Receita (5 anos)',
+)
+
+def pack_batch(prices, fundamentals):
+    """
+    Converte preços e fundamentals em arrays compactos.
+
+    Args:
+        prices (list): Preço de referência de cada ação (None se sem cotação)
+        fundamentals (list): Indicadores fundamentalistas (dict) de cada ação
+
+    Returns:
+        tuple: (vetor de preços, matriz ações x FUNDAMENTAL_FIELDS), com NaN nos ausentes
+    """
+    matrix = np.array(
+        [[values.get(field, np.nan) for field in FUNDAMENTAL_FIELDS] for values in fundamentals],
+        dtype=float
+    ).reshape(len(fundamentals), len(FUNDAMENTAL_FIELDS))
+    return np.array(prices, dtype=float), matrix
+
+# Critérios da avaliação, na ordem em que aparecem nas listas de pontos fortes/fracos
+CRITERIA = (
+    ('strengths', 'P/L baixo, indicando possível subavaliação'),
+    ('weaknesses', 'P/L alto, indicando possível sobreavaliação'),
+    ('strengths', 'P/VP abaixo de 1, indicando possível subavaliação'),
+    ('weaknesses', 'P/VP alto, indicando possível sobreavaliação'),
+    ('strengths', 'ROE alto, indicando boa rentabilidade'),
+    ('weaknesses', 'ROE baixo, indicando rentabilidade abaixo da média'),
+    ('strengths', 'Dividend Yield atrativo'),
+    ('strengths', 'Baixo endividamento'),
+    ('weaknesses', 'Alto endividamento'),
+    ('strengths', 'Alto potencial segundo fórmula de Graham'),
+    ('strengths', 'Bom potencial segundo fórmula de Graham'),
+    ('weaknesses', 'Potencial negativo segundo fórmula de Graham'),
+    ('strengths', 'Cotada abaixo de 70% do valor justo'),
+)
+
+# Pontos de cada critério (o último não altera a pontuação)
+CRITERIA_POINTS = np.array([2, -2, 2, -1, 2, -1, 2, 1, -2, 3, 2, -2, 0])
+
+# Critérios que marcam a ação como oportunidade: alto potencial e preço abaixo de 70% do valor justo
+OPPORTUNITY_BITS = 1 << 9 | 1 << 12
+
+def _field(matrix, name, default):
+    """Coluna de um indicador, com `default` onde ele está ausente."""
+    column = matrix[:, FUNDAMENTAL_FIELDS.index(name)]
+    return np.where(np.isnan(column), default, column)
+
+def graham_batch(prices, matrix):
+    """
+    Calcula o valor justo pela fórmula de Graham para um lote de ações.
+
+    Fórmula de Graham: √(22.5 * LPA * VPA)
+    Onde:
+    - LPA = Lucro por Ação
+    - VPA = Valor Patrimonial por Ação
+
+    Args:
+        prices (np.ndarray): Preço de referência de cada ação
+        matrix (np.ndarray): Fundamentals no layout de FUNDAMENTAL_FIELDS
+
+    Returns:
+        np.ndarray: Matriz [valor justo, potencial, LPA, VPA]; os valores da
+            fórmula são arredondados aqui com NumPy e os demais em decode_graham
+    """
+    # Em uma implementação real, LPA e VPA viriam dos dados fundamentalistas;
+    # aqui são derivados dos múltiplos
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pe_ratio = _field(matrix, 'P/L', 15)
+        pb_ratio = _field(matrix, 'P/VP', 2)
+        lpa = np.where(pe_ratio > 0, prices / pe_ratio, 0.0)
+        vpa = np.where(pb_ratio > 0, prices / pb_ratio, 0.0)
+        # Fallback para o próprio preço se não for possível calcular
+        graham_formula = (lpa > 0) & (vpa > 0)
+        fair_value = np.where(graham_formula, np.sqrt(22.5 * lpa * vpa), prices)
+        potential = (fair_value - prices) / prices * 100
+
+    fair_value = np.where(graham_formula, np.round(fair_value, 2), fair_value)
+    potential = np.where(graham_formula, np.round(potential, 2), potential)
+    return np.column_stack([fair_value, potential, lpa, vpa])
+
+def criteria_batch(prices, matrix, fair_value, potential):
+    """
+    Verifica os critérios de avaliação para um lote de ações.
+
+    Args:
+        prices (np.ndarray): Preço de referência de cada ação
+        matrix (np.ndarray): Fundamentals no layout de FUNDAMENTAL_FIELDS
+        fair_value (np.ndarray): Valor justo de cada ação
+        potential (np.ndarray): Potencial de valorização (%) de cada ação
+
+    Returns:
+        tuple: (pontuação, bits dos critérios atendidos, na ordem de CRITERIA)
+    """
+    pl = _field(matrix, 'P/L', 0)
+    pvp = _field(matrix, 'P/VP', 0)
+    roe = _field(matrix, 'ROE', 0)
+    dy = _field(matrix, 'Dividend Yield', 0)
+    debt_ebitda = _field(matrix, 'Dívida/EBITDA', 0)
+
+    met = np.column_stack([
+        (pl > 0) & (pl < 10),
+        pl > 25,
+        (pvp > 0) & (pvp < 1),
+        pvp > 3,
+        roe > 15,
+        roe < 8,
+        dy > 6,
+        debt_ebitda < 1.5,
+        debt_ebitda > 3,
+        potential > 30,
+        (potential <= 30) & (potential > 15),
+        potential < -15,
+        # Ótima oportunidade: cotada a até 70% do valor justo
+        (prices > 0) & (fair_value > 0) & (prices <= 0.7 * fair_value),
+    ])
+
+    scores = met @ CRITERIA_POINTS
+    flags = met @ (1 << np.arange(len(CRITERIA), dtype=np.int64))
+    return scores, flags
+
+def evaluate_batch(prices, matrix):
+    """
+    Calcula o valor de Graham e a avaliação de um lote inteiro com NumPy.
+
+    Executado no processo filho da triagem (ou no próprio processo). O resultado
+    é compacto: valores de Graham em uma matriz e os critérios atendidos por cada
+    ação como bits de um inteiro.
+
+    Args:
+        prices (np.ndarray): Preço de referência de cada ação (NaN se sem cotação)
+        matrix (np.ndarray): Fundamentals no layout de FUNDAMENTAL_FIELDS
+
+    Returns:
+        tuple: (matriz [valor justo, potencial, LPA, VPA], pontuação, bits dos critérios)
+    """
+    quoted = ~np.isnan(prices)
+    # Sem cotação: mesmos preços padrão de calculate_graham_value (100) e evaluate_stock (0)
+    graham = graham_batch(np.where(quoted, prices, 100.0), matrix)
+    scores, flags = criteria_batch(np.where(quoted, prices, 0.0), matrix, graham[:, 0], graham[:, 1])
+    return graham, scores, flags
+
+def rating_for(score):
+    """Converte a pontuação no rating da ação."""
+    if score >= 5:
+        return 'Compra'
+    if score >= 2:
+        return 'Manter'
+    if score <= -3:
+        return 'Venda'
+    return 'Neutro'
+
+def decode_graham(row):
+    """Converte uma linha [valor justo, potencial, LPA, VPA] no dict do valor de Graham."""
+    fair_value, potential, lpa, vpa = row
+    return {
+        'fair_value': round(fair_value, 2),
+        'potential': round(potential, 2),
+        'lpa': round(lpa, 2),
+        'vpa': round(vpa, 2)
+    }
+
+def decode_results(graham, scores, flags):
+    """
+    Converte o resultado compacto de evaluate_batch nos dicts de update_portfolio.
+
+    Args:
+        graham (np.ndarray): Matriz [valor justo, potencial, LPA, VPA]
+        scores (np.ndarray): Pontuação de cada ação
+        flags (np.ndarray): Bits dos critérios atendidos
+
+    Returns:
+        list: (valor de Graham, avaliação) de cada ação
+    """
+    # Poucas combinações distintas de critérios: decodificar cada uma uma única vez
+    decoded = {}
+    results = []
+    for row, score, bits in zip(graham.tolist(), scores.tolist(), flags.tolist()):
+        criteria = decoded.get(bits)
+        if criteria is None:
+            strengths = [m for i, (kind, m) in enumerate(CRITERIA) if bits >> i & 1 and kind == 'strengths']
+            weaknesses = [m for i, (kind, m) in enumerate(CRITERIA) if bits >> i & 1 and kind == 'weaknesses']
+            criteria = decoded[bits] = (strengths, weaknesses, bool(bits & OPPORTUNITY_BITS))
+        strengths, weaknesses, opportunity = criteria
+
+        results.append((
+            decode_graham(row),
+            {
+                'rating': rating_for(score),
+                'strengths': list(strengths),
+                'weaknesses': list(weaknesses),
+                'opportunity': opportunity,
+                'score': score
+            }
+        ))
+    return results
+
+def compute_graham_value(current_price, fundamentals):
+    """
+    Calcula o valor justo de uma ação usando a fórmula de Graham (ver graham_batch).
+    
+    Args:
+        current_price (float): Preço de referência da ação
+        fundamentals (dict): Indicadores fundamentalistas
+        
+    Returns:
+        dict: Valor justo, potencial, LPA e VPA
+    """
+    prices, matrix = pack_batch([current_price], [fundamentals])
+    return decode_graham(graham_batch(prices, matrix)[0].tolist())
+
+def evaluate_fundamentals(current_price, fundamentals, graham_value):
+    """
+    Avalia uma ação com base em critérios fundamentalistas e valor de Graham (ver criteria_batch).
+    
+    Args:
+        current_price (float): Preço de referência da ação
+        fundamentals (dict): Indicadores fundamentalistas
+        graham_value (dict): Valor justo e potencial
+        
+    Returns:
+        dict: Avaliação da ação
+    """
+    prices, matrix = pack_batch([current_price], [fundamentals])
+    graham = np.array([[graham_value.get('fair_value', 0), graham_value.get('potential', 0), 0.0, 0.0]])
+    scores, flags = criteria_batch(prices, matrix, graham[:, 0], graham[:, 1])
+    return decode_results(graham, scores, flags)[0][1]
@@ -8,17 +8,35 @@ o frontend e o backend do sistema.
 """
 
 import os
+import re
 import sys
 import json
+import time
+import threading
 from datetime import datetime
 import logging
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, g
 from flask_cors import CORS
 
 # Adicionar diretório pai ao path para importar módulos
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from analysis.stock_analyzer import StockAnalyzer
 from analysis.graham_formula import calculate_brazilian_graham, calculate_graham_score
+from analysis.backtester import Backtester
+from analysis.correlation import CorrelationEngine
+from analysis.risk_metrics import RiskMetrics
+from analysis.search_index import SearchIndex
+from analysis.listing_view import ListingView
+from analysis.event_stream import format_event
+from analysis.instrumentation import metrics
+from analysis.jobs import JobManager
+from analysis.market_data import CHART_URL, fetch_chart
+from analysis.market_overview import MarketOverview, ChartProvider, FixtureProvider
+from analysis.news_store import NewsStore
+from analysis.report_cache import content_hash
+from analysis.ai_integration import AIIntegration
+from http_cache import ResponseCache
+from admission import AdmissionController
 
 # Configuração de logging
 logging.basicConfig(
@@ -36,9 +54,162 @@ app = Flask(__name__)
 CORS(app)  # Habilitar CORS para todas as rotas
 
 # Inicializar analisador de ações
-data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+data_dir = os.environ.get('CLEARVIEW_DATA_DIR') or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
 analyzer = StockAnalyzer(data_dir=data_dir)
 
+# Matriz de correlação mantida incrementalmente sobre o histórico do analisador
+correlation_engine = CorrelationEngine(analyzer.history)
+
+# Métricas de risco (volatilidade, drawdown, beta) mantidas sobre o mesmo histórico
+risk_metrics = RiskMetrics(analyzer.history, benchmarks=analyzer.benchmark_indices)
+
+# Respostas condicionais (ETag/304) e comprimidas das rotas consultadas periodicamente
+response_cache = ResponseCache()
+
+# Listagens paginadas (carteira, favoritas), recriadas a cada nova versão dos dados
+listing_views = {}
+
+# Parâmetros que ativam projeção/paginação em /api/portfolio e /api/favorites
+LISTING_PARAMS = ('fields', 'sort', 'limit', 'cursor')
+
+# Intervalo (segundos) entre comentários de keep-alive nas conexões SSE
+STREAM_KEEPALIVE_SECONDS = 15
+
+# Índice de busca, reconstruído quando os dados das ações mudam
+search_index = SearchIndex()
+search_index_lock = threading.Lock()
+
+# Limite de ações por requisição em /api/stocks/batch
+MAX_BATCH_SYMBOLS = 300
+
+# Máximo de pares por lista em /api/correlation (k)
+MAX_CORRELATION_PAIRS = 50
+
+# Formato aceito para códigos de ações (ex: PETR4, BRK-B, ^BVSP)
+SYMBOL_PATTERN = re.compile(r'^[A-Z0-9^.\-]{1,12}$')
+
+# Limites por cliente (fichas/s e rajada) e de requisições pesadas simultâneas
+admission = AdmissionController(
+    rate=float(os.environ.get('CLEARVIEW_RATE_LIMIT', 20)),
+    burst=float(os.environ.get('CLEARVIEW_RATE_BURST', 40)),
+    heavy_cost=float(os.environ.get('CLEARVIEW_HEAVY_COST', 5)),
+    heavy_limit=int(os.environ.get('CLEARVIEW_HEAVY_CONCURRENCY', 2))
+)
+
+# Rotas que buscam dados externos ou recalculam a carteira inteira
+HEAVY_ENDPOINTS = {'get_report', 'stream_report', 'run_backtest'}
+
+# Rotas de monitoramento, nunca limitadas
+ADMISSION_EXEMPT = {'health_check', 'get_metrics'}
+
+# Tarefas em segundo plano (reconstrução da carteira, sincronização do risco), consultadas em /api/jobs/<id>
+jobs = JobManager()
+
+# Segundos que /api/portfolio?force_update=true aguarda a reconstrução antes de responder 202 com a tarefa
+PORTFOLIO_UPDATE_WAIT = float(os.environ.get('CLEARVIEW_PORTFOLIO_UPDATE_WAIT', 30))
+
+# Identificar clientes pelo primeiro endereço de X-Forwarded-For (somente atrás de um proxy confiável)
+TRUST_FORWARDED = os.environ.get('CLEARVIEW_TRUST_FORWARDED', 'false').lower() == 'true'
+
+def collect_platform_metrics():
+    """Métricas dos caches e do streaming, lidas a cada exportação de /api/metrics."""
+    return [
+        ('clearview_report_cache_hits_total', 'counter', 'Relatórios servidos do cache.', analyzer.reports.hits),
+        ('clearview_report_cache_misses_total', 'counter', 'Relatórios gerados por mudança nos dados.', analyzer.reports.misses),
+        ('clearview_stock_views_version', 'gauge', 'Versão atual das visões materializadas.', analyzer.views.version),
+        ('clearview_stream_subscribers', 'gauge', 'Clientes conectados a /api/stream.', analyzer.quote_stream.subscribers),
+        ('clearview_stream_dropped_total', 'counter', 'Clientes lentos descartados do streaming.', analyzer.quote_stream.dropped),
+        ('clearview_admission_rate_limited_total', 'counter', 'Requisições rejeitadas pelo limite por cliente.', admission.rate_limited),
+        ('clearview_admission_overloaded_total', 'counter', 'Requisições pesadas rejeitadas por falta de vaga.', admission.overloaded),
+        ('clearview_heavy_requests_in_flight', 'gauge', 'Requisições pesadas em andamento.', admission.heavy_in_flight),
+        ('clearview_jobs_pending', 'gauge', 'Tarefas em segundo plano na fila ou em execução.', jobs.running)
+    ]
+
+metrics.add_collector(collect_platform_metrics)
+
+@app.before_request
+def start_request_metrics():
+    """Marca o início da requisição (rota pelo padrão, não pelo caminho, para limitar as séries)."""
+    g.metrics_route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    g.metrics_state = metrics.start_request(g.metrics_route)
+
+@app.after_request
+def record_response_metrics(response):
+    """Guarda o status e o tamanho do corpo (desconhecido em respostas por streaming)."""
+    g.metrics_status = response.status_code
+    g.metrics_size = None if response.is_streamed else response.calculate_content_length()
+    return response
+
+@app.teardown_request
+def finish_request_metrics(error=None):
+    """Registra latência, status e tamanho da requisição (também quando ela falha)."""
+    state = g.pop('metrics_state', None)
+    if state is not None:
+        metrics.finish_request(state, g.metrics_route, request.method, g.get('metrics_status', 500), g.get('metrics_size'))
+
+def is_heavy_request():
+    """Verifica se a requisição atual ocupa uma vaga de requisição pesada."""
+    if request.endpoint in HEAVY_ENDPOINTS:
+        return True
+    return request.endpoint == 'get_portfolio' and request.args.get('force_update', 'false').lower() == 'true'
+
+def client_id():
+    """Identificação do cliente usada nos limites de taxa."""
+    if TRUST_FORWARDED and request.access_route:
+        return request.access_route[0]
+    return request.remote_addr or 'unknown'
+
+def rejection_message(reason, retry_after):
+    """Mensagem de erro das respostas 429."""
+    message = ('Servidor ocupado com outras requisições pesadas' if reason == 'overloaded'
+               else 'Limite de requisições excedido')
+    return f"{message}; tente novamente em {retry_after}s"
+
+def too_many_requests(reason, retry_after):
+    """Resposta 429 com o tempo sugerido para nova tentativa."""
+    response = jsonify({
+        'status': 'error',
+        'message': rejection_message(reason, retry_after)
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+@app.before_request
+def admit_request():
+    """Rejeita de imediato (429) o excesso de requisições, antes de ocupar o worker."""
+    if request.method == 'OPTIONS' or request.endpoint in ADMISSION_EXEMPT:
+        return None
+    heavy = is_heavy_request()
+    rejected = admission.admit(client_id(), heavy)
+    if rejected is not None:
+        return too_many_requests(*rejected)
+    if heavy:
+        g.heavy_started = time.perf_counter()
+    return None
+
+@app.after_request
+def defer_heavy_release(response):
+    """Em respostas por streaming (SSE), a vaga pesada só é liberada quando o corpo termina de ser enviado."""
+    started = g.pop('heavy_started', None) if response.is_streamed else None
+    if started is not None:
+        response.call_on_close(lambda: admission.release(time.perf_counter() - started))
+    return response
+
+@app.teardown_request
+def release_heavy_slot(error=None):
+    """Libera a vaga da requisição pesada (também quando ela falha)."""
+    started = g.pop('heavy_started', None)
+    if started is not None:
+        admission.release(time.perf_counter() - started)
+
+def load_saved_portfolio():
+    """Carrega a carteira salva em arquivo, criando uma nova se não existir."""
+    portfolio = analyzer.load_portfolio()
+    if portfolio is None:
+        portfolio = analyzer.update_portfolio()
+    return portfolio
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Endpoint para verificar se a API está funcionando."""
@@ -47,6 +218,11 @@ def health_check():
         'timestamp': datetime.now().isoformat()
     })
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Endpoint com as métricas do servidor no formato texto do Prometheus."""
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/api/stocks', methods=['GET'])
 def get_stocks():
     """Endpoint para obter lista de ações monitoradas."""
@@ -54,7 +230,8 @@ def get_stocks():
         br_stocks = analyzer.br_stocks
         us_stocks = analyzer.us_stocks
         
-        return jsonify({
+        # A própria lista de ações é o carimbo de versão
+        return response_cache.respond(','.join(br_stocks) + '|' + ','.join(us_stocks), lambda: {
             'status': 'success',
             'data': {
                 'br_stocks': br_stocks,
@@ -69,53 +246,367 @@ def get_stocks():
             'message': str(e)
         }), 500
 
+def normalize_symbol(symbol):
+    """
+    Valida o código de uma ação recebido na URL.
+    
+    Args:
+        symbol (str): Código recebido
+        
+    Returns:
+        str: Código em maiúsculas
+        
+    Raises:
+        ValueError: Se o código não segue SYMBOL_PATTERN
+    """
+    symbol = symbol.strip().upper()
+    if not SYMBOL_PATTERN.match(symbol):
+        raise ValueError(f"Código de ação inválido: {symbol}")
+    return symbol
+
+def resolve_view(symbol, region):
+    """
+    Retorna a visão de uma ação, buscando a cotação só se ela não foi materializada (ou venceu).
+    
+    Args:
+        symbol (str): Código normalizado
+        region (str): Região da ação (BR ou US)
+        
+    Returns:
+        dict: Visão publicada, ou None se a cotação não foi encontrada
+    """
+    view = analyzer.current_view(symbol)
+    if view is None:
+        view = analyzer.materialize_view(symbol, region)
+    return view
+
+def stock_not_found(symbol):
+    """Resposta 404 para uma ação sem cotação (inexistente ou com o provedor indisponível)."""
+    return jsonify({
+        'status': 'error',
+        'message': f"Cotação de {symbol} não encontrada"
+    }), 404
+
 @app.route('/api/stock/<symbol>', methods=['GET'])
 def get_stock(symbol):
     """Endpoint para obter dados de uma ação específica."""
     try:
+        symbol = normalize_symbol(symbol)
         region = request.args.get('region', 'BR')
         
-        # Verificar se já temos dados da ação
-        stock_data = analyzer.stocks_data.get(symbol.upper(), {})
+        # Visão materializada pelo pipeline; só é calculada aqui se a ação nunca foi analisada
+        view = resolve_view(symbol, region)
+        if view is None:
+            return stock_not_found(symbol)
+        
+        return jsonify({
+            'status': 'success',
+            'data': with_risk(symbol, view)
+        })
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Erro ao obter dados da ação {symbol}: {e}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+def with_risk(symbol, view):
+    """
+    Acrescenta à visão de uma ação as métricas de risco do histórico.
+    
+    As métricas são sincronizadas em segundo plano (submit_risk_sync), não aqui.
+    Ações fora do universo indexado (buscadas sob demanda, ou todas antes da
+    primeira sincronização) não recebem a chave 'risk'.
+    
+    Args:
+        symbol (str): Código da ação
+        view (dict): Visão publicada
         
-        # Se não temos dados ou eles estão desatualizados, buscar novos
-        if not stock_data or 'last_update' not in stock_data:
-            stock_data = analyzer.fetch_stock_data(symbol.upper(), region)
-            analyzer.stocks_data[symbol.upper()] = stock_data
-            analyzer.save_data()
+    Returns:
+        dict: Visão com 'risk' (None se a ação ainda não tem histórico)
+    """
+    if not risk_metrics.symbols:
+        submit_risk_sync()
+    if symbol not in risk_metrics:
+        return view
+    return dict(view, risk=risk_metrics.metrics_for(symbol))
+
+def submit_risk_sync():
+    """Agenda a sincronização das métricas de risco na thread de tarefas (uma por vez)."""
+    return jobs.submit('risk-sync', lambda progress: risk_metrics.sync(analyzer.get_regions()))
+
+def schedule_risk_sync(previous, published):
+    """
+    Sincroniza as métricas de risco em segundo plano quando são publicadas visões
+    de ações monitoradas (cujas barras novas acabaram de ser gravadas no histórico).
+    
+    Args:
+        previous (dict): Visões anteriores por ação
+        published (list): Visões publicadas
+    """
+    if any(analyzer.is_monitored(view['symbol']) for view in published):
+        submit_risk_sync()
+
+analyzer.views.add_listener(schedule_risk_sync)
+
+def normalize_batch_symbols(symbols):
+    """
+    Valida a lista de ações de /api/stocks/batch.
+    
+    Args:
+        symbols (list): Códigos recebidos
         
-        # Buscar fundamentals
-        fundamentals = analyzer.fetch_fundamentals(symbol.upper(), region)
+    Returns:
+        list: Códigos sem repetição, em maiúsculas
         
-        # Calcular valor de Graham
-        graham_value = analyzer.calculate_graham_value(symbol.upper(), fundamentals)
+    Raises:
+        ValueError: Se a lista está vazia ou excede MAX_BATCH_SYMBOLS
+    """
+    symbols = list(dict.fromkeys(str(s).strip().upper() for s in symbols if str(s).strip()))
+    if not symbols:
+        raise ValueError('Nenhuma ação informada')
+    if len(symbols) > MAX_BATCH_SYMBOLS:
+        raise ValueError(f'Máximo de {MAX_BATCH_SYMBOLS} ações por requisição')
+    return symbols
+
+def plan_batch(symbols, region):
+    """
+    Resolve, numa passada pelas visões materializadas, as ações já disponíveis.
+    
+    Args:
+        symbols (list): Códigos normalizados
+        region (str): Região padrão das ações desconhecidas
         
-        # Avaliar ação
-        evaluation = analyzer.evaluate_stock(symbol.upper(), fundamentals, graham_value)
+    Returns:
+        tuple: (resultados por ação, ações a buscar, região de cada ação a buscar)
+    """
+    results = {}
+    missing = []
+    for symbol in symbols:
+        if not SYMBOL_PATTERN.match(symbol):
+            results[symbol] = {'symbol': symbol, 'status': 'invalid', 'data': None}
+            continue
+        view = analyzer.current_view(symbol)
+        if view is None:
+            missing.append(symbol)
+        else:
+            results[symbol] = {'symbol': symbol, 'status': 'cached', 'data': view}
+    
+    known_regions = analyzer.get_regions() if missing else {}
+    return results, missing, {s: known_regions.get(s, region) for s in missing}
+
+def finish_batch(symbols, results, missing, fetched):
+    """
+    Completa os resultados do lote com as ações buscadas e as métricas de risco.
+    
+    Args:
+        symbols (list): Códigos normalizados, na ordem pedida
+        results (dict): Resultados de plan_batch
+        missing (list): Ações buscadas
+        fetched (dict|Exception): Visões publicadas das ações buscadas, ou o erro da busca
+        
+    Returns:
+        dict: Payload de /api/stocks/batch
+    """
+    if isinstance(fetched, Exception):
+        logger.error(f"Erro ao buscar ações em lote: {fetched}")
+        for symbol in missing:
+            results[symbol] = {'symbol': symbol, 'status': 'error', 'message': str(fetched), 'data': None}
+    else:
+        for symbol in missing:
+            if fetched.get(symbol) is None:
+                results[symbol] = {'symbol': symbol, 'status': 'not_found', 'data': None}
+            else:
+                results[symbol] = {'symbol': symbol, 'status': 'fetched', 'data': fetched[symbol]}
+    
+    for result in results.values():
+        if result['data'] is not None:
+            result['data'] = with_risk(result['symbol'], result['data'])
+    
+    stocks = [results[symbol] for symbol in symbols]
+    return {
+        'stocks': stocks,
+        'requested': len(stocks),
+        'cached': sum(1 for r in stocks if r['status'] == 'cached'),
+        'fetched': sum(1 for r in stocks if r['status'] == 'fetched'),
+        'failed': sum(1 for r in stocks if r['status'] in ('invalid', 'not_found', 'error'))
+    }
+
+@app.route('/api/stocks/batch', methods=['GET', 'POST'])
+def get_stocks_batch():
+    """Endpoint para obter várias ações em uma única requisição (?symbols=A,B ou JSON {"symbols": [...]})."""
+    try:
+        if request.method == 'POST':
+            symbols = (request.get_json(silent=True) or {}).get('symbols', [])
+        else:
+            symbols = request.args.get('symbols', '').split(',')
+        region = request.args.get('region', 'BR')
+        
+        symbols = normalize_batch_symbols(symbols)
+        
+        # Uma passada pelas visões materializadas; as ausentes são buscadas em paralelo e publicadas juntas
+        results, missing, regions = plan_batch(symbols, region)
+        
+        # Cada ação a buscar custa uma ficha do cliente
+        rejected = admission.charge(client_id(), len(missing))
+        if rejected is not None:
+            return too_many_requests(*rejected)
+        
+        try:
+            fetched = analyzer.materialize_views(missing, regions) if missing else {}
+        except Exception as e:
+            fetched = e
         
         return jsonify({
             'status': 'success',
-            'data': {
-                'symbol': symbol.upper(),
-                'name': stock_data.get('name', ''),
-                'price': stock_data.get('price', 0),
-                'change_1d': stock_data.get('change_1d', 0),
-                'change_1y': stock_data.get('change_1y', 0),
-                'currency': stock_data.get('currency', 'BRL'),
-                'exchange': stock_data.get('exchange', ''),
-                'fundamentals': fundamentals,
-                'graham_value': graham_value,
-                'evaluation': evaluation,
-                'last_update': datetime.now().isoformat()
-            }
+            'data': finish_batch(symbols, results, missing, fetched)
         })
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
     except Exception as e:
-        logger.error(f"Erro ao obter dados da ação {symbol}: {e}")
+        logger.error(f"Erro ao obter ações em lote: {e}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+def parse_stream_symbols(raw):
+    """
+    Valida o parâmetro `symbols` de /api/stream.
+    
+    Args:
+        raw (str): Códigos separados por vírgula
+        
+    Returns:
+        list: Códigos em maiúsculas (vazia para todas as ações)
+        
+    Raises:
+        ValueError: Para códigos inválidos ou acima de MAX_BATCH_SYMBOLS
+    """
+    symbols = [s.strip().upper() for s in (raw or '').split(',') if s.strip()]
+    invalid = [s for s in symbols if not SYMBOL_PATTERN.match(s)]
+    if invalid:
+        raise ValueError(f"Ações inválidas: {', '.join(invalid)}")
+    if len(symbols) > MAX_BATCH_SYMBOLS:
+        raise ValueError(f'Máximo de {MAX_BATCH_SYMBOLS} ações por conexão')
+    return symbols
+
+def quote_snapshot_event(symbols):
+    """Quadro SSE com o instantâneo das cotações (todas as ações se `symbols` é vazia)."""
+    snapshot = []
+    for symbol in symbols or analyzer.views.symbols():
+        view = analyzer.views.get(symbol)
+        if view is not None:
+            snapshot.append({
+                'symbol': symbol,
+                'price': view.get('price'),
+                'change_1d': view.get('change_1d'),
+                'rating': view.get('evaluation', {}).get('rating'),
+                'version': view.get('version')
+            })
+    return format_event({'quotes': snapshot}, event='snapshot', event_id=analyzer.views.version)
+
+# Quadro enviado a um cliente descartado por lentidão
+DROPPED_EVENT = format_event({'reason': 'Cliente lento: reconecte para receber um novo instantâneo'}, event='dropped')
+
+@app.route('/api/stream', methods=['GET'])
+def stream_quotes():
+    """Endpoint SSE com as variações de preço, change_1d e rating das ações (?symbols=A,B; padrão: todas)."""
+    try:
+        symbols = parse_stream_symbols(request.args.get('symbols', ''))
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    
+    stream = analyzer.quote_stream
+    subscription = stream.subscribe(symbols or None)
+    
+    def generate():
+        try:
+            yield "retry: 5000\n\n"
+            
+            # Instantâneo inicial; depois disso, somente variações
+            yield quote_snapshot_event(symbols)
+            
+            while True:
+                frame = subscription.next(timeout=STREAM_KEEPALIVE_SECONDS)
+                if subscription.dropped:
+                    yield DROPPED_EVENT
+                    return
+                yield frame if frame is not None else ": keep-alive\n\n"
+        finally:
+            stream.unsubscribe(subscription)
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+def submit_portfolio_update():
+    """
+    Agenda a reconstrução da carteira na thread de tarefas.
+    
+    Returns:
+        tuple: (tarefa, True se já havia uma reconstrução na fila ou em execução)
+    """
+    return jobs.submit(
+        'portfolio-update',
+        lambda progress: analyzer.update_portfolio(progress=progress),
+        describe=lambda portfolio: {
+            'last_update': portfolio['last_update'],
+            'total_score': portfolio['total_score'],
+            'stocks': [stock['symbol'] for stock in portfolio['stocks']]
+        }
+    )
+
+def job_accepted(job, existing):
+    """Resposta 202 com o estado da tarefa e o endereço para acompanhá-la."""
+    response = jsonify({
+        'status': 'success',
+        'data': dict(job.to_dict(), deduplicated=existing)
+    })
+    response.status_code = 202
+    response.headers['Location'] = f"/api/jobs/{job.id}"
+    return response
+
+@app.route('/api/jobs/portfolio-update', methods=['POST'])
+def create_portfolio_update_job():
+    """Endpoint para reconstruir a carteira em segundo plano (retorna a tarefa, sem aguardar)."""
+    try:
+        job, existing = submit_portfolio_update()
+        return job_accepted(job, existing)
+    except Exception as e:
+        logger.error(f"Erro ao agendar atualização da carteira: {e}")
         return jsonify({
             'status': 'error',
             'message': str(e)
         }), 500
 
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Endpoint para consultar o estado e o progresso de uma tarefa."""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({
+            'status': 'error',
+            'message': f"Tarefa {job_id} não encontrada"
+        }), 404
+    
+    return jsonify({
+        'status': 'success',
+        'data': job.to_dict()
+    })
+
 @app.route('/api/portfolio', methods=['GET'])
 def get_portfolio():
     """Endpoint para obter a carteira atual."""
@@ -124,23 +615,60 @@ def get_portfolio():
         force_update = request.args.get('force_update', 'false').lower() == 'true'
         
         if force_update:
-            portfolio = analyzer.update_portfolio()
+            # Atualizações forçadas simultâneas aguardam a mesma reconstrução, por tempo limitado
+            job, existing = submit_portfolio_update()
+            try:
+                portfolio = job.wait(timeout=PORTFOLIO_UPDATE_WAIT)
+            except TimeoutError:
+                return job_accepted(job, existing)
         else:
-            # Tentar carregar a carteira do arquivo
-            portfolio_file = os.path.join(data_dir, "portfolio.json")
-            if os.path.exists(portfolio_file):
-                with open(portfolio_file, 'r', encoding='utf-8') as f:
-                    portfolio = json.load(f)
-            else:
-                # Se não existir, criar uma nova
-                portfolio = analyzer.update_portfolio()
+            # Carregar a carteira do arquivo (ou criar uma nova, se não existir)
+            portfolio = load_saved_portfolio()
+        
+        if not any(request.args.get(param) for param in LISTING_PARAMS):
+            return response_cache.respond(portfolio['last_update'], lambda: {
+                'status': 'success',
+                'data': portfolio
+            }, last_modified=portfolio['last_update'])
+        
+        # Projeção, ordenação e paginação das ações da carteira
+        stocks, pagination = get_listing_page('portfolio', portfolio['last_update'], lambda: portfolio['stocks'])
+        return response_cache.respond(portfolio['last_update'], lambda: {
+            'status': 'success',
+            'data': dict(portfolio, stocks=stocks),
+            'pagination': pagination
+        }, last_modified=portfolio['last_update'])
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Erro ao obter carteira: {e}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@app.route('/api/portfolio/risk', methods=['GET'])
+def get_portfolio_risk():
+    """Endpoint para obter as métricas de risco agregadas da carteira atual."""
+    try:
+        portfolio = load_saved_portfolio()
+        symbols = [stock['symbol'] for stock in portfolio.get('stocks', [])]
+        
+        risk_metrics.sync(analyzer.get_regions())
         
         return jsonify({
             'status': 'success',
-            'data': portfolio
+            'data': {
+                'portfolio': risk_metrics.portfolio_metrics(symbols),
+                'stocks': {symbol: risk_metrics.metrics_for(symbol) for symbol in symbols},
+                'last_update': portfolio.get('last_update')
+            }
         })
     except Exception as e:
-        logger.error(f"Erro ao obter carteira: {e}")
+        logger.error(f"Erro ao calcular risco da carteira: {e}")
         return jsonify({
             'status': 'error',
             'message': str(e)
@@ -150,12 +678,28 @@ def get_portfolio():
 def get_favorites():
     """Endpoint para obter as ações favoritas."""
     try:
-        favorites = analyzer.get_favorites()
+        # As favoritas derivam da carteira salva: mesma versão
+        portfolio = analyzer.load_portfolio()
+        last_update = portfolio.get('last_update') if portfolio else None
         
-        return jsonify({
+        if not any(request.args.get(param) for param in LISTING_PARAMS):
+            return response_cache.respond(last_update or 'empty', lambda: {
+                'status': 'success',
+                'data': analyzer.get_favorites()
+            }, last_modified=last_update)
+        
+        # Projeção, ordenação e paginação das favoritas
+        favorites, pagination = get_listing_page('favorites', last_update or 'empty', analyzer.get_favorites)
+        return response_cache.respond(last_update or 'empty', lambda: {
             'status': 'success',
-            'data': favorites
-        })
+            'data': favorites,
+            'pagination': pagination
+        }, last_modified=last_update)
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
     except Exception as e:
         logger.error(f"Erro ao obter favoritas: {e}")
         return jsonify({
@@ -163,51 +707,331 @@ def get_favorites():
             'message': str(e)
         }), 500
 
+def report_stock(view):
+    """Dados de uma ação que entram no relatório (e no seu hash de conteúdo)."""
+    return {
+        'symbol': view['symbol'],
+        'name': view.get('name', ''),
+        'price': view.get('price', 0),
+        'change_1d': view.get('change_1d', 0),
+        'fundamentals': view.get('fundamentals', {}),
+        'graham_value': view.get('graham_value', {}),
+        'evaluation': view.get('evaluation', {})
+    }
+
+def build_report(view):
+    """
+    Monta o relatório de uma ação a partir da sua visão materializada.
+    
+    O texto vem do cache de relatórios, indexado pelo hash dos dados da ação:
+    só é gerado de novo quando cotação, fundamentals ou avaliação mudam.
+    
+    Args:
+        view (dict): Visão publicada da ação
+        
+    Returns:
+        tuple: (payload de /api/report/<symbol>, hash de conteúdo do relatório)
+    """
+    stock = report_stock(view)
+    report, report_hash, _ = analyzer.render_report(stock)
+    return {
+        'report': report,
+        'stock': stock
+    }, report_hash
+
 @app.route('/api/report/<symbol>', methods=['GET'])
 def get_report(symbol):
     """Endpoint para gerar relatório de uma ação."""
     try:
+        symbol = normalize_symbol(symbol)
         region = request.args.get('region', 'BR')
         
-        # Buscar dados da ação
-        stock_data = analyzer.fetch_stock_data(symbol.upper(), region)
-        fundamentals = analyzer.fetch_fundamentals(symbol.upper(), region)
-        graham_value = analyzer.calculate_graham_value(symbol.upper(), fundamentals)
-        evaluation = analyzer.evaluate_stock(symbol.upper(), fundamentals, graham_value)
-        
-        # Montar objeto com todos os dados
-        stock = {
-            'symbol': symbol.upper(),
-            'name': stock_data.get('name', ''),
-            'price': stock_data.get('price', 0),
-            'change_1d': stock_data.get('change_1d', 0),
-            'fundamentals': fundamentals,
-            'graham_value': graham_value,
-            'evaluation': evaluation
-        }
+        # Dados da visão materializada; só são buscados se a ação nunca foi analisada
+        view = resolve_view(symbol, region)
+        if view is None:
+            return stock_not_found(symbol)
+        
+        data, report_hash = build_report(view)
+        
+        # O hash do conteúdo é a versão: clientes com o relatório atual recebem 304
+        return response_cache.respond(report_hash, lambda: {
+            'status': 'success',
+            'data': data
+        })
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Erro ao gerar relatório para {symbol}: {e}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+# Tipo, no cache de relatórios, dos relatórios gerados pela IA
+AI_REPORT_KIND = 'ai'
+
+def plan_report_stream(view):
+    """
+    Prepara o relatório em streaming de uma ação.
+    
+    Args:
+        view (dict): Visão publicada da ação
+        
+    Returns:
+        tuple: (dados da ação, hash de conteúdo, relatório da IA já em cache ou None)
+    """
+    stock = report_stock(view)
+    key = content_hash(stock, AI_REPORT_KIND)
+    entry = analyzer.reports.get(key)
+    return stock, key, entry['report'] if entry is not None else None
+
+def report_stream_fallback(stock):
+    """Quadros SSE com o relatório simples (sem a IA ou quando ela falha antes do primeiro trecho)."""
+    report, report_hash, _ = analyzer.render_report(stock)
+    return [
+        format_event({'text': report}, event='token'),
+        format_event({'hash': report_hash, 'source': 'template'}, event='done')
+    ]
+
+def report_stream_finish(stock, key, parts):
+    """Guarda o relatório gerado no cache de relatórios e retorna o quadro SSE final."""
+    analyzer.reports.put(stock, ''.join(parts), kind=AI_REPORT_KIND)
+    return format_event({'hash': key, 'source': 'openai'}, event='done')
+
+def report_stream_failed(symbol, stock, parts, error):
+    """Quadros SSE após uma falha da IA: relatório simples, ou erro se parte do texto já foi enviada."""
+    logger.error(f"Erro no relatório em streaming de {symbol}: {error}")
+    if not parts:
+        return report_stream_fallback(stock)
+    return [format_event({'message': str(error)}, event='error')]
+
+@app.route('/api/report/<symbol>/stream', methods=['GET'])
+def stream_report(symbol):
+    """
+    Endpoint SSE com o relatório da IA de uma ação, trecho a trecho.
+    
+    Eventos: `start` (ação e hash), `token` (trecho do texto) e, ao final, `done`
+    (hash e origem: 'cache', 'openai' ou 'template') ou `error`. Relatórios já
+    gerados para os mesmos dados vêm do cache de relatórios em um único trecho.
+    """
+    try:
+        symbol = normalize_symbol(symbol)
+        region = request.args.get('region', 'BR')
+        
+        view = resolve_view(symbol, region)
+        if view is None:
+            return stock_not_found(symbol)
+        
+        stock, key, cached = plan_report_stream(view)
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Erro ao gerar relatório para {symbol}: {e}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+    
+    def generate():
+        yield format_event({'symbol': stock['symbol'], 'hash': key}, event='start')
+        
+        if cached is not None:
+            yield format_event({'text': cached}, event='token')
+            yield format_event({'hash': key, 'source': 'cache'}, event='done')
+            return
+        if not ai.use_openai:
+            yield from report_stream_fallback(stock)
+            return
+        
+        parts = []
+        try:
+            for text in ai.stream_stock_report(stock, stock['fundamentals'], stock['evaluation']):
+                parts.append(text)
+                yield format_event({'text': text}, event='token')
+        except Exception as e:
+            yield from report_stream_failed(symbol, stock, parts, e)
+            return
+        yield report_stream_finish(stock, key, parts)
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/api/backtest', methods=['GET'])
+def run_backtest():
+    """Endpoint para executar o backtest da regra de seleção da carteira."""
+    try:
+        start = request.args.get('start', None)
+        end = request.args.get('end', None)
+        frequency = request.args.get('frequency', 'monthly')
+        cost_bps = float(request.args.get('cost_bps', 0))
+        symbols = request.args.get('symbols', None)
+        if symbols:
+            symbols = [s.strip().upper() for s in symbols.split(',') if s.strip()]
+        
+        result = Backtester(analyzer).run(
+            start=start,
+            end=end,
+            frequency=frequency,
+            symbols=symbols,
+            cost_bps=cost_bps
+        )
+        
+        # A curva completa é opcional para manter a resposta enxuta
+        if request.args.get('curve', 'true').lower() != 'true':
+            result.pop('equity_curve', None)
+        
+        return jsonify({
+            'status': 'success',
+            'data': result
+        })
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Erro ao executar backtest: {e}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+def parse_count(name, default, maximum):
+    """
+    Lê um parâmetro inteiro positivo da requisição atual (ex: `limit`, `k`).
+    
+    Args:
+        name (str): Nome do parâmetro
+        default (int): Valor usado quando o parâmetro não é informado
+        maximum (int): Maior valor aceito (valores acima são reduzidos a ele)
+        
+    Returns:
+        int: Valor entre 1 e maximum
+        
+    Raises:
+        ValueError: Se o parâmetro não é um inteiro positivo
+    """
+    raw = request.args.get(name, '').strip()
+    if not raw:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ValueError(f"O parâmetro {name} deve ser um número inteiro: {raw}")
+    if value <= 0:
+        raise ValueError(f"O parâmetro {name} deve ser positivo")
+    return min(value, maximum)
+
+def parse_limit(default, maximum):
+    """Lê o parâmetro `limit` da requisição atual (ver parse_count)."""
+    return parse_count('limit', default, maximum)
+
+@app.route('/api/correlation', methods=['GET'])
+def get_correlation():
+    """Endpoint para obter os pares mais e menos correlacionados de uma ação ou da carteira."""
+    try:
+        symbol = request.args.get('symbol', None)
+        k = parse_count('k', 5, MAX_CORRELATION_PAIRS)
         
-        # Gerar relatório
-        report = analyzer.generate_report(stock)
+        # Incorporar barras novas do histórico (no-op se nada mudou)
+        correlation_engine.sync(list(analyzer.get_regions()))
+        
+        if symbol:
+            symbol = symbol.upper()
+            if symbol not in correlation_engine.symbols:
+                return jsonify({
+                    'status': 'error',
+                    'message': f'Ação {symbol} não monitorada'
+                }), 404
+            pairs = correlation_engine.top_pairs(symbol=symbol, k=k)
+        else:
+            # Sem ação especificada, usar a carteira atual
+            portfolio = load_saved_portfolio()
+            pairs = correlation_engine.top_pairs(
+                symbols=[stock['symbol'] for stock in portfolio.get('stocks', [])],
+                k=k
+            )
         
         return jsonify({
             'status': 'success',
             'data': {
-                'report': report,
-                'stock': stock
+                'symbol': symbol,
+                'scope': 'symbol' if symbol else 'portfolio',
+                'most_correlated': pairs['most_correlated'],
+                'least_correlated': pairs['least_correlated'],
+                'as_of': correlation_engine.last_date
             }
         })
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
     except Exception as e:
-        logger.error(f"Erro ao gerar relatório para {symbol}: {e}")
+        logger.error(f"Erro ao calcular correlações: {e}")
         return jsonify({
             'status': 'error',
             'message': str(e)
         }), 500
 
+def get_listing_page(name, version, load_items):
+    """
+    Retorna a página pedida (fields, sort, limit, cursor) de uma listagem.
+    
+    Args:
+        name (str): Nome da listagem
+        version (str): Versão atual dos dados
+        load_items (callable): Função que carrega os itens (só chamada em nova versão)
+        
+    Returns:
+        tuple: (itens da página, informações de paginação)
+    """
+    view = listing_views.get(name)
+    if view is None or view.version != version:
+        view = listing_views[name] = ListingView(load_items(), version)
+    return view.page(
+        fields=request.args.get('fields'),
+        sort=request.args.get('sort'),
+        limit=request.args.get('limit'),
+        cursor=request.args.get('cursor')
+    )
+
+def get_search_index():
+    """Retorna o índice de busca, reconstruindo-o se stocks_data mudou desde a última construção."""
+    with search_index_lock:
+        version = analyzer.data_version
+        if search_index.version != version:
+            regions = analyzer.get_regions()
+            entries = []
+            for symbol, stock_data in list(analyzer.stocks_data.items()):
+                if not stock_data:
+                    continue
+                view = analyzer.views.get(symbol)
+                entries.append({
+                    'symbol': symbol,
+                    'name': stock_data.get('name', ''),
+                    'long_name': stock_data.get('long_name', ''),
+                    'price': stock_data.get('price', 0),
+                    'change': stock_data.get('change_1d', 0),
+                    'region': regions.get(symbol) or (view or {}).get('region', 'BR')
+                })
+            search_index.build(entries, version=version)
+    return search_index
+
 @app.route('/api/search', methods=['GET'])
 def search_stocks():
     """Endpoint para pesquisar ações por código ou nome."""
     try:
         query = request.args.get('q', '').upper()
+        limit = parse_limit(10, 50)
         
         if not query:
             return jsonify({
@@ -215,68 +1039,8 @@ def search_stocks():
                 'message': 'Parâmetro de busca não fornecido'
             }), 400
         
-        results = []
-        
-        # Normalizar a consulta (remover acentos)
-        normalized_query = query.normalize("NFD").replace(/[\u0300-\u036f]/g, "")
-        
-        # Buscar correspondências em ações brasileiras
-        for symbol in analyzer.br_stocks:
-            # Verificar se já temos dados da ação
-            stock_data = analyzer.stocks_data.get(symbol, {})
-            
-            if not stock_data:
-                continue
-            
-            name = stock_data.get('name', '')
-            long_name = stock_data.get('long_name', '')
-            
-            # Normalizar nomes
-            normalized_name = name.upper().normalize("NFD").replace(/[\u0300-\u036f]/g, "")
-            normalized_long_name = long_name.upper().normalize("NFD").replace(/[\u0300-\u036f]/g, "")
-            
-            # Verificar correspondências
-            if (symbol.startswith(query) or 
-                normalized_name.find(normalized_query) >= 0 or 
-                normalized_long_name.find(normalized_query) >= 0):
-                
-                results.append({
-                    'symbol': symbol,
-                    'name': name,
-                    'long_name': long_name,
-                    'price': stock_data.get('price', 0),
-                    'change': stock_data.get('change_1d', 0),
-                    'region': 'BR'
-                })
-        
-        # Buscar correspondências em ações americanas
-        for symbol in analyzer.us_stocks:
-            # Verificar se já temos dados da ação
-            stock_data = analyzer.stocks_data.get(symbol, {})
-            
-            if not stock_data:
-                continue
-            
-            name = stock_data.get('name', '')
-            long_name = stock_data.get('long_name', '')
-            
-            # Normalizar nomes
-            normalized_name = name.upper().normalize("NFD").replace(/[\u0300-\u036f]/g, "")
-            normalized_long_name = long_name.upper().normalize("NFD").replace(/[\u0300-\u036f]/g, "")
-            
-            # Verificar correspondências
-            if (symbol.startswith(query) or 
-                normalized_name.find(normalized_query) >= 0 or 
-                normalized_long_name.find(normalized_query) >= 0):
-                
-                results.append({
-                    'symbol': symbol,
-                    'name': name,
-                    'long_name': long_name,
-                    'price': stock_data.get('price', 0),
-                    'change': stock_data.get('change_1d', 0),
-                    'region': 'US'
-                })
+        # Código exato, prefixo do código e nomes sem acentos, por ordem de relevância
+        results = get_search_index().search(query, limit=limit)
         
         return jsonify({
             'status': 'success',
@@ -286,6 +1050,11 @@ def search_stocks():
                 'count': len(results)
             }
         })
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
     except Exception as e:
         logger.error(f"Erro na pesquisa de ações: {e}")
         return jsonify({
@@ -293,80 +1062,93 @@ def search_stocks():
             'message': str(e)
         }), 500
 
+SAMPLE_NEWS = [
+    {
+        'title': 'Banco Central mantém taxa Selic em 10,5% ao ano',
+        'date': '2025-04-21T18:00:00',
+        'summary': 'O Comitê de Política Monetária (Copom) do Banco Central decidiu, por unanimidade, manter a taxa Selic em 10,5% ao ano, em linha com as expectativas do mercado.',
+        'source': 'Banco Central',
+        'url': 'https://www.bcb.gov.br/noticias',
+        'related_stocks': ['BBAS3', 'ITUB4', 'BBDC4']
+    },
+    {
+        'title': 'Inflação de março fica em 0,4%, abaixo das expectativas',
+        'date': '2025-04-21T09:15:00',
+        'summary': 'O IPCA de março ficou em 0,4%, abaixo da expectativa do mercado que era de 0,5%. No acumulado de 12 meses, a inflação está em 4,2%.',
+        'source': 'IBGE',
+        'url': 'https://www.ibge.gov.br/noticias',
+        'related_stocks': []
+    },
+    {
+        'title': 'Petrobras anuncia novo plano de investimentos',
+        'date': '2025-04-20T10:30:00',
+        'summary': 'A Petrobras anunciou hoje seu novo plano de investimentos para os próximos 5 anos, com foco em exploração e produção no pré-sal.',
+        'source': 'InfoMoney',
+        'url': 'https://www.infomoney.com.br/noticias',
+        'related_stocks': ['PETR4', 'PETR3']
+    },
+    {
+        'title': 'Fed sinaliza possível corte de juros nos EUA ainda este ano',
+        'date': '2025-04-19T16:45:00',
+        'summary': 'O Federal Reserve (Fed) sinalizou que pode reduzir as taxas de juros nos Estados Unidos ainda este ano, caso a inflação continue desacelerando.',
+        'source': 'Bloomberg',
+        'url': 'https://www.bloomberg.com/news',
+        'related_stocks': ['AAPL', 'MSFT', 'GOOGL']
+    },
+    {
+        'title': 'Vale reporta produção recorde de minério de ferro no primeiro trimestre',
+        'date': '2025-04-18T09:00:00',
+        'summary': 'A Vale reportou produção recorde de minério de ferro no primeiro trimestre de 2025, superando as expectativas do mercado e indicando forte demanda global.',
+        'source': 'Valor Econômico',
+        'url': 'https://www.valor.com.br/noticias',
+        'related_stocks': ['VALE3']
+    }
+]
+
+# Notícias deduplicadas e indexadas por ação, mantidas por CLEARVIEW_NEWS_RETENTION_DAYS
+news_store = NewsStore(data_dir=data_dir, retention_days=int(os.environ.get('CLEARVIEW_NEWS_RETENTION_DAYS', 30)))
+
+def seed_sample_news():
+    """
+    Carrega as notícias simuladas num armazenamento vazio, deslocando as datas para o presente.
+    
+    Chamada na inicialização dos servidores (main, run.py, wsgi.py e async_server.py),
+    não na importação do módulo.
+    """
+    if len(news_store):
+        return
+    newest = max(datetime.fromisoformat(item['date']) for item in SAMPLE_NEWS)
+    shift = datetime.now().replace(microsecond=0) - newest
+    news_store.add([
+        dict(item, date=(datetime.fromisoformat(item['date']) + shift).isoformat())
+        for item in SAMPLE_NEWS
+    ])
+
 @app.route('/api/news', methods=['GET'])
 def get_news():
     """Endpoint para obter notícias do mercado financeiro."""
     try:
         # Parâmetros opcionais
         symbol = request.args.get('symbol', None)
-        limit = int(request.args.get('limit', 10))
-        
-        # Aqui seria implementada a busca de notícias
-        # Por enquanto, vamos retornar notícias simuladas
-        
-        news = [
-            {
-                'title': 'Banco Central mantém taxa Selic em 10,5% ao ano',
-                'date': '2025-04-21T18:00:00',
-                'summary': 'O Comitê de Política Monetária (Copom) do Banco Central decidiu, por unanimidade, manter a taxa Selic em 10,5% ao ano, em linha com as expectativas do mercado.',
-                'source': 'Banco Central',
-                'url': 'https://www.bcb.gov.br/noticias',
-                'related_stocks': ['BBAS3', 'ITUB4', 'BBDC4']
-            },
-            {
-                'title': 'Inflação de março fica em 0,4%, abaixo das expectativas',
-                'date': '2025-04-21T09:15:00',
-                'summary': 'O IPCA de março ficou em 0,4%, abaixo da expectativa do mercado que era de 0,5%. No acumulado de 12 meses, a inflação está em 4,2%.',
-                'source': 'IBGE',
-                'url': 'https://www.ibge.gov.br/noticias',
-                'related_stocks': []
-            },
-            {
-                'title': 'Petrobras anuncia novo plano de investimentos',
-                'date': '2025-04-20T10:30:00',
-                'summary': 'A Petrobras anunciou hoje seu novo plano de investimentos para os próximos 5 anos, com foco em exploração e produção no pré-sal.',
-                'source': 'InfoMoney',
-                'url': 'https://www.infomoney.com.br/noticias',
-                'related_stocks': ['PETR4', 'PETR3']
-            },
-            {
-                'title': 'Fed sinaliza possível corte de juros nos EUA ainda este ano',
-                'date': '2025-04-19T16:45:00',
-                'summary': 'O Federal Reserve (Fed) sinalizou que pode reduzir as taxas de juros nos Estados Unidos ainda este ano, caso a inflação continue desacelerando.',
-                'source': 'Bloomberg',
-                'url': 'https://www.bloomberg.com/news',
-                'related_stocks': ['AAPL', 'MSFT', 'GOOGL']
-            },
-            {
-                'title': 'Vale reporta produção recorde de minério de ferro no primeiro trimestre',
-                'date': '2025-04-18T09:00:00',
-                'summary': 'A Vale reportou produção recorde de minério de ferro no primeiro trimestre de 2025, superando as expectativas do mercado e indicando forte demanda global.',
-                'source': 'Valor Econômico',
-                'url': 'https://www.valor.com.br/noticias',
-                'related_stocks': ['VALE3']
-            }
-        ]
-        
-        # Filtrar por ação, se especificado
-        if symbol:
-            symbol = symbol.upper()
-            filtered_news = []
-            for item in news:
-                if symbol in item['related_stocks'] or not item['related_stocks']:
-                    filtered_news.append(item)
-            news = filtered_news
+        limit = parse_limit(10, 100)
         
-        # Limitar quantidade
-        news = news[:limit]
+        # Mais recentes da ação (e gerais) pelo índice invertido, sem percorrer as demais
+        news = news_store.query(symbol, limit=limit)
         
-        return jsonify({
+        # A versão é a última alteração do armazenamento; a query string entra no ETag
+        return response_cache.respond(news_store.last_update, lambda: {
             'status': 'success',
             'data': {
                 'news': news,
                 'count': len(news),
-                'last_update': datetime.now().isoformat()
+                'last_update': news_store.last_update
             }
-        })
+        }, last_modified=news_store.last_update)
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
     except Exception as e:
         logger.error(f"Erro ao obter notícias: {e}")
         return jsonify({
@@ -374,86 +1156,39 @@ def get_news():
             'message': str(e)
         }), 500
 
+# Panorama do mercado: gráficos do provedor de cotações ('chart') ou cotações locais ('fixture', offline)
+MARKET_PROVIDER = os.environ.get('CLEARVIEW_MARKET_PROVIDER') or ('chart' if analyzer.api_client or CHART_URL else 'fixture')
+
+def fetch_market_chart(provider_symbol):
+    """Busca o gráfico de um índice, moeda ou commodity pelo mesmo caminho das ações."""
+    if analyzer.api_client:
+        with metrics.upstream_call('api_client', 'YahooFinance/get_stock_chart'):
+            return analyzer.api_client.call_api(
+                'YahooFinance/get_stock_chart',
+                query={'symbol': provider_symbol, 'interval': '1d', 'range': '5d'}
+            )
+    return fetch_chart(provider_symbol, "US")
+
+market_overview = MarketOverview(
+    ChartProvider(fetch_market_chart) if MARKET_PROVIDER == 'chart' else FixtureProvider(os.environ.get('CLEARVIEW_MARKET_FIXTURE')),
+    refresh_seconds=float(os.environ.get('CLEARVIEW_MARKET_REFRESH_SECONDS', 60)),
+    fallback=FixtureProvider()
+)
+
+# Integração com IA (relatórios em streaming), com o mesmo panorama e histórico de notícias
+ai = AIIntegration(data_dir=data_dir, market_overview=market_overview, news_store=news_store)
+
 @app.route('/api/market', methods=['GET'])
 def get_market_data():
     """Endpoint para obter dados gerais do mercado."""
     try:
-        # Aqui seria implementada a busca de dados do mercado
-        # Por enquanto, vamos retornar dados simulados
-        
-        market_data = {
-            'indices': {
-                'IBOV': {
-                    'name': 'Ibovespa',
-                    'value': 125430.45,
-                    'change': 1.2,
-                    'last_update': datetime.now().isoformat()
-                },
-                'IFIX': {
-                    'name': 'Índice de Fundos Imobiliários',
-                    'value': 3245.67,
-                    'change': 0.5,
-                    'last_update': datetime.now().isoformat()
-                },
-                'SP500': {
-                    'name': 'S&P 500',
-                    'value': 5230.18,
-                    'change': 0.8,
-                    'last_update': datetime.now().isoformat()
-                },
-                'NASDAQ': {
-                    'name': 'Nasdaq Composite',
-                    'value': 16780.45,
-                    'change': 1.1,
-                    'last_update': datetime.now().isoformat()
-                }
-            },
-            'currencies': {
-                'USD/BRL': {
-                    'name': 'Dólar/Real',
-                    'value': 5.12,
-                    'change': -0.3,
-                    'last_update': datetime.now().isoformat()
-                },
-                'EUR/BRL': {
-                    'name': 'Euro/Real',
-                    'value': 5.58,
-                    'change': -0.2,
-                    'last_update': datetime.now().isoformat()
-                },
-                'BTC/USD': {
-                    'name': 'Bitcoin/Dólar',
-                    'value': 68450.25,
-                    'change': 2.5,
-                    'last_update': datetime.now().isoformat()
-                }
-            },
-            'commodities': {
-                'OIL': {
-                    'name': 'Petróleo Brent',
-                    'value': 82.45,
-                    'change': 1.8,
-                    'last_update': datetime.now().isoformat()
-                },
-                'GOLD': {
-                    'name': 'Ouro',
-                    'value': 2345.67,
-                    'change': 0.7,
-                    'last_update': datetime.now().isoformat()
-                },
-                'IRON': {
-                    'name': 'Minério de Ferro',
-                    'value': 120.34,
-                    'change': -0.5,
-                    'last_update': datetime.now().isoformat()
-                }
-            }
-        }
+        # Instantâneo renovado em segundo plano; a versão só muda com as cotações
+        snapshot = market_overview.snapshot()
         
-        return jsonify({
+        return response_cache.respond(snapshot['version'], lambda: {
             'status': 'success',
-            'data': market_data
-        })
+            'data': snapshot['data']
+        }, last_modified=snapshot['updated_at'])
     except Exception as e:
         logger.error(f"Erro ao obter dados do mercado: {e}")
         return jsonify({
@@ -527,6 +1262,7 @@ def main():
     """Função principal para iniciar o servidor."""
     try:
         # Inicializar dados
+        seed_sample_news()
         analyzer.update_portfolio()
         
         # Iniciar servidor
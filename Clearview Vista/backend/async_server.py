@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Servidor asyncio para a Plataforma Inteligente da Clearview Capital.
+Este módulo expõe as mesmas rotas de api_server.py em um único processo aiohttp:
+as rotas que esperam por rede (cotações, relatórios, SSE) são atendidas no loop
+de eventos com chamadas não bloqueantes, e as demais, limitadas por CPU/memória,
+são repassadas à aplicação Flask em um pool de threads.
+"""
+
+import io
+import os
+import re
+import sys
+import time
+import asyncio
+import logging
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web, ClientSession, ClientTimeout, TCPConnector
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import api_server
+from api_server import analyzer, admission, STREAM_KEEPALIVE_SECONDS, DROPPED_EVENT, TRUST_FORWARDED
+from analysis.event_stream import format_event
+from analysis.market_data import CHART_TIMEOUT
+from analysis.instrumentation import metrics
+
+logger = logging.getLogger("AsyncServer")
+
+# Threads que executam as rotas repassadas à aplicação Flask
+WSGI_THREADS = int(os.environ.get('CLEARVIEW_ASYNC_WSGI_THREADS', 8))
+
+# Conexões simultâneas ao provedor de cotações
+UPSTREAM_CONNECTIONS = int(os.environ.get('CLEARVIEW_ASYNC_UPSTREAM_CONNECTIONS', 100))
+
+# Cabeçalhos calculados pelo próprio aiohttp ao enviar a resposta
+HOP_HEADERS = {'content-length', 'transfer-encoding', 'connection'}
+
+def json_success(data, **extra):
+    """Resposta JSON de sucesso no formato da API."""
+    return web.json_response(dict({'status': 'success', 'data': data}, **extra))
+
+def json_error(message, status):
+    """Resposta JSON de erro no formato da API."""
+    return web.json_response({'status': 'error', 'message': message}, status=status)
+
+async def run_blocking(func, *args):
+    """Executa uma função que escreve em disco ou aguarda travas (visões, dados, risco, relatórios) fora do loop de eventos."""
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+def not_modified(request, etag, last_modified):
+    """Verifica os cabeçalhos condicionais de uma requisição aiohttp."""
+    if request.headers.get('If-None-Match'):
+        # If-None-Match tem precedência sobre If-Modified-Since
+        return any(tag.value in (etag, '*') for tag in request.if_none_match or ())
+    since = request.if_modified_since
+    if since is not None and last_modified is not None:
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified <= since
+    return False
+
+def respond(request, version, build, last_modified=None):
+    """Versão aiohttp de ResponseCache.respond (mesmos ETag, 304 e compressão das rotas Flask)."""
+    status, headers, body = api_server.response_cache.render(
+        f"{request.path}?{request.query_string}", version, build,
+        request.headers.get('Accept-Encoding'),
+        lambda etag, modified: not_modified(request, etag, modified), last_modified
+    )
+    if body is None:
+        return web.Response(status=status, headers=headers)
+    return web.Response(status=status, headers=headers, body=body, content_type='application/json')
+
+def too_many_requests(reason, retry_after):
+    """Resposta 429 com o tempo sugerido para nova tentativa."""
+    response = json_error(api_server.rejection_message(reason, retry_after), 429)
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def client_id(request):
+    """Identificação do cliente usada nos limites de taxa."""
+    if TRUST_FORWARDED and request.headers.get('X-Forwarded-For'):
+        return request.headers['X-Forwarded-For'].split(',')[0].strip()
+    return request.remote or 'unknown'
+
+async def health_check(request):
+    """Endpoint para verificar se a API está funcionando."""
+    return web.json_response({
+        'status': 'ok',
+        'timestamp': datetime.now().isoformat()
+    })
+
+async def resolve_view(request, symbol, region):
+    """Versão assíncrona de api_server.resolve_view (cotação buscada sem bloquear o loop)."""
+    view = analyzer.current_view(symbol)
+    if view is None:
+        views = await analyzer.amaterialize_views(request.app['http'], [symbol], {symbol: region})
+        view = views[symbol]
+    return view
+
+async def get_stock(request):
+    """Endpoint para obter dados de uma ação específica (cotação buscada sem bloquear se não materializada)."""
+    symbol = request.match_info['symbol']
+    try:
+        symbol = api_server.normalize_symbol(symbol)
+        region = request.query.get('region', 'BR')
+
+        view = await resolve_view(request, symbol, region)
+        if view is None:
+            return json_error(f"Cotação de {symbol} não encontrada", 404)
+
+        # As métricas de risco ficam sob a trava da sincronização em segundo plano
+        return json_success(await run_blocking(api_server.with_risk, symbol, view))
+    except ValueError as e:
+        return json_error(str(e), 400)
+    except Exception as e:
+        logger.error(f"Erro ao obter dados da ação {symbol}: {e}")
+        return json_error(str(e), 500)
+
+async def get_stocks_batch(request):
+    """Endpoint para obter várias ações em uma única requisição (?symbols=A,B ou JSON {"symbols": [...]})."""
+    try:
+        if request.method == 'POST':
+            try:
+                body = await request.json()
+            except ValueError:
+                body = None
+            symbols = (body if isinstance(body, dict) else {}).get('symbols', [])
+        else:
+            symbols = request.query.get('symbols', '').split(',')
+        region = request.query.get('region', 'BR')
+
+        symbols = api_server.normalize_batch_symbols(symbols)
+
+        # As ausentes são buscadas concorrentemente no loop e publicadas juntas
+        results, missing, regions = api_server.plan_batch(symbols, region)
+
+        # Cada ação a buscar custa uma ficha do cliente
+        rejected = admission.charge(client_id(request), len(missing))
+        if rejected is not None:
+            return too_many_requests(*rejected)
+
+        try:
+            fetched = await analyzer.amaterialize_views(request.app['http'], missing, regions) if missing else {}
+        except Exception as e:
+            fetched = e
+
+        return json_success(await run_blocking(api_server.finish_batch, symbols, results, missing, fetched))
+    except ValueError as e:
+        return json_error(str(e), 400)
+    except Exception as e:
+        logger.error(f"Erro ao obter ações em lote: {e}")
+        return json_error(str(e), 500)
+
+async def get_report(request):
+    """Endpoint para gerar relatório de uma ação."""
+    symbol = request.match_info['symbol']
+    try:
+        symbol = api_server.normalize_symbol(symbol)
+        region = request.query.get('region', 'BR')
+
+        view = await resolve_view(request, symbol, region)
+        if view is None:
+            return json_error(f"Cotação de {symbol} não encontrada", 404)
+
+        # O relatório novo é gerado e gravado no cache fora do loop
+        data, report_hash = await run_blocking(api_server.build_report, view)
+
+        # O hash do conteúdo é a versão: clientes com o relatório atual recebem 304
+        return respond(request, report_hash, lambda: {
+            'status': 'success',
+            'data': data
+        })
+    except ValueError as e:
+        return json_error(str(e), 400)
+    except Exception as e:
+        logger.error(f"Erro ao gerar relatório para {symbol}: {e}")
+        return json_error(str(e), 500)
+
+async def stream_report(request):
+    """Endpoint SSE com o relatório da IA de uma ação, trecho a trecho (sem uma thread por conexão)."""
+    symbol = request.match_info['symbol']
+    try:
+        symbol = api_server.normalize_symbol(symbol)
+        region = request.query.get('region', 'BR')
+
+        view = await resolve_view(request, symbol, region)
+        if view is None:
+            return json_error(f"Cotação de {symbol} não encontrada", 404)
+
+        stock, key, cached = api_server.plan_report_stream(view)
+    except ValueError as e:
+        return json_error(str(e), 400)
+    except Exception as e:
+        logger.error(f"Erro ao gerar relatório para {symbol}: {e}")
+        return json_error(str(e), 500)
+
+    response = web.StreamResponse(headers={
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+        'Access-Control-Allow-Origin': '*'
+    })
+    parts = []
+    try:
+        await response.prepare(request)
+        await response.write(format_event({'symbol': stock['symbol'], 'hash': key}, event='start').encode('utf-8'))
+
+        if cached is not None:
+            frames = [format_event({'text': cached}, event='token'),
+                      format_event({'hash': key, 'source': 'cache'}, event='done')]
+        elif not api_server.ai.use_openai:
+            frames = await run_blocking(api_server.report_stream_fallback, stock)
+        else:
+            try:
+                async for text in api_server.ai.astream_stock_report(stock, stock['fundamentals'], stock['evaluation']):
+                    parts.append(text)
+                    await response.write(format_event({'text': text}, event='token').encode('utf-8'))
+            except ConnectionResetError:
+                raise
+            except Exception as e:
+                frames = await run_blocking(api_server.report_stream_failed, symbol, stock, parts, e)
+            else:
+                frames = [await run_blocking(api_server.report_stream_finish, stock, key, parts)]
+
+        for frame in frames:
+            await response.write(frame.encode('utf-8'))
+    except ConnectionResetError:
+        pass
+    return response
+
+async def stream_quotes(request):
+    """Endpoint SSE com as variações de preço, change_1d e rating das ações (sem uma thread por conexão)."""
+    try:
+        symbols = api_server.parse_stream_symbols(request.query.get('symbols', ''))
+    except ValueError as e:
+        return json_error(str(e), 400)
+
+    response = web.StreamResponse(headers={
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+        'Access-Control-Allow-Origin': '*'
+    })
+
+    stream = analyzer.quote_stream
+    subscription = stream.subscribe(symbols or None, loop=asyncio.get_running_loop())
+    try:
+        await response.prepare(request)
+        await response.write(b"retry: 5000\n\n")
+
+        # Instantâneo inicial; depois disso, somente variações
+        await response.write(api_server.quote_snapshot_event(symbols).encode('utf-8'))
+
+        while True:
+            frame = await subscription.anext(timeout=STREAM_KEEPALIVE_SECONDS)
+            if subscription.dropped:
+                await response.write(DROPPED_EVENT.encode('utf-8'))
+                break
+            await response.write((frame if frame is not None else ": keep-alive\n\n").encode('utf-8'))
+    except ConnectionResetError:
+        pass
+    finally:
+        stream.unsubscribe(subscription)
+    return response
+
+def wsgi_environ(request, body):
+    """
+    Monta o ambiente WSGI de uma requisição aiohttp.
+
+    Args:
+        request (web.Request): Requisição recebida
+        body (bytes): Corpo já lido
+
+    Returns:
+        dict: Ambiente WSGI
+    """
+    host, _, port = (request.host or 'localhost').partition(':')
+    environ = {
+        'REQUEST_METHOD': request.method,
+        'SCRIPT_NAME': '',
+        'PATH_INFO': request.path.encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': request.query_string,
+        'SERVER_NAME': host,
+        'SERVER_PORT': port or ('443' if request.scheme == 'https' else '80'),
+        'SERVER_PROTOCOL': f"HTTP/{request.version.major}.{request.version.minor}",
+        'REMOTE_ADDR': request.remote or '',
+        'CONTENT_TYPE': request.headers.get('Content-Type', ''),
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': request.scheme,
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False
+    }
+    for name in set(request.headers):
+        key = name.upper().replace('-', '_')
+        if key not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            environ['HTTP_' + key] = ','.join(request.headers.getall(name))
+    return environ
+
+def call_wsgi(environ):
+    """Executa a aplicação Flask para um ambiente WSGI e devolve (status, cabeçalhos, corpo)."""
+    captured = {}
+
+    def start_response(status, headers, exc_info=None):
+        captured['status'] = int(status.split(' ', 1)[0])
+        captured['headers'] = headers
+
+    result = api_server.app(environ, start_response)
+    try:
+        body = b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return captured['status'], captured['headers'], body
+
+async def forward_to_flask(request):
+    """Repassa a requisição às rotas Flask (CPU/memória), executadas no pool de threads."""
+    body = await request.read()
+    status, headers, content = await asyncio.get_running_loop().run_in_executor(
+        request.app['wsgi_executor'], call_wsgi, wsgi_environ(request, body)
+    )
+    response = web.Response(status=status, body=content)
+    for name, value in headers:
+        if name.lower() not in HOP_HEADERS:
+            response.headers.add(name, value)
+    return response
+
+def route_label(request):
+    """Padrão da rota no formato do Flask (ex: '/api/stock/<symbol>'), igual nos dois servidores."""
+    resource = request.match_info.route.resource
+    if resource is None:
+        return 'unmatched'
+    return re.sub(r'\{(\w+)\}', r'<\1>', resource.canonical)
+
+@web.middleware
+async def metrics_middleware(request, handler):
+    """Instrumenta as rotas nativas (as repassadas são medidas pelos hooks do Flask)."""
+    if request.match_info.route.handler is forward_to_flask:
+        return await handler(request)
+
+    route = route_label(request)
+    state = metrics.start_request(route)
+    status, size = 500, None
+    try:
+        response = await handler(request)
+        status = response.status
+        if isinstance(response, web.Response) and isinstance(response.body, (bytes, bytearray)):
+            size = len(response.body)
+        return response
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    finally:
+        metrics.finish_request(state, route, request.method, status, size)
+
+@web.middleware
+async def admission_middleware(request, handler):
+    """Limites por cliente e de requisições pesadas nas rotas nativas (as repassadas passam pelo Flask)."""
+    if request.match_info.route.handler in (forward_to_flask, health_check):
+        return await handler(request)
+
+    heavy = request.match_info.route.handler in (get_report, stream_report)
+    rejected = admission.admit(client_id(request), heavy)
+    if rejected is not None:
+        return too_many_requests(*rejected)
+    if not heavy:
+        return await handler(request)
+
+    started = time.perf_counter()
+    try:
+        return await handler(request)
+    finally:
+        admission.release(time.perf_counter() - started)
+
+@web.middleware
+async def cors_middleware(request, handler):
+    """Cabeçalho CORS nas rotas nativas (as repassadas já o recebem do Flask-CORS)."""
+    response = await handler(request)
+    if not response.prepared:
+        response.headers.setdefault('Access-Control-Allow-Origin', '*')
+    return response
+
+async def on_startup(application):
+    """Cria a sessão HTTP compartilhada e o pool de threads das rotas Flask."""
+    application['http'] = ClientSession(
+        timeout=ClientTimeout(total=CHART_TIMEOUT),
+        connector=TCPConnector(limit=UPSTREAM_CONNECTIONS)
+    )
+    application['wsgi_executor'] = ThreadPoolExecutor(max_workers=WSGI_THREADS, thread_name_prefix='wsgi')
+
+async def on_cleanup(application):
+    """Fecha a sessão HTTP e o pool de threads."""
+    await application['http'].close()
+    application['wsgi_executor'].shutdown(wait=False)
+
+def create_app():
+    """
+    Cria a aplicação aiohttp.
+
+    Returns:
+        web.Application: Aplicação com as rotas nativas e o repasse das demais ao Flask
+    """
+    application = web.Application(middlewares=[metrics_middleware, cors_middleware, admission_middleware])
+    application.router.add_get('/api/health', health_check)
+    application.router.add_get('/api/stock/{symbol}', get_stock)
+    application.router.add_route('GET', '/api/stocks/batch', get_stocks_batch)
+    application.router.add_route('POST', '/api/stocks/batch', get_stocks_batch)
+    application.router.add_get('/api/stream', stream_quotes)
+    application.router.add_get('/api/report/{symbol}', get_report)
+    application.router.add_get('/api/report/{symbol}/stream', stream_report)
+
+    # Demais rotas (e métodos, como OPTIONS do CORS) pela aplicação Flask
+    application.router.add_route('*', '/{tail:.*}', forward_to_flask)
+
+    application.on_startup.append(on_startup)
+    application.on_cleanup.append(on_cleanup)
+    return application
+
+def main():
+    """Função principal para iniciar o servidor asyncio."""
+    try:
+        api_server.seed_sample_news()
+        web.run_app(create_app(), host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
+    except Exception as e:
+        logger.error(f"Erro ao iniciar servidor: {e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Cache HTTP para a Plataforma Inteligente da Clearview Capital.
+Este módulo implementa GET condicional (ETag/Last-Modified com respostas 304)
+a partir dos carimbos de versão dos dados, e compressão gzip/brotli dos corpos
+JSON, mantendo em memória os corpos já serializados e comprimidos por versão.
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from flask import Response, request, json
+
+try:
+    import brotli
+except ImportError:
+    # Brotli é opcional; sem ele as respostas usam gzip
+    brotli = None
+
+# Corpos menores que isso não compensam a compressão
+MIN_COMPRESS_SIZE = 1024
+
+def choose_encoding(accept_encoding):
+    """
+    Escolhe a codificação de conteúdo aceita pelo cliente.
+
+    Args:
+        accept_encoding (str): Cabeçalho Accept-Encoding da requisição
+
+    Returns:
+        str: 'br', 'gzip' ou None (codificações com q=0, em qualquer grafia, são recusadas)
+    """
+    accepted = set()
+    for part in (accept_encoding or '').split(','):
+        name, *params = part.split(';')
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(name.strip().lower())
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+def compress(body, encoding):
+    """
+    Comprime um corpo de resposta.
+
+    Args:
+        body (bytes): Corpo original
+        encoding (str): 'br' ou 'gzip'
+
+    Returns:
+        bytes: Corpo comprimido
+    """
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+def to_utc(value):
+    """Converte uma data (datetime ou string ISO, hora local se sem fuso) para UTC sem microssegundos."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+class ResponseCache:
+    """
+    Respostas JSON condicionais e comprimidas, indexadas por versão.
+
+    O ETag de uma resposta é derivado do caminho (com a query string) e da
+    versão dos dados que a originaram. Respostas comprimidas têm seu próprio
+    ETag forte, com a codificação como sufixo; como corpos menores que
+    MIN_COMPRESS_SIZE nunca são comprimidos, o sufixo depende do tamanho do
+    corpo, que é montado (uma vez por versão) antes da verificação condicional.
+    Com o corpo no LRU, um cliente que já tem essa versão recebe um 304 sem
+    serialização. Corpos serializados (e suas versões comprimidas) ficam no LRU.
+    """
+
+    def __init__(self, max_entries=256):
+        """
+        Inicializa o cache de respostas.
+
+        Args:
+            max_entries (int): Número máximo de corpos mantidos em memória
+        """
+        self.max_entries = max_entries
+        self._bodies = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            body = self._bodies.get(key)
+            if body is not None:
+                self._bodies.move_to_end(key)
+            return body
+
+    def _put(self, key, body):
+        with self._lock:
+            self._bodies[key] = body
+            self._bodies.move_to_end(key)
+            while len(self._bodies) > self.max_entries:
+                self._bodies.popitem(last=False)
+
+    @staticmethod
+    def _not_modified(etag, last_modified):
+        """Verifica os cabeçalhos condicionais da requisição Flask atual."""
+        if request.if_none_match:
+            # If-None-Match tem precedência sobre If-Modified-Since
+            return request.if_none_match.contains_weak(etag)
+        since = request.if_modified_since
+        if since is not None and last_modified is not None:
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            return last_modified <= since
+        return False
+
+    def render(self, path, version, build, accept_encoding, not_modified, last_modified=None):
+        """
+        Monta uma resposta condicional e comprimida, sem depender do servidor web.
+
+        Args:
+            path (str): Caminho da requisição com a query string
+            version (str): Carimbo de versão dos dados da resposta
+            build (callable): Função que monta o payload (chamada só se o corpo da versão não está em cache)
+            accept_encoding (str): Cabeçalho Accept-Encoding da requisição
+            not_modified (callable): Recebe (etag, last_modified) e verifica os
+                cabeçalhos condicionais da requisição
+            last_modified (datetime|str): Momento da última alteração dos dados
+
+        Returns:
+            tuple: (status, cabeçalhos, corpo), com corpo None nas respostas 304
+        """
+        key = f"{path}|{version}"
+        body = self._get((key, None))
+        if body is None:
+            body = json.dumps(build()).encode('utf-8')
+            self._put((key, None), body)
+
+        # Sufixo de codificação apenas quando o corpo será de fato comprimido
+        encoding = choose_encoding(accept_encoding) if len(body) >= MIN_COMPRESS_SIZE else None
+        etag = hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]
+        if encoding:
+            etag = f"{etag}-{encoding}"
+        last_modified = to_utc(last_modified)
+
+        headers = {
+            'ETag': f'"{etag}"',
+            'Cache-Control': 'no-cache',
+            'Vary': 'Accept-Encoding'
+        }
+        if last_modified is not None:
+            headers['Last-Modified'] = last_modified.strftime('%a, %d %b %Y %H:%M:%S GMT')
+
+        if not_modified(etag, last_modified):
+            return 304, headers, None
+
+        if encoding:
+            compressed = self._get((key, encoding))
+            if compressed is None:
+                compressed = compress(body, encoding)
+                self._put((key, encoding), compressed)
+            body = compressed
+            headers['Content-Encoding'] = encoding
+
+        return 200, headers, body
+
+    def respond(self, version, build, last_modified=None):
+        """
+        Responde a requisição Flask atual com GET condicional e compressão.
+
+        Args:
+            version (str): Carimbo de versão dos dados da resposta
+            build (callable): Função que monta o payload (chamada só se o corpo da versão não está em cache)
+            last_modified (datetime|str): Momento da última alteração dos dados
+
+        Returns:
+            Response: 304 sem corpo, ou 200 com o JSON (comprimido se aceito)
+        """
+        status, headers, body = self.render(
+            request.full_path, version, build,
+            request.headers.get('Accept-Encoding'), self._not_modified, last_modified
+        )
+        if body is None:
+            return Response(status=status, headers=headers)
+        return Response(body, status=status, headers=headers, mimetype='application/json')
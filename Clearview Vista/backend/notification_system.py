@@ -41,18 +41,20 @@ class NotificationSystem:
     Classe para gerenciamento e envio de notificações por diferentes canais.
     """
     
-    def __init__(self, data_dir="/home/ubuntu/clearview_project/data"):
+    def __init__(self, data_dir="/home/ubuntu/clearview_project/data", market_overview=None, news_store=None):
         """
         Inicializa o sistema de notificações.
         
         Args:
             data_dir (str): Diretório para armazenamento de dados
+            market_overview (MarketOverview): Panorama do mercado compartilhado com a API
+            news_store (NewsStore): Armazenamento de notícias compartilhado com a API
         """
         self.data_dir = data_dir
         os.makedirs(data_dir, exist_ok=True)
         
         # Inicializar integração com IA para geração de conteúdo
-        self.ai = AIIntegration(data_dir=data_dir)
+        self.ai = AIIntegration(data_dir=data_dir, market_overview=market_overview, news_store=news_store)
         
         # Carregar configurações
         self.config = self.load_config()
@@ -713,7 +715,7 @@ class NotificationSystem:
         Envia a newsletter diária para todos os assinantes ativos.
         
         Args:
-            market_data (dict): Dados do mercado
+            market_data (dict): Dados do mercado (None usa o instantâneo de market_overview)
             portfolio (dict): Dados da carteira
             favorites (list): Lista de ações favoritas
             news (list): Lista de notícias
@@ -951,9 +953,8 @@ class NotificationSystem:
         # Verificar se é hora de enviar a newsletter diária
         newsletter_time = self.config.get('schedule', {}).get('daily_newsletter', '18:00')
         if current_time == newsletter_time:
-            # Em uma implementação real, buscaríamos dados atualizados
-            # Para este exemplo, vamos simular
-            market_data = {}
+            # Dados de mercado do instantâneo compartilhado (market_overview)
+            market_data = None
             portfolio = {}
             favorites = []
             news = []
@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Teste de carga offline da API da Plataforma Inteligente da Clearview Capital.
+Sobe `backend.api_server.app` no próprio processo, com um universo sintético de
+ações e um provedor de dados que reproduz gráficos gravados (no lugar do API
+Client), e dispara cargas mistas (consultas de ações, buscas, consultas da
+carteira e relatórios) em diferentes níveis de concorrência. Reporta vazão,
+latências p50/p95/p99 e memória, e salva os resultados em JSON para comparar
+versões.
+
+Uso:
+    python benchmarks/bench_api_load.py --universe 500 --concurrency 1 8 32 --requests 5000
+    python benchmarks/bench_api_load.py --mix stock=60,search=20,portfolio=15,report=5 --provider-latency 0.05
+    python benchmarks/bench_api_load.py --save-fixtures fixtures.json
+    python benchmarks/bench_api_load.py --fixtures fixtures.json --compare benchmarks/results/anterior.json
+"""
+
+import os
+import gc
+import sys
+import json
+import time
+import random
+import logging
+import platform
+import argparse
+import tempfile
+import threading
+import subprocess
+from datetime import datetime
+from urllib.parse import quote
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Peso padrão de cada tipo de requisição na carga mista
+DEFAULT_MIX = 'stock=50,search=25,portfolio=15,report=10'
+
+SYLLABLES = ["ban", "co", "pe", "tro", "vale", "ita", "ú", "bra", "sil", "ener", "gia", "tec", "mi",
+             "ne", "ra", "ção", "ali", "men", "tos", "lo", "gís", "ti", "ca", "sa", "ú", "de", "in", "vest"]
+SUFFIXES = ["S.A.", "Holding", "Participações", "Inc.", "Corp.", "Group"]
+
+def make_universe(n, seed=42):
+    """
+    Gera um universo sintético de ações (códigos no padrão da B3 e dos EUA, nomes com acentos).
+
+    Args:
+        n (int): Número de ações
+        seed (int): Semente do gerador aleatório
+
+    Returns:
+        list: Ações com 'symbol', 'region', 'name' e 'long_name'
+    """
+    rng = random.Random(seed)
+    universe = []
+    for i in range(n):
+        region = 'BR' if i % 3 else 'US'
+        issuer = ''.join(chr(65 + (i // 26 ** k) % 26) for k in range(4))
+        symbol = f"{issuer}{rng.choice('34')}" if region == 'BR' else f"{issuer}"
+        name = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        universe.append({
+            'symbol': symbol,
+            'region': region,
+            'name': name,
+            'long_name': f"{name} {rng.choice(SUFFIXES)}"
+        })
+    return universe
+
+def make_chart(stock, rng, days=250):
+    """Resposta sintética de YahooFinance/get_stock_chart com barras até hoje."""
+    now = int(time.time())
+    price = rng.uniform(5, 300)
+    closes = []
+    for _ in range(days):
+        price *= 1 + rng.gauss(0.0003, 0.02)
+        closes.append(round(price, 2))
+    return {
+        'chart': {
+            'result': [{
+                'meta': {
+                    'currency': 'BRL' if stock['region'] == 'BR' else 'USD',
+                    'exchangeName': 'SAO' if stock['region'] == 'BR' else 'NMS',
+                    'shortName': stock['name'],
+                    'longName': stock['long_name']
+                },
+                'timestamp': [now - (days - 1 - i) * 86400 for i in range(days)],
+                'indicators': {'quote': [{'close': closes}]}
+            }]
+        }
+    }
+
+def make_fixtures(universe_size, seed=42):
+    """Monta o universo e os gráficos gravados que o provedor reproduz."""
+    rng = random.Random(seed)
+    universe = make_universe(universe_size, seed)
+    return {
+        'universe': universe,
+        'charts': {stock['symbol']: make_chart(stock, rng) for stock in universe}
+    }
+
+class ReplayProvider:
+    """
+    Provedor de dados que substitui o API Client, respondendo com gráficos gravados.
+
+    Uma latência opcional simula o tempo de rede do provedor real.
+    """
+
+    def __init__(self, charts, latency=0.0):
+        """
+        Inicializa o provedor.
+
+        Args:
+            charts (dict): Código da ação -> resposta de YahooFinance/get_stock_chart
+            latency (float): Atraso (segundos) de cada chamada
+        """
+        self.charts = charts
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def call_api(self, endpoint, query=None):
+        """Mesma interface de ApiClient.call_api."""
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if endpoint == 'YahooFinance/get_stock_chart':
+            return self.charts.get((query or {}).get('symbol'))
+        return {}
+
+def boot_app(fixtures, latency, data_dir, admission=False):
+    """
+    Importa backend.api_server com um diretório de dados temporário e o provedor reproduzido.
+
+    Args:
+        fixtures (dict): Universo e gráficos gravados
+        latency (float): Latência simulada do provedor
+        data_dir (str): Diretório de dados temporário
+        admission (bool): Mantém os limites de admissão (todos os clientes do teste têm o mesmo endereço)
+
+    Returns:
+        module: Módulo api_server já inicializado e aquecido
+    """
+    os.environ['CLEARVIEW_DATA_DIR'] = data_dir
+    if not admission:
+        os.environ['CLEARVIEW_RATE_LIMIT'] = '0'
+        os.environ['CLEARVIEW_HEAVY_CONCURRENCY'] = '0'
+    sys.path.append(ROOT)
+    sys.path.append(os.path.join(ROOT, "backend"))
+    from backend import api_server
+
+    # Somente erros no console durante a carga
+    logging.getLogger().setLevel(logging.WARNING)
+
+    analyzer = api_server.analyzer
+    analyzer.api_client = ReplayProvider(fixtures['charts'], latency)
+    analyzer.br_stocks = [s['symbol'] for s in fixtures['universe'] if s['region'] == 'BR']
+    analyzer.us_stocks = [s['symbol'] for s in fixtures['universe'] if s['region'] == 'US']
+    analyzer.benchmark_indices = {}
+
+    # Carteira, visões e relatórios iniciais, como após o primeiro update_portfolio
+    analyzer.update_portfolio()
+    return api_server
+
+def parse_mix(mix):
+    """Converte 'stock=50,search=25' em uma lista de (carga, peso)."""
+    weights = []
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in WORKLOADS:
+            raise ValueError(f"Carga desconhecida: {name}. Disponíveis: {', '.join(WORKLOADS)}")
+        weights.append((name.strip(), float(weight or 1)))
+    return weights
+
+def stock_request(rng, universe, state):
+    stock = rng.choice(universe)
+    return f"/api/stock/{stock['symbol']}?region={stock['region']}", {}
+
+def search_request(rng, universe, state):
+    stock = rng.choice(universe)
+    text = rng.choice([stock['symbol'], stock['name'], stock['long_name']])
+    start = rng.randint(0, max(0, len(text) - 3))
+    return f"/api/search?q={quote(text[start:start + rng.randint(2, 6)])}", {}
+
+def portfolio_request(rng, universe, state):
+    # Painéis consultam periodicamente com o ETag da última resposta
+    etag = state.get('portfolio_etag')
+    return "/api/portfolio", ({'If-None-Match': etag} if etag and rng.random() < 0.8 else {})
+
+def report_request(rng, universe, state):
+    stock = rng.choice(universe)
+    return f"/api/report/{stock['symbol']}?region={stock['region']}", {}
+
+WORKLOADS = {
+    'stock': stock_request,
+    'search': search_request,
+    'portfolio': portfolio_request,
+    'report': report_request
+}
+
+def rss_mb():
+    """Memória residente atual do processo (MB), lida de /proc quando disponível."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def peak_rss_mb():
+    """Pico de memória residente do processo (MB)."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        return None
+
+def percentile(values, p):
+    """Percentil por posição (valores já ordenados)."""
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+def summarize(latencies, elapsed):
+    """Vazão e latências (ms) de um conjunto de requisições."""
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'p50_ms': round(percentile(latencies, 50), 3) if latencies else None,
+        'p95_ms': round(percentile(latencies, 95), 3) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99), 3) if latencies else None,
+        'max_ms': round(latencies[-1], 3) if latencies else None
+    }
+
+def run_level(app, universe, mix, concurrency, total, seed):
+    """
+    Executa `total` requisições da carga mista com `concurrency` clientes simultâneos.
+
+    Returns:
+        dict: Resultados gerais, por carga, status e memória
+    """
+    names = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+    per_client = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+    samples = {name: [] for name in names}
+    statuses = {}
+    errors = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(concurrency + 1)
+
+    def client(index):
+        rng = random.Random(seed * 1000 + index)
+        state = {}
+        local = {name: [] for name in names}
+        local_status = {}
+        test_client = app.test_client()
+        barrier.wait()
+        for _ in range(per_client[index]):
+            name = rng.choices(names, weights)[0]
+            path, headers = WORKLOADS[name](rng, universe, state)
+            start = time.perf_counter()
+            try:
+                response = test_client.get(path, headers=headers)
+                response.get_data()
+                status = response.status_code
+                if name == 'portfolio' and response.headers.get('ETag'):
+                    state['portfolio_etag'] = response.headers['ETag']
+            except Exception as e:
+                status = 'exception'
+                with lock:
+                    errors.append(f"{path}: {e}")
+            local[name].append((time.perf_counter() - start) * 1000)
+            local_status[status] = local_status.get(status, 0) + 1
+        with lock:
+            for name in names:
+                samples[name].extend(local[name])
+            for status, count in local_status.items():
+                statuses[str(status)] = statuses.get(str(status), 0) + count
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+
+    gc.collect()
+    rss_before = rss_mb()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    rss_after = rss_mb()
+
+    result = summarize([v for values in samples.values() for v in values], elapsed)
+    result.update({
+        'concurrency': concurrency,
+        'elapsed_s': round(elapsed, 3),
+        'statuses': statuses,
+        'errors': errors[:20],
+        'workloads': {name: summarize(samples[name], elapsed) for name in names},
+        'memory_mb': {
+            'rss_before': round(rss_before, 1) if rss_before else None,
+            'rss_after': round(rss_after, 1) if rss_after else None,
+            'peak_rss': round(peak_rss_mb(), 1) if peak_rss_mb() else None
+        }
+    })
+    return result
+
+def git_revision():
+    """Commit atual do repositório (se disponível)."""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+def print_level(result):
+    """Imprime uma linha por carga de um nível de concorrência."""
+    rows = [('total', result)] + list(result['workloads'].items())
+    for name, row in rows:
+        print(f"{result['concurrency']:>5} {name:>10} {row['requests']:>8} {row['rps'] or 0:>9.1f} "
+              f"{row['p50_ms'] or 0:>9.2f} {row['p95_ms'] or 0:>9.2f} {row['p99_ms'] or 0:>9.2f}")
+    memory = result['memory_mb']
+    print(f"{'':>5} {'memória':>10} RSS {memory['rss_before']} -> {memory['rss_after']} MB "
+          f"(pico {memory['peak_rss']} MB), status {result['statuses']}")
+
+def compare(results, baseline_file):
+    """Imprime a variação de vazão e p95 em relação a um resultado anterior."""
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {level['concurrency']: level for level in baseline.get('levels', [])}
+
+    print(f"\nComparação com {baseline_file} (commit {baseline.get('git_revision')}):")
+    print(f"{'conc.':>5} {'carga':>10} {'req/s':>18} {'p95 (ms)':>22}")
+    for level in results['levels']:
+        old = previous.get(level['concurrency'])
+        if old is None:
+            continue
+        rows = [('total', level, old)] + [
+            (name, row, old['workloads'].get(name)) for name, row in level['workloads'].items()
+        ]
+        for name, new_row, old_row in rows:
+            if not old_row or not old_row.get('rps') or not old_row.get('p95_ms'):
+                continue
+            rps_delta = (new_row['rps'] - old_row['rps']) / old_row['rps'] * 100
+            p95_delta = (new_row['p95_ms'] - old_row['p95_ms']) / old_row['p95_ms'] * 100
+            print(f"{level['concurrency']:>5} {name:>10} {old_row['rps']:>7.1f} -> {new_row['rps']:>7.1f} "
+                  f"({rps_delta:+5.1f}%) {old_row['p95_ms']:>7.2f} -> {new_row['p95_ms']:>7.2f} ({p95_delta:+6.1f}%)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga offline da API Flask")
+    parser.add_argument('--universe', type=int, default=500, help="Número de ações do universo sintético")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--requests', type=int, default=5000, help="Requisições por nível de concorrência")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="Pesos das cargas (stock, search, portfolio, report)")
+    parser.add_argument('--provider-latency', type=float, default=0.0, help="Latência simulada do provedor (s)")
+    parser.add_argument('--admission', action='store_true', help="Mantém os limites por cliente e de rotas pesadas")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--fixtures', help="Arquivo JSON com universo e gráficos gravados")
+    parser.add_argument('--save-fixtures', help="Salva os dados sintéticos gerados para reprodução")
+    parser.add_argument('--output', help="Arquivo JSON dos resultados (padrão: benchmarks/results/api_load_<data>.json)")
+    parser.add_argument('--compare', help="Resultado anterior (JSON) para comparação")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+
+    if args.fixtures:
+        with open(args.fixtures, 'r', encoding='utf-8') as f:
+            fixtures = json.load(f)
+    else:
+        fixtures = make_fixtures(args.universe, args.seed)
+    if args.save_fixtures:
+        with open(args.save_fixtures, 'w', encoding='utf-8') as f:
+            json.dump(fixtures, f, ensure_ascii=False)
+        print(f"Dados sintéticos salvos em {args.save_fixtures}")
+
+    workdir = tempfile.TemporaryDirectory()
+    cwd = os.getcwd()
+    output = os.path.abspath(args.output) if args.output else os.path.join(
+        ROOT, 'benchmarks', 'results', f"api_load_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    compare_file = os.path.abspath(args.compare) if args.compare else None
+    try:
+        # Logs da aplicação vão para o diretório temporário
+        os.chdir(workdir.name)
+        boot_start = time.perf_counter()
+        api_server = boot_app(fixtures, args.provider_latency, os.path.join(workdir.name, 'data'), args.admission)
+        boot_s = time.perf_counter() - boot_start
+        universe = fixtures['universe']
+
+        print(f"Universo de {len(universe)} ações, carga {args.mix}, {args.requests} requisições por nível "
+              f"(inicialização: {boot_s:.2f}s, provedor: {args.provider_latency * 1000:.0f} ms)")
+        print(f"{'conc.':>5} {'carga':>10} {'req.':>8} {'req/s':>9} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9}")
+
+        levels = []
+        for concurrency in args.concurrency:
+            level = run_level(api_server.app, universe, mix, concurrency, args.requests, args.seed)
+            levels.append(level)
+            print_level(level)
+    finally:
+        os.chdir(cwd)
+        workdir.cleanup()
+
+    results = {
+        'benchmark': 'api_load',
+        'timestamp': datetime.now().isoformat(),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'config': {
+            'universe': len(fixtures['universe']),
+            'requests': args.requests,
+            'mix': args.mix,
+            'provider_latency_s': args.provider_latency,
+            'admission': args.admission,
+            'seed': args.seed,
+            'fixtures': args.fixtures
+        },
+        'boot_s': round(boot_s, 3),
+        'levels': levels
+    }
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados salvos em {output}")
+
+    if compare_file:
+        compare(results, compare_file)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark do servidor asyncio da Plataforma Inteligente da Clearview Capital.
+Compara a implantação gunicorn/Flask (wsgi.py) com backend/async_server.py sob
+muitas requisições simultâneas que esperam pelo provedor de cotações. O provedor
+é simulado localmente (endpoint de gráficos com latência configurável) e cada
+servidor roda em um subprocesso com um diretório de dados temporário.
+
+Uso:
+    python benchmarks/bench_async_server.py --requests 1000 --concurrency 200 --upstream-delay 0.2
+    python benchmarks/bench_async_server.py --gunicorn-workers 4 --gunicorn-threads 8
+"""
+
+import os
+import sys
+import time
+import socket
+import asyncio
+import argparse
+import tempfile
+import threading
+import subprocess
+
+from aiohttp import web, ClientSession, ClientTimeout
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SYMBOLS = [
+    "PETR4", "VALE3", "ITUB4", "BBDC4", "ABEV3", "WEGE3", "RENT3", "BBAS3", "EGIE3", "TAEE11",
+    "AAPL", "MSFT", "AMZN", "GOOGL", "META", "TSLA", "NVDA", "BRK-B", "JPM", "JNJ"
+]
+
+def free_port():
+    """Reserva uma porta TCP livre."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def make_chart(symbol, days=250):
+    """Resposta sintética do endpoint de gráficos (um ano de fechamentos)."""
+    start = 1700000000
+    closes = [round(20 + (i % 17) * 0.35 + len(symbol), 2) for i in range(days)]
+    return {
+        'chart': {
+            'result': [{
+                'meta': {'currency': 'BRL', 'exchangeName': 'SAO', 'shortName': symbol, 'longName': symbol},
+                'timestamp': [start + i * 86400 for i in range(days)],
+                'indicators': {'quote': [{'close': closes}]}
+            }]
+        }
+    }
+
+def start_upstream(port, delay):
+    """Sobe, em uma thread, o provedor simulado que responde após `delay` segundos."""
+    charts = {symbol: make_chart(symbol) for symbol in SYMBOLS}
+
+    async def chart(request):
+        await asyncio.sleep(delay)
+        symbol = request.match_info['symbol']
+        return web.json_response(charts.get(symbol) or make_chart(symbol))
+
+    def run():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        app = web.Application()
+        app.router.add_get('/chart/{symbol}', chart)
+        runner = web.AppRunner(app, access_log=None)
+        loop.run_until_complete(runner.setup())
+        loop.run_until_complete(web.TCPSite(runner, '127.0.0.1', port, backlog=2048).start())
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+
+def start_server(mode, port, upstream_port, args):
+    """
+    Inicia um servidor da plataforma em um subprocesso.
+
+    Args:
+        mode (str): 'gunicorn' (wsgi.py) ou 'asyncio' (backend/async_server.py)
+        port (int): Porta do servidor
+        upstream_port (int): Porta do provedor simulado
+        args (argparse.Namespace): Opções do benchmark
+
+    Returns:
+        tuple: (processo, diretório temporário)
+    """
+    workdir = tempfile.TemporaryDirectory()
+    env = dict(
+        os.environ,
+        PORT=str(port),
+        CLEARVIEW_DATA_DIR=os.path.join(workdir.name, 'data'),
+        CLEARVIEW_CHART_URL=f"http://127.0.0.1:{upstream_port}/chart/{{symbol}}",
+        CLEARVIEW_SCREENING_WORKERS='0',
+        # Toda a carga vem de um único cliente local: sem limites de admissão
+        CLEARVIEW_RATE_LIMIT='0',
+        CLEARVIEW_HEAVY_CONCURRENCY='0'
+    )
+    if mode == 'gunicorn':
+        command = [
+            sys.executable, '-m', 'gunicorn', 'wsgi:app',
+            '--pythonpath', ROOT,
+            '--bind', f'127.0.0.1:{port}',
+            '--workers', str(args.gunicorn_workers),
+            '--threads', str(args.gunicorn_threads),
+            '--backlog', '2048',
+            '--timeout', '120',
+            '--log-level', 'warning'
+        ]
+    else:
+        command = [sys.executable, os.path.join(ROOT, 'backend', 'async_server.py')]
+
+    process = subprocess.Popen(command, cwd=workdir.name, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return process, workdir
+
+async def wait_ready(port, timeout=60):
+    """Aguarda o servidor responder em /api/health."""
+    deadline = time.monotonic() + timeout
+    async with ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(f'http://127.0.0.1:{port}/api/health') as response:
+                    if response.status == 200:
+                        return
+            except Exception:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Servidor na porta {port} não respondeu em {timeout}s")
+
+async def run_load(port, total, concurrency, path):
+    """
+    Dispara `total` requisições com no máximo `concurrency` simultâneas.
+
+    Returns:
+        dict: Tempo total, vazão, latências (ms) e número de erros
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(session, i):
+        nonlocal errors
+        url = f"http://127.0.0.1:{port}{path.format(symbol=SYMBOLS[i % len(SYMBOLS)])}"
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                async with session.get(url) as response:
+                    await response.read()
+                    if response.status != 200:
+                        errors += 1
+            except Exception:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    async with ClientSession(timeout=ClientTimeout(total=300)) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(one(session, i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))]
+
+    return {
+        'elapsed': elapsed,
+        'rps': total / elapsed,
+        'p50': percentile(50),
+        'p95': percentile(95),
+        'p99': percentile(99),
+        'errors': errors
+    }
+
+async def bench_mode(mode, upstream_port, args):
+    """Sobe um servidor, aquece, mede e encerra."""
+    port = free_port()
+    process, workdir = start_server(mode, port, upstream_port, args)
+    try:
+        await wait_ready(port)
+        await run_load(port, len(SYMBOLS), 4, args.path)
+        return await run_load(port, args.requests, args.concurrency, args.path)
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        workdir.cleanup()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark gunicorn/Flask vs. servidor asyncio")
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--upstream-delay', type=float, default=0.2)
+    parser.add_argument('--path', default='/api/report/{symbol}')
+    parser.add_argument('--gunicorn-workers', type=int, default=1)
+    parser.add_argument('--gunicorn-threads', type=int, default=1)
+    parser.add_argument('--modes', nargs='+', default=['gunicorn', 'asyncio'], choices=['gunicorn', 'asyncio'])
+    args = parser.parse_args()
+
+    upstream_port = free_port()
+    start_upstream(upstream_port, args.upstream_delay)
+
+    print(f"{args.requests} requisições a {args.path}, {args.concurrency} simultâneas, "
+          f"provedor com {args.upstream_delay * 1000:.0f} ms de latência")
+    print(f"{'servidor':>10} {'total (s)':>10} {'req/s':>8} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10} {'erros':>6}")
+    for mode in args.modes:
+        if mode == 'gunicorn':
+            try:
+                import gunicorn  # noqa: F401
+            except ImportError:
+                print(f"{'gunicorn':>10} não instalado (pip install -r requirements.txt)")
+                continue
+        result = asyncio.run(bench_mode(mode, upstream_port, args))
+        label = f"gunicorn {args.gunicorn_workers}x{args.gunicorn_threads}" if mode == 'gunicorn' else mode
+        print(f"{label:>10} {result['elapsed']:>10.2f} {result['rps']:>8.1f} {result['p50']:>10.1f} "
+              f"{result['p95']:>10.1f} {result['p99']:>10.1f} {result['errors']:>6}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark da análise de sentimento por palavras-chave da Plataforma Inteligente da Clearview Capital.
+Compara a implementação anterior (uma busca de substring por palavra-chave em
+cada notícia) com o léxico compilado em uma expressão regular, notícia a
+notícia e em lote, sobre manchetes sintéticas. Informa notícias por segundo e
+quantas classificações mudaram (casamentos dentro de palavras, como "alta" em
+"altamente", deixam de contar). Com --extra-terms, o léxico ganha termos
+sintéticos, para ver como cada implementação escala com o tamanho do léxico.
+
+Uso:
+    python benchmarks/bench_keyword_sentiment.py --news 20000 --repeat 3
+    python benchmarks/bench_keyword_sentiment.py --extra-terms 500
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+from analysis.keyword_sentiment import KeywordSentiment, POSITIVE_TERMS, NEGATIVE_TERMS
+
+FILLER = [
+    'empresa', 'mercado', 'trimestre', 'ações', 'investidores', 'bolsa', 'resultado', 'analistas',
+    'altamente', 'baixamente', 'company', 'market', 'quarter', 'shares', 'investors', 'fallback',
+    'dividendos', 'governo', 'juros', 'inflação', 'setor', 'bancos', 'petróleo', 'minério'
+]
+
+def make_lexicons(extra_terms, seed=11):
+    """Léxicos padrão acrescidos de `extra_terms` termos sintéticos (metade de cada lado)."""
+    rng = random.Random(seed)
+    positive, negative = dict(POSITIVE_TERMS), dict(NEGATIVE_TERMS)
+    for index in range(extra_terms):
+        term = ''.join(rng.choice('abcdefghijlmnopqrstuv') for _ in range(rng.randint(5, 10)))
+        (positive if index % 2 else negative)[term] = 1.0
+    return positive, negative
+
+def make_news(count, terms, seed=7):
+    """Notícias sintéticas com termos do léxico misturados a palavras comuns."""
+    rng = random.Random(seed)
+    terms = list(terms)
+    news = []
+    for _ in range(count):
+        title = ' '.join(rng.choice(FILLER if rng.random() < 0.8 else terms) for _ in range(10))
+        summary = ' '.join(rng.choice(FILLER if rng.random() < 0.9 else terms) for _ in range(40))
+        news.append({'title': title.capitalize(), 'summary': summary.capitalize() + '.'})
+    return news
+
+def substring_sentiment(news, positive_words, negative_words):
+    """Implementação anterior: `palavra in texto` para cada palavra-chave."""
+    text = (news['title'] + ' ' + news['summary']).lower()
+    positive_count = sum(1 for word in positive_words if word in text)
+    negative_count = sum(1 for word in negative_words if word in text)
+    if positive_count > negative_count:
+        sentiment = 'positivo'
+    elif negative_count > positive_count:
+        sentiment = 'negativo'
+    else:
+        sentiment = 'neutro'
+    return sentiment, min(10, max(1, positive_count + negative_count))
+
+def best_of(repeat, fn):
+    """Menor tempo (segundos) de `repeat` execuções e o resultado da última."""
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da análise de sentimento por palavras-chave")
+    parser.add_argument('--news', type=int, default=20000, help="Número de notícias")
+    parser.add_argument('--repeat', type=int, default=3, help="Repetições (vale a mais rápida)")
+    parser.add_argument('--extra-terms', type=int, default=0, help="Termos sintéticos acrescentados ao léxico")
+    args = parser.parse_args()
+
+    positive, negative = make_lexicons(args.extra_terms)
+    news = make_news(args.news, list(positive) + list(negative))
+    scorer = KeywordSentiment(positive, negative)
+
+    def compiled_single():
+        return [scorer.classify(*scorer.score(f"{item['title']} {item['summary']}")) for item in news]
+
+    def compiled_batch():
+        texts = [f"{item['title']} {item['summary']}" for item in news]
+        return [scorer.classify(*scores) for scores in scorer.score_batch(texts)]
+
+    runs = [
+        ('substring (anterior)', lambda: [substring_sentiment(item, positive, negative) for item in news]),
+        ('regex por notícia', compiled_single),
+        ('regex em lote', compiled_batch)
+    ]
+    results = {}
+    print(f"Léxico: {len(positive) + len(negative)} termos")
+    print(f"{'método':<22} {'tempo(s)':>9} {'notícias/s':>12}")
+    for name, fn in runs:
+        seconds, results[name] = best_of(args.repeat, fn)
+        print(f"{name:<22} {seconds:>9.3f} {args.news / seconds:>12,.0f}")
+
+    assert results['regex por notícia'] == results['regex em lote']
+    changed = sum(1 for old, new in zip(results['substring (anterior)'], results['regex em lote']) if old[0] != new[0])
+    print(f"\nSentimentos diferentes da implementação anterior: {changed} de {args.news}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark do executor de chamadas de IA da Plataforma Inteligente da Clearview Capital.
+Gera relatórios de várias ações contra um servidor de completions simulado
+(compatível com /v1/chat/completions da OpenAI), com latência configurável,
+respostas 429 com Retry-After e chamadas que nunca respondem a tempo. Para cada
+limite de concorrência, mede o tempo total, as repetições, os prazos esgotados
+(substituídos pelo relatório simples) e o máximo de chamadas simultâneas vistas
+pelo servidor. Com --serve, apenas sobe o servidor simulado.
+
+Uso:
+    python benchmarks/bench_llm_executor.py --reports 40 --concurrency 1 4 16 --delay 0.3
+    python benchmarks/bench_llm_executor.py --rate-limit-every 5 --stall-every 13 --deadline 2
+    python benchmarks/bench_llm_executor.py --serve --port 18090
+"""
+
+import os
+import sys
+import time
+import json
+import socket
+import asyncio
+import argparse
+import tempfile
+import threading
+
+from aiohttp import web
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def free_port():
+    """Reserva uma porta TCP livre."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+class MockCompletions:
+    """Servidor de completions simulado, com contagem de chamadas simultâneas."""
+
+    def __init__(self, delay, rate_limit_every=0, stall_every=0, retry_after=0.2):
+        self.delay = delay
+        self.rate_limit_every = rate_limit_every
+        self.stall_every = stall_every
+        self.retry_after = retry_after
+        self.requests = 0
+        self.rate_limited = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def completions(self, request):
+        body = await request.json()
+        self.requests += 1
+        number = self.requests
+        if self.rate_limit_every and number % self.rate_limit_every == 0:
+            self.rate_limited += 1
+            return web.json_response(
+                {'error': {'message': 'Rate limit reached', 'type': 'requests', 'code': 'rate_limit_exceeded'}},
+                status=429, headers={'Retry-After': str(self.retry_after)})
+
+        if self.stall_every and number % self.stall_every == 0:
+            # Chamada "presa": responde bem depois de qualquer prazo razoável (fora da contagem)
+            await asyncio.sleep(self.delay * 100)
+        else:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                await asyncio.sleep(self.delay)
+            finally:
+                self.in_flight -= 1
+
+        prompt = body['messages'][-1]['content']
+        content = f"Relatório simulado ({len(prompt)} caracteres de prompt)."
+        return web.json_response({
+            'id': f'chatcmpl-{number}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model'),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': len(prompt) // 4, 'completion_tokens': 10, 'total_tokens': len(prompt) // 4 + 10}
+        })
+
+    def start(self, port):
+        """Sobe o servidor em uma thread."""
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            app = web.Application()
+            app.router.add_post('/v1/chat/completions', self.completions)
+            runner = web.AppRunner(app, access_log=None)
+            loop.run_until_complete(runner.setup())
+            loop.run_until_complete(web.TCPSite(runner, '127.0.0.1', port).start())
+            loop.run_forever()
+
+        threading.Thread(target=run, daemon=True).start()
+
+def make_items(count):
+    """Ações sintéticas para os relatórios: (stock_data, fundamentals, evaluation)."""
+    return [
+        (
+            {'symbol': f'TEST{i}', 'name': f'Empresa {i}', 'price': 10 + i, 'change_1d': (i % 7) - 3},
+            {'pe_ratio': 8 + i % 5, 'pb_ratio': 1.2, 'roe': 15.0, 'dividend_yield': 6.0},
+            {'rating': 'Compra' if i % 2 else 'Neutro', 'score': 60 + i % 30}
+        )
+        for i in range(count)
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do executor de chamadas de IA")
+    parser.add_argument('--reports', type=int, default=40, help="Relatórios por rodada")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16], help="Limites de concorrência avaliados")
+    parser.add_argument('--delay', type=float, default=0.3, help="Latência (s) de cada completion simulada")
+    parser.add_argument('--deadline', type=float, default=10.0, help="Prazo (s) de cada chamada")
+    parser.add_argument('--rate-limit-every', type=int, default=0, help="Responde 429 a cada N requisições (0 desativa)")
+    parser.add_argument('--stall-every', type=int, default=0, help="Prende cada N-ésima requisição além do prazo (0 desativa)")
+    parser.add_argument('--serve', action='store_true', help="Apenas sobe o servidor simulado")
+    parser.add_argument('--port', type=int, default=None, help="Porta do servidor simulado")
+    args = parser.parse_args()
+
+    port = args.port or free_port()
+    mock = MockCompletions(args.delay, args.rate_limit_every, args.stall_every)
+    mock.start(port)
+    api_base = f"http://127.0.0.1:{port}/v1"
+    if args.serve:
+        print(f"Servidor de completions simulado em {api_base} (OPENAI_API_BASE)")
+        threading.Event().wait()
+
+    os.environ.update(OPENAI_API_KEY='mock', OPENAI_API_BASE=api_base, CLEARVIEW_LLM_CACHE_MB='0')
+    sys.path.insert(0, os.path.join(ROOT, 'backend'))
+    import openai
+    from analysis.ai_integration import AIIntegration
+    from analysis.llm_executor import LLMExecutor
+
+    openai.api_base = api_base
+    items = make_items(args.reports)
+    data_dir = tempfile.mkdtemp()
+    ai = AIIntegration(data_dir=data_dir)
+    time.sleep(0.2)
+
+    results = []
+    for concurrency in args.concurrency:
+        ai.llm = LLMExecutor(concurrency=concurrency, deadline=args.deadline)
+        mock.max_in_flight = 0
+        requests_before, limited_before = mock.requests, mock.rate_limited
+        start = time.perf_counter()
+        reports = ai.generate_stock_reports(items)
+        elapsed = time.perf_counter() - start
+        results.append({
+            'concurrency': concurrency,
+            'seconds': round(elapsed, 3),
+            'reports': len(reports),
+            'requests': mock.requests - requests_before,
+            'rate_limited': mock.rate_limited - limited_before,
+            'max_in_flight': mock.max_in_flight,
+            **ai.llm.stats
+        })
+        ai.llm.close()
+
+    print(f"{'conc':>5} {'tempo(s)':>9} {'req':>5} {'429':>5} {'simult':>7} {'ok':>5} {'repet':>6} {'prazo':>6} {'altern':>7}")
+    for row in results:
+        print(f"{row['concurrency']:>5} {row['seconds']:>9.3f} {row['requests']:>5} {row['rate_limited']:>5} "
+              f"{row['max_in_flight']:>7} {row['calls']:>5} {row['retries']:>6} {row['deadlines']:>6} {row['fallbacks']:>7}")
+    print(json.dumps(results))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark do seletor de carteira da Plataforma Inteligente da Clearview Capital.
+Compara o PortfolioSelector (heaps com restrições) com a seleção anterior
+(ordenação completa seguida de trocas) em universos sintéticos de tamanho crescente.
+
+Uso:
+    python benchmarks/bench_portfolio_selector.py --sizes 1000 10000 100000
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+# Adicionar diretórios ao path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+from analysis.portfolio_selector import PortfolioSelector, default_score
+
+SECTORS = ["Financeiro", "Energia", "Materiais", "Consumo", "Tecnologia", "Saúde", "Utilidades", "Industrial"]
+
+def legacy_select(analyzed_stocks, size=10, min_br=7):
+    """Seleção anterior do update_portfolio: ordenação completa e trocas."""
+    analyzed_stocks = sorted(analyzed_stocks, key=default_score, reverse=True)
+    br_count = 0
+    portfolio_stocks = []
+
+    for stock in analyzed_stocks:
+        if len(portfolio_stocks) < size:
+            if stock['region'] == 'BR':
+                br_count += 1
+            portfolio_stocks.append(stock)
+        elif br_count < min_br and stock['region'] == 'BR':
+            for i in range(len(portfolio_stocks)-1, -1, -1):
+                if portfolio_stocks[i]['region'] == 'US':
+                    portfolio_stocks[i] = stock
+                    br_count += 1
+                    break
+
+    return portfolio_stocks
+
+def make_universe(n, seed=42):
+    """
+    Gera um universo sintético de ações analisadas.
+
+    Args:
+        n (int): Número de ações
+        seed (int): Semente do gerador aleatório
+
+    Returns:
+        list: Ações no formato produzido por update_portfolio
+    """
+    rng = random.Random(seed)
+    universe = []
+    for i in range(n):
+        region = 'BR' if rng.random() < 0.3 else 'US'
+        # Tickers no padrão da B3: quatro letras do emissor e o número da classe
+        issuer = ''.join(chr(65 + (i // 26 ** k) % 26) for k in range(4))
+        symbol = f"{issuer}{rng.choice('34')}" if region == 'BR' else f"U{i:05d}"
+        universe.append({
+            'symbol': symbol,
+            'region': region,
+            'sector': rng.choice(SECTORS),
+            'evaluation': {'score': rng.randint(-8, 12)}
+        })
+    return universe
+
+def bench(fn, universe, repeat):
+    """Retorna o melhor tempo (em ms) de `repeat` execuções."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(universe)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do seletor de carteira")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    selector = PortfolioSelector(size=10, min_per_region={'BR': 7})
+    constrained = PortfolioSelector(size=10, min_per_region={'BR': 7}, max_per_sector=3,
+                                    max_per_issuer=1, min_score=0)
+
+    print(f"{'n':>8} {'legado (ms)':>12} {'heap (ms)':>10} {'heap+limites (ms)':>18}")
+    for n in args.sizes:
+        universe = make_universe(n)
+
+        # As duas abordagens devem escolher o mesmo conjunto de ações
+        expected = {s['symbol'] for s in legacy_select(universe)}
+        assert {s['symbol'] for s in selector.select(universe)} == expected
+
+        legacy_ms = bench(legacy_select, universe, args.repeat)
+        heap_ms = bench(selector.select, universe, args.repeat)
+        constrained_ms = bench(constrained.select, universe, args.repeat)
+        print(f"{n:>8} {legacy_ms:>12.2f} {heap_ms:>10.2f} {constrained_ms:>18.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark da triagem em lote da Plataforma Inteligente da Clearview Capital.
+Compara a avaliação original ação por ação (o código em dicts de
+calculate_graham_value e evaluate_stock, reproduzido abaixo) com o Screener em
+lote no próprio processo e com o pool de processos, para diferentes números de
+processos. Os ganhos do pool só aparecem com núcleos livres: o cabeçalho mostra
+quantos estão disponíveis para o benchmark.
+
+Uso:
+    python benchmarks/bench_screening.py --sizes 2000 20000 100000 --workers 1 2 4
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+import numpy as np
+
+# Adicionar diretórios ao path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+from analysis.screening import Screener
+
+def make_universe(n, seed=42):
+    """
+    Gera preços e fundamentals sintéticos nas mesmas faixas de fetch_fundamentals.
+
+    Args:
+        n (int): Número de ações
+        seed (int): Semente do gerador aleatório
+
+    Returns:
+        tuple: (lista de preços, lista de dicts de fundamentals)
+    """
+    rng = random.Random(seed)
+    prices = [round(rng.uniform(5, 500), 2) for _ in range(n)]
+    fundamentals = [{
+        'P/L': round(rng.uniform(5, 30), 2),
+        'P/VP': round(rng.uniform(0.5, 5), 2),
+        'ROE': round(rng.uniform(5, 25), 2),
+        'Dividend Yield': round(rng.uniform(0, 10), 2),
+        'Dívida/EBITDA': round(rng.uniform(0, 3), 2),
+        'Margem Líquida': round(rng.uniform(5, 30), 2),
+        'Margem EBITDA': round(rng.uniform(10, 40), 2),
+        'Crescimento Receita (5 anos)': round(rng.uniform(0, 20), 2),
+    } for _ in range(n)]
+    return prices, fundamentals
+
+def legacy_graham_value(current_price, fundamentals):
+    """Valor de Graham como no calculate_graham_value original, ação por ação."""
+    pe_ratio = fundamentals.get('P/L', 15)
+    pb_ratio = fundamentals.get('P/VP', 2)
+
+    lpa = current_price / pe_ratio if pe_ratio > 0 else 0
+    vpa = current_price / pb_ratio if pb_ratio > 0 else 0
+
+    if lpa > 0 and vpa > 0:
+        graham_value = np.sqrt(22.5 * lpa * vpa)
+    else:
+        graham_value = current_price
+
+    potential = ((graham_value - current_price) / current_price) * 100
+
+    return {
+        'fair_value': round(graham_value, 2),
+        'potential': round(potential, 2),
+        'lpa': round(lpa, 2),
+        'vpa': round(vpa, 2)
+    }
+
+def legacy_evaluate(current_price, fundamentals, graham_value):
+    """Avaliação como no evaluate_stock original, ação por ação."""
+    evaluation = {
+        'rating': 'Neutro',
+        'strengths': [],
+        'weaknesses': [],
+        'opportunity': False,
+        'score': 0
+    }
+
+    score = 0
+
+    pl = fundamentals.get('P/L', 0)
+    if pl > 0:
+        if pl < 10:
+            score += 2
+            evaluation['strengths'].append('P/L baixo, indicando possível subavaliação')
+        elif pl > 25:
+            score -= 2
+            evaluation['weaknesses'].append('P/L alto, indicando possível sobreavaliação')
+
+    pvp = fundamentals.get('P/VP', 0)
+    if pvp > 0:
+        if pvp < 1:
+            score += 2
+            evaluation['strengths'].append('P/VP abaixo de 1, indicando possível subavaliação')
+        elif pvp > 3:
+            score -= 1
+            evaluation['weaknesses'].append('P/VP alto, indicando possível sobreavaliação')
+
+    roe = fundamentals.get('ROE', 0)
+    if roe > 15:
+        score += 2
+        evaluation['strengths'].append('ROE alto, indicando boa rentabilidade')
+    elif roe < 8:
+        score -= 1
+        evaluation['weaknesses'].append('ROE baixo, indicando rentabilidade abaixo da média')
+
+    dy = fundamentals.get('Dividend Yield', 0)
+    if dy > 6:
+        score += 2
+        evaluation['strengths'].append('Dividend Yield atrativo')
+
+    debt_ebitda = fundamentals.get('Dívida/EBITDA', 0)
+    if debt_ebitda < 1.5:
+        score += 1
+        evaluation['strengths'].append('Baixo endividamento')
+    elif debt_ebitda > 3:
+        score -= 2
+        evaluation['weaknesses'].append('Alto endividamento')
+
+    potential = graham_value.get('potential', 0)
+    if potential > 30:
+        score += 3
+        evaluation['strengths'].append('Alto potencial segundo fórmula de Graham')
+        evaluation['opportunity'] = True
+    elif potential > 15:
+        score += 2
+        evaluation['strengths'].append('Bom potencial segundo fórmula de Graham')
+    elif potential < -15:
+        score -= 2
+        evaluation['weaknesses'].append('Potencial negativo segundo fórmula de Graham')
+
+    evaluation['score'] = score
+    if score >= 5:
+        evaluation['rating'] = 'Compra'
+    elif score >= 2:
+        evaluation['rating'] = 'Manter'
+    elif score <= -3:
+        evaluation['rating'] = 'Venda'
+    else:
+        evaluation['rating'] = 'Neutro'
+
+    fair_value = graham_value.get('fair_value', 0)
+    if current_price > 0 and fair_value > 0:
+        if current_price <= 0.7 * fair_value:
+            evaluation['opportunity'] = True
+            evaluation['strengths'].append('Cotada abaixo de 70% do valor justo')
+
+    return evaluation
+
+def serial_evaluate(prices, fundamentals):
+    """Caminho original: uma chamada de cada regra por ação, sobre os dicts."""
+    results = []
+    for price, values in zip(prices, fundamentals):
+        graham_value = legacy_graham_value(price, values)
+        results.append((graham_value, legacy_evaluate(price, values, graham_value)))
+    return results
+
+def available_cores():
+    """Núcleos que este processo (e seus filhos) pode usar."""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def bench(fn, repeat):
+    """Retorna o melhor tempo (em ms) de `repeat` execuções."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da triagem em série vs. pool de processos")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[2000, 20000, 100000])
+    parser.add_argument('--workers', type=int, nargs='+', default=sorted({1, 2, os.cpu_count() or 1}))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    serial = Screener(workers=0)
+    screeners = {w: Screener(workers=w) for w in args.workers if w > 1}
+
+    print(f"Núcleos disponíveis: {available_cores()}")
+    header = f"{'n':>8} {'por ação (ms)':>14} {'lote (ms)':>10}"
+    for w in screeners:
+        header += f" {f'{w} proc. (ms)':>14}"
+    print(header)
+
+    try:
+        for n in args.sizes:
+            prices, fundamentals = make_universe(n)
+            expected = serial_evaluate(prices, fundamentals)
+            assert serial.evaluate(prices, fundamentals) == expected
+
+            line = f"{n:>8} {bench(lambda: serial_evaluate(prices, fundamentals), args.repeat):>14.1f}"
+            line += f" {bench(lambda: serial.evaluate(prices, fundamentals), args.repeat):>10.1f}"
+            for w, screener in screeners.items():
+                # Aquecimento: cria o pool e valida o resultado contra o caminho ação por ação
+                assert screener.evaluate(prices, fundamentals, parallel=True) == expected
+                line += f" {bench(lambda: screener.evaluate(prices, fundamentals, parallel=True), args.repeat):>14.1f}"
+            print(line)
+    finally:
+        for screener in screeners.values():
+            screener.shutdown()
+
+if __name__ == "__main__":
+    main()
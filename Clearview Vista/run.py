@@ -31,7 +31,7 @@ sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "backen
 
 # Importar módulos do sistema
 try:
-    from backend.api_server import app
+    from backend.api_server import app, market_overview, news_store, seed_sample_news
     from backend.analysis.stock_analyzer import StockAnalyzer
     from backend.analysis.ai_integration import AIIntegration
     from backend.notification_system import NotificationSystem
@@ -93,15 +93,16 @@ def main():
         logger.info("Analisador de ações inicializado")
         
         # Integração com IA
-        ai = AIIntegration(data_dir=data_dir)
+        ai = AIIntegration(data_dir=data_dir, market_overview=market_overview, news_store=news_store)
         logger.info("Integração com IA inicializada")
         
         # Sistema de notificações
-        notification_system = NotificationSystem(data_dir=data_dir)
+        notification_system = NotificationSystem(data_dir=data_dir, market_overview=market_overview, news_store=news_store)
         logger.info("Sistema de notificações inicializado")
         
         # Inicializar dados
         logger.info("Inicializando dados...")
+        seed_sample_news()
         portfolio = analyzer.update_portfolio()
         logger.info(f"Carteira inicializada com {len(portfolio.get('stocks', []))} ações")
         
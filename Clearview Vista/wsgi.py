@@ -14,7 +14,10 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
 
 # Importar a aplicação Flask
-from backend.api_server import app
+from backend.api_server import app, seed_sample_news
+
+# Notícias de exemplo num armazenamento vazio
+seed_sample_news()
 
 # Para execução com Gunicorn
 if __name__ == "__main__":